@@ -2,51 +2,178 @@
 Configuration settings for NutriMind backend
 """
 
-from pydantic_settings import BaseSettings
 from typing import List
-import os
+
 from dotenv import load_dotenv
+from pydantic_settings import BaseSettings
 
 load_dotenv()
 
 class Settings(BaseSettings):
     """Application settings"""
-    
+
     # API Settings
     API_V1_STR: str = "/api"
     PROJECT_NAME: str = "NutriMind API"
-    
+
     # Fetch.ai ASI API
     FETCH_API_KEY: str = ""                        # Your Fetch.ai key from .env
     ASI_MODEL: str = "asi1-mini"                   # Default model
+    # Point at benchmarks/fake_asi.py for load tests
+    ASI_BASE_URL: str = "https://api.asi1.ai/v1"
     MAX_TOKENS: int = 32000
     TEMPERATURE: float = 0.7
 
+    # Completion token budgets (sized per request, capped by MAX_TOKENS)
+    TOKEN_BUDGET_ENABLED: bool = True
+    TOKEN_BUDGET_HEADROOM: float = 1.5
+    MAX_TOKENS_MEAL_PLAN: int = 20000
+    MAX_TOKENS_RECIPES: int = 6000
+    MAX_TOKENS_NUTRITION: int = 1500
+    MAX_TOKENS_CHAT: int = 2000
+
+    # Upstream HTTP transport (shared, pooled client)
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP_READ_TIMEOUT: float = 120.0
+    # Used only if the h2 package is installed
+    HTTP2_ENABLED: bool = True
+
+    # Upstream resilience
+    UPSTREAM_MAX_RETRIES: int = 2
+    UPSTREAM_RETRY_BASE_DELAY: float = 0.5
+    UPSTREAM_RETRY_MAX_DELAY: float = 8.0
+    # Fire a second request after the observed p95 latency
+    UPSTREAM_HEDGING_ENABLED: bool = False
+    UPSTREAM_HEDGE_MIN_SAMPLES: int = 20
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_BREAKER_RESET_TIMEOUT: float = 30.0
+    # Background health probes drive /api/health and shedding
+    UPSTREAM_PROBE_ENABLED: bool = True
+    UPSTREAM_PROBE_INTERVAL: float = 15.0          # Seconds between probes
+    UPSTREAM_PROBE_TIMEOUT: float = 5.0
+    # Probe latency (EWMA, seconds) above which the upstream is degraded
+    UPSTREAM_DEGRADED_LATENCY: float = 2.0
+    # Reject new LLM calls early while degraded/down
+    UPSTREAM_LOAD_SHEDDING: bool = True
+
+    # Upstream provider (record/replay for deterministic performance runs)
+    # live | record (live + write cassette) | replay (cassette only)
+    UPSTREAM_MODE: str = "live"
+    UPSTREAM_CASSETTE_PATH: str = "upstream_cassette.jsonl.gz"
+    # 1 replays recorded timings, 0 answers instantly
+    UPSTREAM_REPLAY_DELAY_SCALE: float = 1.0
+
+    # Meal plan generation
+    # Generate multi-day plans one day per upstream call
+    MEAL_PLAN_PARALLEL_DAYS: bool = True
+    MEAL_PLAN_MAX_PARALLEL_DAYS: int = 7
+    # Assemble plans from stored recipes before calling the LLM
+    MEAL_PLANNER_ENABLED: bool = True
+    # Max daily calorie error for a locally planned day
+    MEAL_PLANNER_TOLERANCE: float = 0.1
+    # Times one stored recipe may appear in a local plan
+    MEAL_PLANNER_MAX_RECIPE_USES: int = 1
+
+    # Chat sessions
+    CHAT_SESSION_MAX: int = 1024                   # Sessions kept in memory (LRU)
+    # Idle seconds before a session is dropped
+    CHAT_SESSION_TTL: float = 3600.0
+    # Recent history sent upstream each turn
+    CHAT_CONTEXT_TOKENS: int = 1500
+    # Length of the rolling summary of older turns
+    CHAT_SUMMARY_WORDS: int = 150
+
+    # Batch endpoints
+    BATCH_MAX_CONCURRENCY: int = 8
+    # Small nutrition items packed into one prompt
+    NUTRITION_PACK_SIZE: int = 5
+    # Items with more ingredients run on their own
+    NUTRITION_PACK_MAX_INGREDIENTS: int = 15
+
+    # Local nutrition engine
+    INGREDIENT_PARSER_CACHE_SIZE: int = 8192       # Memoized ingredient lines
+    NUTRITION_ENGINE_ENABLED: bool = True
+    NUTRITION_TABLE_PATH: str = ""                 # Defaults to app/data/nutrients.npz
+    # Ask the LLM about ingredients missing from the table
+    NUTRITION_LLM_FALLBACK: bool = True
+    # Rule-based recommendations unless enabled
+    NUTRITION_LLM_RECOMMENDATIONS: bool = False
+
     # CORS Settings
     ALLOWED_ORIGINS: str = (
         "http://localhost:5173,http://localhost:3000,http://localhost:3002,"
         "http://127.0.0.1:5173,http://127.0.0.1:3000,http://127.0.0.1:3002,"
         "https://nutrimindweb.netlify.app"
     )
-    
+
     # Server Settings
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     RELOAD: bool = True
-    
-    # Rate Limiting
+
+    # Rate Limiting (applied to upstream LLM calls)
     RATE_LIMIT_PER_MINUTE: int = 60
-    
+    RATE_LIMIT_BURST: int = 10
+    UPSTREAM_MAX_IN_FLIGHT: int = 16
+    UPSTREAM_MAX_QUEUE: int = 64
+    # Seconds to wait for admission before 429/503
+    UPSTREAM_QUEUE_TIMEOUT: float = 10.0
+
     # Cache Settings
     CACHE_TTL: int = 3600
-    
+    CACHE_ENABLED: bool = True
+    CACHE_MAX_ENTRIES: int = 1024
+    # SQLite file for a restart-safe tier; empty disables
+    CACHE_DISK_PATH: str = ""
+    # Serve near-duplicate recipe/meal plan requests
+    SIMILARITY_CACHE_ENABLED: bool = True
+    # Minimum Jaccard similarity of ingredient/preference words
+    SIMILARITY_THRESHOLD: float = 0.7
+    SIMILARITY_MAX_ENTRIES: int = 1024
+    # Calorie targets this close count as the same
+    SIMILARITY_CALORIE_TOLERANCE: int = 50
+
+    # Recipe store (GET /recipes/{id})
+    # SQLite file; empty keeps recipes in memory only
+    RECIPE_STORE_PATH: str = "recipes.db"
+    RECIPE_STORE_CACHE_SIZE: int = 2048
+    # Answer searches from stored recipes first
+    RECIPE_INDEX_ENABLED: bool = True
+    # Share of searched ingredients a stored recipe must use
+    RECIPE_INDEX_MIN_COVERAGE: float = 0.6
+    # Local hits needed to skip the LLM entirely
+    RECIPE_INDEX_MIN_RESULTS: int = 3
+
+    # Trending (GET /recipes/trending)
+    # Counters per window and kind (Space-Saving)
+    TRENDING_CAPACITY: int = 256
+    TRENDING_TOP_K: int = 20
+    TRENDING_REFRESH_SECONDS: float = 60.0
+
+    # Shared state across worker processes (response cache, rate limiter, chat sessions)
+    # sqlite:///state.db or redis://host:6379/0; empty keeps state per process
+    SHARED_STATE_URL: str = ""
+    # Seconds a synced chat session is reused without reading the store
+    SHARED_STATE_NEAR_CACHE_TTL: float = 2.0
+    # Redis socket / SQLite lock timeout per operation (blocks the event loop)
+    SHARED_STATE_TIMEOUT: float = 0.25
+    # Seconds to use per-process state after a store failure
+    SHARED_STATE_COOLDOWN: float = 5.0
+
+    # Metrics (GET /api/metrics, Prometheus text format)
+    # Record stage latencies and upstream counters
+    METRICS_ENABLED: bool = True
+
     # Logging
     LOG_LEVEL: str = "INFO"
-    
+
     class Config:
         env_file = ".env"
         case_sensitive = True
-    
+
     def get_allowed_origins(self) -> List[str]:
         """Parse ALLOWED_ORIGINS string to list"""
         return [origin.strip() for origin in self.ALLOWED_ORIGINS.split(',')]
@@ -3,28 +3,66 @@ NutriMind Backend API
 FastAPI application with Claude AI integration for meal planning and recipe suggestions
 """
 
+import logging
+import math
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-import logging
 
-from app.routes import meal_plan, recipes, health
 from app.config import settings
+from app.routes import health, meal_plan, metrics, recipes
+from app.services.ai_service import ai_service
+from app.services.meal_planner import meal_planner
+from app.services.nutrition_engine import nutrition_engine
+from app.services.rate_limiter import AdmissionRejected
+from app.services.recipe_index import recipe_index
+from app.services.recipe_store import recipe_store
+from app.services.shared_state import shared_store
+from app.services.trending import trending
+from app.services.upstream_health import upstream_health
 
 # Configure logging
 logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared upstream resources on startup and release them on shutdown"""
+    await ai_service.startup()
+    await recipe_store.start()
+    if settings.RECIPE_INDEX_ENABLED:
+        recipe_index.build(recipe_store.iter_recipes())
+    if settings.MEAL_PLANNER_ENABLED:
+        meal_planner.build(recipe_store.iter_recipes())
+    if settings.NUTRITION_ENGINE_ENABLED:
+        nutrition_engine.load()
+    await trending.start()
+    if settings.UPSTREAM_PROBE_ENABLED:
+        await upstream_health.start(ai_service.probe_upstream)
+    try:
+        yield
+    finally:
+        await upstream_health.stop()
+        await trending.stop()
+        await ai_service.close()
+        await recipe_store.close()
+        if shared_store is not None:
+            shared_store.close()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="NutriMind API",
     description="AI-powered meal planning and recipe discovery API using Claude AI",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -40,6 +78,8 @@ app.add_middleware(
 app.include_router(health.router, prefix="/api", tags=["Health"])
 app.include_router(meal_plan.router, prefix="/api", tags=["Meal Planning"])
 app.include_router(recipes.router, prefix="/api", tags=["Recipes"])
+app.include_router(metrics.router, prefix="/api", tags=["Metrics"])
+
 
 @app.get("/")
 async def root():
@@ -48,32 +88,35 @@ async def root():
         "message": "Welcome to NutriMind API",
         "version": "1.0.0",
         "docs": "/docs",
-        "health": "/api/health"
+        "health": "/api/health",
     }
 
+
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
     """Custom HTTP exception handler"""
     logger.error(f"HTTP error occurred: {exc.detail}")
+    return JSONResponse(status_code=exc.status_code, content={"error": exc.detail})
+
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request, exc):
+    """Upstream admission rejected: fail fast with 429/503"""
+    logger.warning(f"Upstream admission rejected: {str(exc)}")
+    headers = {"Retry-After": str(math.ceil(exc.retry_after or 1))}
     return JSONResponse(
-        status_code=exc.status_code,
-        content={"error": exc.detail}
+        status_code=exc.status_code, content={"error": str(exc)}, headers=headers
     )
 
+
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
     """General exception handler"""
     logger.error(f"Unexpected error occurred: {str(exc)}")
-    return JSONResponse(
-        status_code=500,
-        content={"error": "Internal server error"}
-    )
+    return JSONResponse(status_code=500, content={"error": "Internal server error"})
+
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True
-    )
\ No newline at end of file
+
+    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
@@ -2,12 +2,17 @@
 Request models for API endpoints
 """
 
-from pydantic import BaseModel, Field, validator
-from typing import List, Optional
 from enum import Enum
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, validator
+
+from app.models.response import DayPlan
+
 
 class DietaryRestriction(str, Enum):
     """Supported dietary restrictions"""
+
     VEGETARIAN = "vegetarian"
     VEGAN = "vegan"
     GLUTEN_FREE = "gluten_free"
@@ -20,139 +25,144 @@ class DietaryRestriction(str, Enum):
     HALAL = "halal"
     KOSHER = "kosher"
 
+
 class MealType(str, Enum):
     """Types of meals"""
+
     BREAKFAST = "breakfast"
     LUNCH = "lunch"
     DINNER = "dinner"
     SNACK = "snack"
 
+
 class MealPlanRequest(BaseModel):
     """Request model for meal plan generation"""
-    
+
     dietary_restrictions: List[DietaryRestriction] = Field(
-        default=[],
-        description="List of dietary restrictions"
+        default=[], description="List of dietary restrictions"
     )
-    
+
     calorie_target: Optional[int] = Field(
-        None,
-        ge=800,
-        le=5000,
-        description="Target daily calories (800-5000)"
+        None, ge=800, le=5000, description="Target daily calories (800-5000)"
     )
-    
+
     meals_per_day: int = Field(
-        3,
-        ge=1,
-        le=6,
-        description="Number of meals per day (1-6)"
-    )
-    
-    days: int = Field(
-        1,
-        ge=1,
-        le=7,
-        description="Number of days to plan (1-7)"
-    )
-    
-    allergies: List[str] = Field(
-        default=[],
-        description="List of food allergies"
-    )
-    
+        3, ge=1, le=6, description="Number of meals per day (1-6)"
+    )
+
+    days: int = Field(1, ge=1, le=7, description="Number of days to plan (1-7)")
+
+    allergies: List[str] = Field(default=[], description="List of food allergies")
+
     preferences: Optional[str] = Field(
-        None,
-        max_length=500,
-        description="Additional preferences or notes"
+        None, max_length=500, description="Additional preferences or notes"
     )
-    
-    @validator('allergies')
+
+    @validator("allergies")
     def validate_allergies(cls, v):
         if len(v) > 10:
-            raise ValueError('Maximum 10 allergies allowed')
+            raise ValueError("Maximum 10 allergies allowed")
         return [allergy.strip().lower() for allergy in v]
 
+
+class MealPlanAnalysisRequest(BaseModel):
+    """Request model for analyzing an existing meal plan"""
+
+    plan: List[DayPlan] = Field(
+        ...,
+        min_items=1,
+        max_items=31,
+        description="Days of a meal plan, as returned by /meal-plan",
+    )
+
+    calorie_target: Optional[int] = Field(
+        None,
+        ge=800,
+        le=5000,
+        description="Daily calorie target to compare against (800-5000)",
+    )
+
+
 class RecipeSearchRequest(BaseModel):
     """Request model for recipe search by ingredients"""
-    
+
     ingredients: List[str] = Field(
         ...,
         min_items=1,
         max_items=20,
-        description="List of available ingredients (1-20)"
+        description="List of available ingredients (1-20)",
     )
-    
+
     dietary_restrictions: List[DietaryRestriction] = Field(
-        default=[],
-        description="List of dietary restrictions"
-    )
-    
-    meal_type: Optional[MealType] = Field(
-        None,
-        description="Type of meal"
+        default=[], description="List of dietary restrictions"
     )
-    
+
+    meal_type: Optional[MealType] = Field(None, description="Type of meal")
+
     cuisine: Optional[str] = Field(
-        None,
-        max_length=50,
-        description="Preferred cuisine type"
+        None, max_length=50, description="Preferred cuisine type"
     )
-    
+
     cooking_time: Optional[int] = Field(
-        None,
-        ge=5,
-        le=240,
-        description="Maximum cooking time in minutes (5-240)"
-    )
-    
-    servings: int = Field(
-        4,
-        ge=1,
-        le=12,
-        description="Number of servings (1-12)"
-    )
-    
-    @validator('ingredients')
+        None, ge=5, le=240, description="Maximum cooking time in minutes (5-240)"
+    )
+
+    servings: int = Field(4, ge=1, le=12, description="Number of servings (1-12)")
+
+    @validator("ingredients")
     def validate_ingredients(cls, v):
         if not v:
-            raise ValueError('At least one ingredient is required')
+            raise ValueError("At least one ingredient is required")
         return [ingredient.strip().lower() for ingredient in v if ingredient.strip()]
 
+
 class ChatRequest(BaseModel):
     """Request model for AI chat interaction"""
-    
+
     message: str = Field(
-        ...,
-        min_length=1,
-        max_length=1000,
-        description="User message to AI assistant"
+        ..., min_length=1, max_length=1000, description="User message to AI assistant"
     )
-    
+
     context: Optional[List[dict]] = Field(
         None,
-        description="Previous conversation context"
+        description="Previous conversation context (only used to seed a new session)",
     )
 
+    session_id: Optional[str] = Field(
+        None,
+        max_length=64,
+        description=(
+            "Server-side chat session to continue; a new one (with a new id) "
+            "is started if omitted, unknown or expired"
+        ),
+    )
+
+
 class NutritionAnalysisRequest(BaseModel):
     """Request model for nutritional analysis"""
-    
+
     recipe_name: str = Field(
-        ...,
-        min_length=1,
-        max_length=200,
-        description="Name of the recipe or meal"
+        ..., min_length=1, max_length=200, description="Name of the recipe or meal"
     )
-    
+
     ingredients: List[str] = Field(
-        ...,
-        min_items=1,
-        description="List of ingredients with quantities"
-    )
-    
-    servings: int = Field(
-        1,
-        ge=1,
-        le=12,
-        description="Number of servings"
+        ..., min_items=1, description="List of ingredients with quantities"
+    )
+
+    servings: int = Field(1, ge=1, le=12, description="Number of servings")
+
+
+class NutritionAnalysisBatchRequest(BaseModel):
+    """Request model for batched nutritional analysis"""
+
+    items: List[NutritionAnalysisRequest] = Field(
+        ..., min_items=1, max_items=100, description="Recipes to analyze (1-100)"
+    )
+
+
+class RecipeSearchBatchRequest(BaseModel):
+    """Request model for batched recipe search"""
+
+    items: List[RecipeSearchRequest] = Field(
+        ..., min_items=1, max_items=50, description="Recipe searches to run (1-50)"
     )
@@ -2,12 +2,15 @@
 Response models for API endpoints
 """
 
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
 from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
 
 class NutritionInfo(BaseModel):
     """Nutritional information model"""
+
     calories: int = Field(..., description="Calories per serving")
     protein: float = Field(..., description="Protein in grams")
     carbohydrates: float = Field(..., description="Carbohydrates in grams")
@@ -16,8 +19,10 @@ class NutritionInfo(BaseModel):
     sugar: Optional[float] = Field(None, description="Sugar in grams")
     sodium: Optional[float] = Field(None, description="Sodium in mg")
 
+
 class Recipe(BaseModel):
     """Recipe model"""
+
     id: str = Field(..., description="Unique recipe identifier")
     name: str = Field(..., description="Recipe name")
     description: str = Field(..., description="Recipe description")
@@ -34,59 +39,235 @@ class Recipe(BaseModel):
     tags: List[str] = Field(default=[], description="Recipe tags")
     image_url: Optional[str] = Field(None, description="Recipe image URL")
 
+
 class Meal(BaseModel):
     """Meal model for meal plans"""
+
     meal_type: str = Field(..., description="Type of meal")
     recipe: Recipe = Field(..., description="Recipe for this meal")
 
+
 class DayPlan(BaseModel):
     """Daily meal plan"""
+
     day: int = Field(..., description="Day number")
     date: Optional[str] = Field(None, description="Date for this day")
     meals: List[Meal] = Field(..., description="Meals for this day")
-    total_nutrition: NutritionInfo = Field(..., description="Total nutrition for the day")
+    total_nutrition: NutritionInfo = Field(
+        ..., description="Total nutrition for the day"
+    )
+
+
+class DayNutrition(BaseModel):
+    """Nutrition totals for one day of a plan"""
+
+    day: int = Field(..., description="Day number")
+    total_nutrition: NutritionInfo = Field(
+        ..., description="Total nutrition for the day"
+    )
+    calorie_deviation: Optional[float] = Field(
+        None, description="Calories above (+) or below (-) the target"
+    )
+
+
+class MealTypeNutrition(BaseModel):
+    """Nutrition of all meals of one type across a plan"""
+
+    meal_type: str = Field(..., description="Type of meal")
+    meals: int = Field(..., description="Number of meals of this type")
+    total_nutrition: NutritionInfo = Field(
+        ..., description="Total nutrition of these meals"
+    )
+    calorie_share: float = Field(..., description="Percent of the plan's calories")
+
+
+class MealPlanAnalytics(BaseModel):
+    """Nutrition analytics for a whole meal plan"""
+
+    days: List[DayNutrition] = Field(..., description="Per-day totals")
+    total_nutrition: NutritionInfo = Field(
+        ..., description="Total nutrition of the plan"
+    )
+    average_per_day: NutritionInfo = Field(..., description="Average daily nutrition")
+    macro_percentages: Dict[str, float] = Field(
+        ...,
+        description="Percent of macronutrient calories from protein, carbs and fat",
+    )
+    calorie_target: Optional[int] = Field(
+        None, description="Daily calorie target compared against"
+    )
+    average_calorie_deviation: Optional[float] = Field(
+        None, description="Mean daily calories minus the target"
+    )
+    max_calorie_deviation: Optional[float] = Field(
+        None, description="Largest absolute daily deviation from the target"
+    )
+    days_on_target: Optional[int] = Field(
+        None, description="Days within 10% of the target"
+    )
+    by_meal_type: List[MealTypeNutrition] = Field(
+        ..., description="Breakdown by meal type"
+    )
+
+
+class MealPlanAnalysisResponse(BaseModel):
+    """Response model for meal plan analysis"""
+
+    success: bool = Field(..., description="Success status")
+    analytics: MealPlanAnalytics = Field(
+        ..., description="Nutrition analytics for the plan"
+    )
+
 
 class MealPlanResponse(BaseModel):
     """Response model for meal plan generation"""
+
     success: bool = Field(..., description="Success status")
     plan: List[DayPlan] = Field(..., description="Meal plan for requested days")
     summary: Dict[str, Any] = Field(..., description="Plan summary")
-    generated_at: datetime = Field(default_factory=datetime.now, description="Generation timestamp")
+    generated_at: datetime = Field(
+        default_factory=datetime.now, description="Generation timestamp"
+    )
+
 
 class RecipeSearchResponse(BaseModel):
     """Response model for recipe search"""
+
     success: bool = Field(..., description="Success status")
     recipes: List[Recipe] = Field(..., description="List of matching recipes")
     total_count: int = Field(..., description="Total number of recipes found")
     query_info: Dict[str, Any] = Field(..., description="Information about the query")
 
+
 class ChatResponse(BaseModel):
     """Response model for AI chat"""
+
     success: bool = Field(..., description="Success status")
     message: str = Field(..., description="AI assistant response")
     suggestions: Optional[List[str]] = Field(None, description="Follow-up suggestions")
-    timestamp: datetime = Field(default_factory=datetime.now, description="Response timestamp")
+    session_id: Optional[str] = Field(
+        None, description="Chat session to pass on the next message"
+    )
+    timestamp: datetime = Field(
+        default_factory=datetime.now, description="Response timestamp"
+    )
+
 
 class NutritionAnalysisResponse(BaseModel):
     """Response model for nutrition analysis"""
+
     success: bool = Field(..., description="Success status")
     recipe_name: str = Field(..., description="Name of analyzed recipe")
-    nutrition_per_serving: NutritionInfo = Field(..., description="Nutrition per serving")
+    nutrition_per_serving: NutritionInfo = Field(
+        ..., description="Nutrition per serving"
+    )
     nutrition_total: NutritionInfo = Field(..., description="Total nutrition")
     servings: int = Field(..., description="Number of servings")
     health_score: int = Field(..., description="Health score (0-100)")
     recommendations: List[str] = Field(..., description="Health recommendations")
 
+
+class NutritionAnalysisBatchItem(BaseModel):
+    """Result for one item of a batched nutrition analysis"""
+
+    index: int = Field(..., description="Position of the item in the request")
+    success: bool = Field(..., description="Whether this item succeeded")
+    result: Optional[NutritionAnalysisResponse] = Field(
+        None, description="Analysis for this item"
+    )
+    error: Optional[str] = Field(None, description="Error message if this item failed")
+    status_code: Optional[int] = Field(
+        None, description="HTTP-style status for a failed item"
+    )
+
+
+class NutritionAnalysisBatchResponse(BaseModel):
+    """Response model for batched nutrition analysis"""
+
+    success: bool = Field(..., description="True if every item succeeded")
+    results: List[NutritionAnalysisBatchItem] = Field(
+        ..., description="Per-item results, in request order"
+    )
+    total_count: int = Field(..., description="Number of items")
+    failed_count: int = Field(..., description="Number of failed items")
+
+
+class RecipeSearchBatchItem(BaseModel):
+    """Result for one item of a batched recipe search"""
+
+    index: int = Field(..., description="Position of the item in the request")
+    success: bool = Field(..., description="Whether this item succeeded")
+    result: Optional[RecipeSearchResponse] = Field(
+        None, description="Search results for this item"
+    )
+    error: Optional[str] = Field(None, description="Error message if this item failed")
+    status_code: Optional[int] = Field(
+        None, description="HTTP-style status for a failed item"
+    )
+
+
+class RecipeSearchBatchResponse(BaseModel):
+    """Response model for batched recipe search"""
+
+    success: bool = Field(..., description="True if every item succeeded")
+    results: List[RecipeSearchBatchItem] = Field(
+        ..., description="Per-item results, in request order"
+    )
+    total_count: int = Field(..., description="Number of items")
+    failed_count: int = Field(..., description="Number of failed items")
+
+
+class TrendingIngredient(BaseModel):
+    """One trending ingredient"""
+
+    name: str = Field(..., description="Canonical ingredient name")
+    score: float = Field(..., description="Time-decayed search count")
+
+
+class TrendingRecipe(BaseModel):
+    """One trending recipe"""
+
+    id: str = Field(..., description="Recipe ID (see GET /recipes/{id})")
+    name: str = Field(..., description="Recipe name")
+    score: float = Field(
+        ..., description="Time-decayed count of serves and meal plan picks"
+    )
+
+
+class TrendingResponse(BaseModel):
+    """Response model for trending ingredients and recipes"""
+
+    success: bool = Field(..., description="Success status")
+    window: str = Field(..., description="Decay window: hourly or daily")
+    ingredients: List[TrendingIngredient] = Field(
+        ..., description="Most searched ingredients"
+    )
+    recipes: List[TrendingRecipe] = Field(
+        ..., description="Most served and picked recipes"
+    )
+    generated_at: datetime = Field(..., description="When this snapshot was computed")
+
+
 class HealthCheckResponse(BaseModel):
     """Response model for health check"""
+
     status: str = Field(..., description="Service status")
     version: str = Field(..., description="API version")
-    timestamp: datetime = Field(default_factory=datetime.now, description="Check timestamp")
+    timestamp: datetime = Field(
+        default_factory=datetime.now, description="Check timestamp"
+    )
     services: Dict[str, str] = Field(..., description="Status of dependent services")
+    upstream: Optional[Dict[str, Any]] = Field(
+        None, description="Probed upstream latency and error rate"
+    )
+
 
 class ErrorResponse(BaseModel):
     """Error response model"""
+
     success: bool = Field(default=False, description="Success status")
     error: str = Field(..., description="Error message")
     error_code: Optional[str] = Field(None, description="Error code")
-    timestamp: datetime = Field(default_factory=datetime.now, description="Error timestamp")
\ No newline at end of file
+    timestamp: datetime = Field(
+        default_factory=datetime.now, description="Error timestamp"
+    )
@@ -2,4 +2,4 @@
 API Routes
 """
 
-from . import health, meal_plan, recipes
+from . import health, meal_plan, metrics, recipes
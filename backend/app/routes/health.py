@@ -2,22 +2,42 @@
 Health check endpoints
 """
 
+from datetime import datetime
+
 from fastapi import APIRouter
+
 from app.models.response import HealthCheckResponse
-from datetime import datetime
+from app.routes.json_response import ModelResponse
+from app.services.upstream_health import UpstreamHealth, upstream_health
 
 router = APIRouter()
 
+# Upstream status -> overall service status
+OVERALL_STATUS = {
+    UpstreamHealth.OPERATIONAL: "healthy",
+    UpstreamHealth.UNKNOWN: "healthy",
+    UpstreamHealth.DEGRADED: "degraded",
+    UpstreamHealth.DOWN: "unhealthy",
+}
+
+
 @router.get("/health", response_model=HealthCheckResponse)
 async def health_check():
-    """Health check endpoint"""
-    return HealthCheckResponse(
-        status="healthy",
+    """
+    Health check endpoint. Reports the upstream status cached by the background
+    prober; answers 503 while the upstream is down so load balancers back off.
+    """
+    upstream = upstream_health.snapshot()
+    response = HealthCheckResponse(
+        status=OVERALL_STATUS[upstream["status"]],
         version="1.0.0",
         timestamp=datetime.now(),
         services={
             "api": "operational",
-            "claude_ai": "operational",
-            "database": "not_implemented"
-        }
+            "claude_ai": upstream["status"],
+            "database": "not_implemented",
+        },
+        upstream=upstream,
     )
+    status_code = 503 if upstream["status"] == UpstreamHealth.DOWN else 200
+    return ModelResponse(response, status_code=status_code)
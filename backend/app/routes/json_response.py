@@ -0,0 +1,26 @@
+"""
+Single-pass JSON responses for already-validated pydantic models (orjson for plain data)
+"""
+
+from typing import Any
+
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+
+class ModelResponse(ORJSONResponse):
+    """
+    Serialize a response model to JSON in a single pass.
+
+    Returning a Response from a route makes FastAPI skip its response_model
+    handling (dump, re-validate, jsonable_encoder, json.dumps), which for a
+    large meal plan costs several times the serialization itself. The route
+    keeps `response_model=` for the OpenAPI schema; the model it returns has
+    already been validated once when it was built.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            # pydantic's serializer writes the model straight to JSON, skipping the dict
+            return content.model_dump_json().encode("utf-8")
+        return super().render(content)
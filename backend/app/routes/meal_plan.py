@@ -2,17 +2,147 @@
 Meal planning endpoints
 """
 
+import logging
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional
+
 from fastapi import APIRouter, HTTPException
-from app.models.request import MealPlanRequest, ChatRequest, NutritionAnalysisRequest
-from app.models.response import MealPlanResponse, ChatResponse, NutritionAnalysisResponse, ErrorResponse
+from fastapi.responses import StreamingResponse
+
+from app.models.request import (
+    ChatRequest,
+    MealPlanAnalysisRequest,
+    MealPlanRequest,
+    NutritionAnalysisBatchRequest,
+    NutritionAnalysisRequest,
+)
+from app.models.response import (
+    ChatResponse,
+    DayPlan,
+    Meal,
+    MealPlanAnalysisResponse,
+    MealPlanResponse,
+    NutritionAnalysisBatchItem,
+    NutritionAnalysisBatchResponse,
+    NutritionAnalysisResponse,
+)
+from app.routes.json_response import ModelResponse
+from app.routes.sse import SSE_HEADERS, sse_event
 from app.services.ai_service import ai_service
-from datetime import datetime, timedelta
-import logging
-import uuid
+from app.services.chat_sessions import chat_sessions
+from app.services.metrics import metrics
+from app.services.plan_analytics import analyze_plan
+from app.services.rate_limiter import AdmissionRejected
+from app.services.recipe_store import recipe_id_for, recipe_store
+from app.services.trending import trending
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+
+def _format_meal(meal_data: Dict, dietary_restrictions: List[str] = ()) -> Dict:
+    """Normalize one raw LLM meal object into the Meal shape"""
+    recipe_data = meal_data.get("recipe", {})
+
+    # Extract nutrition info
+    nutrition_data = recipe_data.get("nutrition", {})
+    nutrition = {
+        "calories": nutrition_data.get("calories", 0),
+        "protein": nutrition_data.get("protein", 0),
+        "carbohydrates": nutrition_data.get("carbohydrates", 0),
+        "fat": nutrition_data.get("fat", 0),
+        "fiber": nutrition_data.get("fiber", 0),
+        "sugar": nutrition_data.get("sugar", 0),
+        "sodium": nutrition_data.get("sodium", 0),
+    }
+
+    # Build recipe object
+    recipe = {
+        "name": recipe_data.get("name", "Unknown Recipe"),
+        "description": recipe_data.get("description", ""),
+        "ingredients": recipe_data.get("ingredients", []),
+        "instructions": recipe_data.get("instructions", []),
+        "prep_time": recipe_data.get("prep_time", 0),
+        "cook_time": recipe_data.get("cook_time", 0),
+        "total_time": recipe_data.get("prep_time", 0) + recipe_data.get("cook_time", 0),
+        "servings": recipe_data.get("servings", 1),
+        "difficulty": recipe_data.get("difficulty", "medium"),
+        "cuisine": recipe_data.get("cuisine"),
+        "meal_type": meal_data.get("meal_type"),
+        "nutrition": nutrition,
+        "tags": recipe_data.get("tags", []),
+        "image_url": None,  # Can be enhanced with image generation
+    }
+
+    # Content-hash ID so GET /recipes/{id} can serve it later
+    recipe = {"id": recipe_id_for(recipe), **recipe}
+    recipe_store.save(recipe, dietary_restrictions)
+
+    return {"meal_type": meal_data.get("meal_type", "meal"), "recipe": recipe}
+
+
+def _format_day(day_data: Dict, dietary_restrictions: List[str] = ()) -> Dict:
+    """Normalize one raw LLM day object into the DayPlan shape (totals are filled in
+    by _add_analytics)"""
+    day_number = day_data.get("day", 1)
+    meals = [
+        _format_meal(meal_data, dietary_restrictions)
+        for meal_data in day_data.get("meals", [])
+    ]
+
+    # Calculate date for this day
+    plan_date = (datetime.now() + timedelta(days=day_number - 1)).strftime("%Y-%m-%d")
+
+    return {"day": day_number, "date": plan_date, "meals": meals}
+
+
+def _add_analytics(day_plans: List[Dict], calorie_target: Optional[int]) -> Dict:
+    """Analyze the plan in one pass and set each day's total_nutrition from it"""
+    analytics = analyze_plan(day_plans, calorie_target)
+    for day_plan, day_analytics in zip(day_plans, analytics["days"], strict=True):
+        day_plan["total_nutrition"] = day_analytics["total_nutrition"]
+    return analytics
+
+
+def _build_summary(
+    request: MealPlanRequest, dietary_restrictions: List[str], analytics: Dict
+) -> Dict:
+    """Summary block shared by the regular and streaming meal plan endpoints"""
+    total_calories = analytics["total_nutrition"]["calories"]
+    return {
+        "total_days": request.days,
+        "meals_per_day": request.meals_per_day,
+        "average_calories_per_day": total_calories // request.days
+        if request.days > 0
+        else 0,
+        "dietary_restrictions": dietary_restrictions,
+        "calorie_target": request.calorie_target,
+        "nutrition": {key: value for key, value in analytics.items() if key != "days"},
+    }
+
+
+def _nutrition_response(
+    request: NutritionAnalysisRequest, analysis: Dict
+) -> NutritionAnalysisResponse:
+    """Build the nutrition analysis response from a raw analysis dict"""
+    nutrition_per_serving = analysis["nutrition_per_serving"]
+
+    # Calculate total nutrition unless the analysis already did
+    nutrition_total = analysis.get("nutrition_total") or {
+        key: value * request.servings for key, value in nutrition_per_serving.items()
+    }
+
+    return NutritionAnalysisResponse(
+        success=True,
+        recipe_name=request.recipe_name,
+        nutrition_per_serving=nutrition_per_serving,
+        nutrition_total=nutrition_total,
+        servings=request.servings,
+        health_score=analysis["health_score"],
+        recommendations=analysis["recommendations"],
+    )
+
+
 @router.post("/meal-plan", response_model=MealPlanResponse)
 async def generate_meal_plan(request: MealPlanRequest):
     """
@@ -21,109 +151,121 @@ async def generate_meal_plan(request: MealPlanRequest):
     try:
         # Convert enums to strings
         dietary_restrictions = [dr.value for dr in request.dietary_restrictions]
-        
+
         # Generate meal plan using AI
-        plan_data = await ai_service.generate_meal_plan(
-            dietary_restrictions=dietary_restrictions,
-            calorie_target=request.calorie_target,
-            meals_per_day=request.meals_per_day,
-            days=request.days,
-            allergies=request.allergies,
-            preferences=request.preferences
-        )
-        
+        with metrics.stage("meal_plan", "generate"):
+            plan_data = await ai_service.generate_meal_plan(
+                dietary_restrictions=dietary_restrictions,
+                calorie_target=request.calorie_target,
+                meals_per_day=request.meals_per_day,
+                days=request.days,
+                allergies=request.allergies,
+                preferences=request.preferences,
+            )
+
         # Process and format the response
+        with metrics.stage("meal_plan", "normalize"):
+            day_plans = [
+                _format_day(day_data, dietary_restrictions)
+                for day_data in plan_data.get("days", [])
+            ]
+            trending.record_meal_plan(day_plans)
+            analytics = _add_analytics(day_plans, request.calorie_target)
+
+            # Build summary
+            summary = _build_summary(request, dietary_restrictions, analytics)
+
+        with metrics.stage("meal_plan", "validate"):
+            response = MealPlanResponse(
+                success=True,
+                plan=day_plans,
+                summary=summary,
+                generated_at=datetime.now(),
+            )
+
+        with metrics.stage("meal_plan", "serialize"):
+            return ModelResponse(response)
+
+    except AdmissionRejected:
+        raise
+    except Exception as e:
+        logger.error(f"Error generating meal plan: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Failed to generate meal plan: {str(e)}"
+        ) from e
+
+
+@router.post("/meal-plan/stream")
+async def generate_meal_plan_stream(request: MealPlanRequest):
+    """
+    Stream a meal plan as Server-Sent Events.
+    Emits a `meal` event per completed meal and a `day` event per completed day,
+    then `summary` and `done`.
+    """
+    dietary_restrictions = [dr.value for dr in request.dietary_restrictions]
+
+    async def event_stream() -> AsyncIterator[str]:
         day_plans = []
-        total_calories = 0
-        
-        for day_data in plan_data.get("days", []):
-            day_number = day_data.get("day", 1)
-            meals = []
-            day_calories = 0
-            
-            for meal_data in day_data.get("meals", []):
-                recipe_data = meal_data.get("recipe", {})
-                
-                # Generate unique ID for recipe
-                recipe_id = str(uuid.uuid4())
-                
-                # Extract nutrition info
-                nutrition_data = recipe_data.get("nutrition", {})
-                nutrition = {
-                    "calories": nutrition_data.get("calories", 0),
-                    "protein": nutrition_data.get("protein", 0),
-                    "carbohydrates": nutrition_data.get("carbohydrates", 0),
-                    "fat": nutrition_data.get("fat", 0),
-                    "fiber": nutrition_data.get("fiber", 0),
-                    "sugar": nutrition_data.get("sugar", 0),
-                    "sodium": nutrition_data.get("sodium", 0)
-                }
-                
-                day_calories += nutrition["calories"]
-                
-                # Build recipe object
-                recipe = {
-                    "id": recipe_id,
-                    "name": recipe_data.get("name", "Unknown Recipe"),
-                    "description": recipe_data.get("description", ""),
-                    "ingredients": recipe_data.get("ingredients", []),
-                    "instructions": recipe_data.get("instructions", []),
-                    "prep_time": recipe_data.get("prep_time", 0),
-                    "cook_time": recipe_data.get("cook_time", 0),
-                    "total_time": recipe_data.get("prep_time", 0) + recipe_data.get("cook_time", 0),
-                    "servings": recipe_data.get("servings", 1),
-                    "difficulty": recipe_data.get("difficulty", "medium"),
-                    "cuisine": recipe_data.get("cuisine"),
-                    "meal_type": meal_data.get("meal_type"),
-                    "nutrition": nutrition,
-                    "tags": recipe_data.get("tags", []),
-                    "image_url": None  # Can be enhanced with image generation
-                }
-                
-                meals.append({
-                    "meal_type": meal_data.get("meal_type", "meal"),
-                    "recipe": recipe
-                })
-            
-            total_calories += day_calories
-            
-            # Calculate date for this day
-            plan_date = (datetime.now() + timedelta(days=day_number - 1)).strftime("%Y-%m-%d")
-            
-            day_plans.append({
-                "day": day_number,
-                "date": plan_date,
-                "meals": meals,
-                "total_nutrition": {
-                    "calories": day_calories,
-                    "protein": sum(m["recipe"]["nutrition"]["protein"] for m in meals),
-                    "carbohydrates": sum(m["recipe"]["nutrition"]["carbohydrates"] for m in meals),
-                    "fat": sum(m["recipe"]["nutrition"]["fat"] for m in meals),
-                    "fiber": sum(m["recipe"]["nutrition"]["fiber"] for m in meals),
-                    "sugar": sum(m["recipe"]["nutrition"].get("sugar", 0) for m in meals),
-                    "sodium": sum(m["recipe"]["nutrition"].get("sodium", 0) for m in meals)
-                }
-            })
-        
-        # Build summary
-        summary = {
-            "total_days": request.days,
-            "meals_per_day": request.meals_per_day,
-            "average_calories_per_day": total_calories // request.days if request.days > 0 else 0,
-            "dietary_restrictions": dietary_restrictions,
-            "calorie_target": request.calorie_target
-        }
-        
-        return MealPlanResponse(
-            success=True,
-            plan=day_plans,
-            summary=summary,
-            generated_at=datetime.now()
+        try:
+            async for kind, day_number, data in ai_service.generate_meal_plan_stream(
+                dietary_restrictions=dietary_restrictions,
+                calorie_target=request.calorie_target,
+                meals_per_day=request.meals_per_day,
+                days=request.days,
+                allergies=request.allergies,
+                preferences=request.preferences,
+            ):
+                if kind == "meal":
+                    meal = Meal(**_format_meal(data, dietary_restrictions))
+                    yield sse_event("meal", {"day": day_number, **meal.model_dump()})
+                    continue
+
+                day_data = _format_day(data, dietary_restrictions)
+                trending.record_meal_plan([day_data])
+                _add_analytics([day_data], request.calorie_target)
+                day_plans.append(day_data)
+                yield sse_event("day", DayPlan(**day_data).model_dump())
+
+            day_plans.sort(key=lambda day: day["day"])
+            analytics = analyze_plan(day_plans, request.calorie_target)
+            yield sse_event(
+                "summary", _build_summary(request, dietary_restrictions, analytics)
+            )
+            yield sse_event("done", {"generated_at": datetime.now()})
+
+        except AdmissionRejected as e:
+            yield sse_event("error", {"error": str(e), "status_code": e.status_code})
+        except Exception as e:
+            logger.error(f"Error streaming meal plan: {str(e)}")
+            yield sse_event(
+                "error", {"error": f"Failed to generate meal plan: {str(e)}"}
+            )
+
+    return StreamingResponse(
+        event_stream(), media_type="text/event-stream", headers=SSE_HEADERS
+    )
+
+
+@router.post("/meal-plan/analyze", response_model=MealPlanAnalysisResponse)
+async def analyze_meal_plan(request: MealPlanAnalysisRequest):
+    """
+    Nutrition analytics for an existing meal plan: per-day and total nutrition,
+    macro percentages, deviation from a calorie target and a per-meal-type breakdown
+    """
+    try:
+        day_plans = [day.model_dump() for day in request.plan]
+        analytics = analyze_plan(day_plans, request.calorie_target)
+
+        return ModelResponse(
+            MealPlanAnalysisResponse(success=True, analytics=analytics)
         )
-        
+
     except Exception as e:
-        logger.error(f"Error generating meal plan: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to generate meal plan: {str(e)}")
+        logger.error(f"Error analyzing meal plan: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Meal plan analysis failed: {str(e)}"
+        ) from e
+
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat_with_ai(request: ChatRequest):
@@ -133,19 +275,63 @@ async def chat_with_ai(request: ChatRequest):
     try:
         response = await ai_service.chat(
             message=request.message,
-            context=request.context
+            context=request.context,
+            session_id=request.session_id,
         )
-        
+
         return ChatResponse(
             success=True,
             message=response["message"],
             suggestions=response.get("suggestions"),
-            timestamp=datetime.now()
+            session_id=response["session_id"],
+            timestamp=datetime.now(),
         )
-        
+
+    except AdmissionRejected:
+        raise
     except Exception as e:
         logger.error(f"Error in chat: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Chat failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Chat failed: {str(e)}") from e
+
+
+@router.post("/chat/stream")
+async def chat_with_ai_stream(request: ChatRequest):
+    """
+    Stream the AI assistant reply as Server-Sent Events.
+    Emits `token` events as text arrives, then a final `done` event.
+    """
+    session = chat_sessions.open(request.session_id, request.context)
+
+    async def event_stream() -> AsyncIterator[str]:
+        parts = []
+        try:
+            async for token in ai_service.chat_stream(
+                message=request.message, session_id=session.id
+            ):
+                parts.append(token)
+                yield sse_event("token", {"content": token})
+
+            message = "".join(parts)
+            yield sse_event(
+                "done",
+                {
+                    "message": message,
+                    "suggestions": ai_service._extract_suggestions(message),
+                    "session_id": session.id,
+                    "timestamp": datetime.now(),
+                },
+            )
+
+        except AdmissionRejected as e:
+            yield sse_event("error", {"error": str(e), "status_code": e.status_code})
+        except Exception as e:
+            logger.error(f"Error in chat stream: {str(e)}")
+            yield sse_event("error", {"error": f"Chat failed: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(), media_type="text/event-stream", headers=SSE_HEADERS
+    )
+
 
 @router.post("/nutrition-analysis", response_model=NutritionAnalysisResponse)
 async def analyze_nutrition(request: NutritionAnalysisRequest):
@@ -156,27 +342,70 @@ async def analyze_nutrition(request: NutritionAnalysisRequest):
         analysis = await ai_service.analyze_nutrition(
             recipe_name=request.recipe_name,
             ingredients=request.ingredients,
-            servings=request.servings
-        )
-        
-        nutrition_per_serving = analysis["nutrition_per_serving"]
-        
-        # Calculate total nutrition
-        nutrition_total = {
-            key: value * request.servings 
-            for key, value in nutrition_per_serving.items()
-        }
-        
-        return NutritionAnalysisResponse(
-            success=True,
-            recipe_name=request.recipe_name,
-            nutrition_per_serving=nutrition_per_serving,
-            nutrition_total=nutrition_total,
             servings=request.servings,
-            health_score=analysis["health_score"],
-            recommendations=analysis["recommendations"]
         )
-        
+
+        return _nutrition_response(request, analysis)
+
+    except AdmissionRejected:
+        raise
     except Exception as e:
         logger.error(f"Error analyzing nutrition: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Nutrition analysis failed: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Nutrition analysis failed: {str(e)}"
+        ) from e
+
+
+@router.post("/nutrition-analysis/batch", response_model=NutritionAnalysisBatchResponse)
+async def analyze_nutrition_batch(request: NutritionAnalysisBatchRequest):
+    """
+    Analyze nutritional content of many recipes in one request.
+    Identical items are analyzed once; each item reports its own result or error.
+    """
+    outcomes = await ai_service.analyze_nutrition_batch(
+        [
+            {
+                "recipe_name": item.recipe_name,
+                "ingredients": item.ingredients,
+                "servings": item.servings,
+            }
+            for item in request.items
+        ]
+    )
+
+    results = []
+    for index, (item, outcome) in enumerate(zip(request.items, outcomes, strict=True)):
+        if not isinstance(outcome, Exception):
+            try:
+                results.append(
+                    NutritionAnalysisBatchItem(
+                        index=index,
+                        success=True,
+                        result=_nutrition_response(item, outcome),
+                    )
+                )
+                continue
+            except Exception as e:
+                outcome = e
+
+        logger.error(
+            f"Error analyzing nutrition for batch item {index}: {str(outcome)}"
+        )
+        results.append(
+            NutritionAnalysisBatchItem(
+                index=index,
+                success=False,
+                error=f"Nutrition analysis failed: {str(outcome)}",
+                status_code=outcome.status_code
+                if isinstance(outcome, AdmissionRejected)
+                else 500,
+            )
+        )
+
+    failed_count = sum(1 for r in results if not r.success)
+    return NutritionAnalysisBatchResponse(
+        success=failed_count == 0,
+        results=results,
+        total_count=len(results),
+        failed_count=failed_count,
+    )
@@ -0,0 +1,63 @@
+"""
+Prometheus metrics endpoint
+"""
+
+from typing import Any, Dict
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.services.ai_service import ai_service
+from app.services.chat_sessions import chat_sessions
+from app.services.ingredient_parser import parser_stats
+from app.services.meal_planner import meal_planner
+from app.services.metrics import metrics
+from app.services.recipe_index import recipe_index
+from app.services.recipe_store import recipe_store
+from app.services.shared_state import shared_store
+from app.services.trending import trending
+from app.services.upstream_health import upstream_health
+from app.services.upstream_provider import upstream_provider
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+def _by_metric(stats: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Turn {endpoint: {metric: value}} into {metric: {endpoint: value}}"""
+    inverted: Dict[str, Dict[str, Any]] = {}
+    for endpoint, values in stats.items():
+        for metric, value in values.items():
+            inverted.setdefault(metric, {})[endpoint] = value
+    return inverted
+
+
+# Component stats are only collected when the endpoint is scraped
+metrics.register_collector("response_cache", ai_service.cache.stats)
+metrics.register_collector("similarity_cache", ai_service.similar.stats)
+metrics.register_collector("singleflight", ai_service.flights.stats)
+metrics.register_collector("admission", ai_service.admission.stats)
+metrics.register_collector("upstream", ai_service.resilience.stats)
+metrics.register_collector("upstream_health", upstream_health.stats)
+metrics.register_collector("upstream_provider", upstream_provider.stats)
+metrics.register_collector(
+    "token_budget", lambda: _by_metric(ai_service.budget.stats()), label="endpoint"
+)
+metrics.register_collector("ingredient_parser", parser_stats)
+metrics.register_collector("recipe_store", recipe_store.stats)
+metrics.register_collector("recipe_index", recipe_index.stats)
+metrics.register_collector("meal_planner", meal_planner.stats)
+metrics.register_collector("trending", trending.stats, label="window")
+metrics.register_collector("chat_sessions", chat_sessions.stats)
+if shared_store is not None:
+    metrics.register_collector("shared_state", shared_store.stats, label="op")
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """
+    Stage latency histograms, upstream status and token counters, and
+    cache/coalescing/admission stats in Prometheus text format
+    """
+    return PlainTextResponse(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
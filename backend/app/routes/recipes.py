@@ -2,115 +2,334 @@
 Recipe search and discovery endpoints
 """
 
-from fastapi import APIRouter, HTTPException
-from app.models.request import RecipeSearchRequest
-from app.models.response import RecipeSearchResponse
-from app.services.ai_service import ai_service
-from datetime import datetime
+import asyncio
 import logging
-import uuid
+from typing import AsyncIterator, Dict, List, Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.config import settings
+from app.models.request import RecipeSearchBatchRequest, RecipeSearchRequest
+from app.models.response import (
+    Recipe,
+    RecipeSearchBatchItem,
+    RecipeSearchBatchResponse,
+    RecipeSearchResponse,
+    TrendingResponse,
+)
+from app.routes.json_response import ModelResponse
+from app.routes.sse import SSE_HEADERS, sse_event
+from app.services.ai_service import RECIPES_PER_SEARCH, ai_service
+from app.services.cache import make_cache_key
+from app.services.metrics import metrics
+from app.services.rate_limiter import AdmissionRejected
+from app.services.recipe_index import recipe_index
+from app.services.recipe_store import recipe_id_for, recipe_store
+from app.services.trending import trending
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-@router.post("/recipes/search", response_model=RecipeSearchResponse)
-async def search_recipes(request: RecipeSearchRequest):
-    """
-    Search for recipes based on available ingredients
-    """
-    try:
-        # Convert enums to strings
-        dietary_restrictions = [dr.value for dr in request.dietary_restrictions]
-        meal_type = request.meal_type.value if request.meal_type else None
-        
-        # Find recipes using AI
-        recipes_data = await ai_service.find_recipes(
-            ingredients=request.ingredients,
-            dietary_restrictions=dietary_restrictions,
-            meal_type=meal_type,
-            cuisine=request.cuisine,
-            cooking_time=request.cooking_time,
-            servings=request.servings
-        )
-        
+
+def _format_recipe(
+    recipe_data: Dict, request: RecipeSearchRequest, meal_type: Optional[str]
+) -> Dict:
+    """Normalize one raw LLM recipe object into the Recipe shape and store it"""
+    # Extract nutrition info
+    nutrition_data = recipe_data.get("nutrition", {})
+    nutrition = {
+        "calories": nutrition_data.get("calories", 0),
+        "protein": nutrition_data.get("protein", 0),
+        "carbohydrates": nutrition_data.get("carbohydrates", 0),
+        "fat": nutrition_data.get("fat", 0),
+        "fiber": nutrition_data.get("fiber", 0),
+        "sugar": nutrition_data.get("sugar", 0),
+        "sodium": nutrition_data.get("sodium", 0),
+    }
+
+    # Build recipe object
+    recipe = {
+        "name": recipe_data.get("name", "Unknown Recipe"),
+        "description": recipe_data.get("description", ""),
+        "ingredients": recipe_data.get("ingredients", []),
+        "instructions": recipe_data.get("instructions", []),
+        "prep_time": recipe_data.get("prep_time", 0),
+        "cook_time": recipe_data.get("cook_time", 0),
+        "total_time": recipe_data.get("prep_time", 0) + recipe_data.get("cook_time", 0),
+        "servings": recipe_data.get("servings", request.servings),
+        "difficulty": recipe_data.get("difficulty", "medium"),
+        "cuisine": recipe_data.get("cuisine", request.cuisine),
+        "meal_type": recipe_data.get("meal_type", meal_type),
+        "nutrition": nutrition,
+        "tags": recipe_data.get("tags", []),
+        "image_url": None,  # Can be enhanced with image generation
+    }
+
+    # Content-hash ID: the same recipe always gets the same ID
+    recipe = {"id": recipe_id_for(recipe), **recipe}
+    recipe_store.save(recipe, [dr.value for dr in request.dietary_restrictions])
+    return recipe
+
+
+def _local_recipes(
+    request: RecipeSearchRequest,
+    dietary_restrictions: List[str],
+    meal_type: Optional[str],
+) -> List[Dict]:
+    """Stored recipes that already answer this search, best ingredient coverage first"""
+    if not settings.RECIPE_INDEX_ENABLED:
+        return []
+
+    hits = recipe_index.search(
+        request.ingredients,
+        meal_type=meal_type,
+        cuisine=request.cuisine,
+        dietary_restrictions=dietary_restrictions,
+        cooking_time=request.cooking_time,
+        min_coverage=settings.RECIPE_INDEX_MIN_COVERAGE,
+        limit=RECIPES_PER_SEARCH,
+    )
+    recipes = (recipe_store.get(recipe_id) for recipe_id, _ in hits)
+    return [recipe for recipe in recipes if recipe is not None]
+
+
+def _llm_count(local: List[Dict]) -> Optional[int]:
+    """How many recipes to ask the LLM for: 0 if the index answered, None for a full
+    search"""
+    if not local:
+        return None
+    return max(settings.RECIPE_INDEX_MIN_RESULTS - len(local), 0)
+
+
+async def _run_search(request: RecipeSearchRequest) -> RecipeSearchResponse:
+    """Run one recipe search and format the response"""
+    # Convert enums to strings
+    dietary_restrictions = [dr.value for dr in request.dietary_restrictions]
+    meal_type = request.meal_type.value if request.meal_type else None
+
+    trending.record_search(request.ingredients)
+
+    # Stored recipes first; the LLM only fills in what the index couldn't answer
+    with metrics.stage("recipes", "index"):
+        local = _local_recipes(request, dietary_restrictions, meal_type)
+    recipes = list(local)
+    count = _llm_count(local)
+
+    if count != 0:
+        try:
+            with metrics.stage("recipes", "generate"):
+                recipes_data = await ai_service.find_recipes(
+                    ingredients=request.ingredients,
+                    dietary_restrictions=dietary_restrictions,
+                    meal_type=meal_type,
+                    cuisine=request.cuisine,
+                    cooking_time=request.cooking_time,
+                    servings=request.servings,
+                    count=count,
+                )
+        except AdmissionRejected as e:
+            # Upstream shed or saturated: the stored matches are still a useful answer
+            if not local:
+                raise
+            logger.warning(f"Serving {len(local)} stored recipes only: {str(e)}")
+            recipes_data = []
+
         # Process and format recipes
-        recipes = []
-        for recipe_data in recipes_data:
-            # Generate unique ID
-            recipe_id = str(uuid.uuid4())
-            
-            # Extract nutrition info
-            nutrition_data = recipe_data.get("nutrition", {})
-            nutrition = {
-                "calories": nutrition_data.get("calories", 0),
-                "protein": nutrition_data.get("protein", 0),
-                "carbohydrates": nutrition_data.get("carbohydrates", 0),
-                "fat": nutrition_data.get("fat", 0),
-                "fiber": nutrition_data.get("fiber", 0),
-                "sugar": nutrition_data.get("sugar", 0),
-                "sodium": nutrition_data.get("sodium", 0)
-            }
-            
-            # Build recipe object
-            recipe = {
-                "id": recipe_id,
-                "name": recipe_data.get("name", "Unknown Recipe"),
-                "description": recipe_data.get("description", ""),
-                "ingredients": recipe_data.get("ingredients", []),
-                "instructions": recipe_data.get("instructions", []),
-                "prep_time": recipe_data.get("prep_time", 0),
-                "cook_time": recipe_data.get("cook_time", 0),
-                "total_time": recipe_data.get("prep_time", 0) + recipe_data.get("cook_time", 0),
-                "servings": recipe_data.get("servings", request.servings),
-                "difficulty": recipe_data.get("difficulty", "medium"),
-                "cuisine": recipe_data.get("cuisine", request.cuisine),
-                "meal_type": recipe_data.get("meal_type", meal_type),
-                "nutrition": nutrition,
-                "tags": recipe_data.get("tags", []),
-                "image_url": None  # Can be enhanced with image generation
-            }
-            
-            recipes.append(recipe)
-        
-        # Build query info
-        query_info = {
-            "ingredients": request.ingredients,
-            "dietary_restrictions": dietary_restrictions,
-            "meal_type": meal_type,
-            "cuisine": request.cuisine,
-            "cooking_time": request.cooking_time,
-            "servings": request.servings
-        }
-        
+        with metrics.stage("recipes", "normalize"):
+            seen = {recipe["id"] for recipe in recipes}
+            for recipe_data in recipes_data:
+                recipe = _format_recipe(recipe_data, request, meal_type)
+                if recipe["id"] not in seen:
+                    seen.add(recipe["id"])
+                    recipes.append(recipe)
+
+    for recipe in recipes:
+        trending.record_recipe(recipe)
+
+    # Build query info
+    query_info = {
+        "ingredients": request.ingredients,
+        "dietary_restrictions": dietary_restrictions,
+        "meal_type": meal_type,
+        "cuisine": request.cuisine,
+        "cooking_time": request.cooking_time,
+        "servings": request.servings,
+        "stored_results": len(local),
+    }
+
+    with metrics.stage("recipes", "validate"):
         return RecipeSearchResponse(
             success=True,
             recipes=recipes,
             total_count=len(recipes),
-            query_info=query_info
+            query_info=query_info,
         )
-        
+
+
+@router.post("/recipes/search", response_model=RecipeSearchResponse)
+async def search_recipes(request: RecipeSearchRequest):
+    """
+    Search for recipes based on available ingredients
+    """
+    try:
+        response = await _run_search(request)
+        with metrics.stage("recipes", "serialize"):
+            return ModelResponse(response)
+
+    except AdmissionRejected:
+        raise
     except Exception as e:
         logger.error(f"Error searching recipes: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Recipe search failed: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Recipe search failed: {str(e)}"
+        ) from e
 
-@router.get("/recipes/{recipe_id}")
-async def get_recipe(recipe_id: str):
+
+@router.post("/recipes/search/batch", response_model=RecipeSearchBatchResponse)
+async def search_recipes_batch(request: RecipeSearchBatchRequest):
+    """
+    Run many recipe searches in one request.
+    Identical searches run once; each item reports its own result or error.
+    """
+    semaphore = asyncio.Semaphore(settings.BATCH_MAX_CONCURRENCY)
+    unique: Dict[str, RecipeSearchRequest] = {}
+    keys = []
+    for item in request.items:
+        key = make_cache_key("recipe_search", **item.model_dump())
+        unique.setdefault(key, item)
+        keys.append(key)
+
+    async def run(item: RecipeSearchRequest):
+        async with semaphore:
+            try:
+                return await _run_search(item)
+            except Exception as e:
+                return e
+
+    outcomes = dict(
+        zip(
+            unique,
+            await asyncio.gather(*(run(item) for item in unique.values())),
+            strict=True,
+        )
+    )
+
+    results = []
+    for index, key in enumerate(keys):
+        outcome = outcomes[key]
+        if isinstance(outcome, Exception):
+            logger.error(
+                f"Error searching recipes for batch item {index}: {str(outcome)}"
+            )
+            results.append(
+                RecipeSearchBatchItem(
+                    index=index,
+                    success=False,
+                    error=f"Recipe search failed: {str(outcome)}",
+                    status_code=outcome.status_code
+                    if isinstance(outcome, AdmissionRejected)
+                    else 500,
+                )
+            )
+        else:
+            results.append(
+                RecipeSearchBatchItem(index=index, success=True, result=outcome)
+            )
+
+    failed_count = sum(1 for r in results if not r.success)
+    return ModelResponse(
+        RecipeSearchBatchResponse(
+            success=failed_count == 0,
+            results=results,
+            total_count=len(results),
+            failed_count=failed_count,
+        )
+    )
+
+
+@router.post("/recipes/search/stream")
+async def search_recipes_stream(request: RecipeSearchRequest):
     """
-    Get a specific recipe by ID
-    Note: This is a placeholder. In production, implement proper database storage.
+    Stream recipe search results as Server-Sent Events.
+    Emits a `recipe` event per completed recipe, then `done`.
     """
-    raise HTTPException(
-        status_code=501,
-        detail="Recipe retrieval by ID not yet implemented. Use search endpoint."
+    dietary_restrictions = [dr.value for dr in request.dietary_restrictions]
+    meal_type = request.meal_type.value if request.meal_type else None
+
+    async def event_stream() -> AsyncIterator[str]:
+        count = 0
+        try:
+            trending.record_search(request.ingredients)
+            local = _local_recipes(request, dietary_restrictions, meal_type)
+            seen = set()
+            for recipe in local:
+                seen.add(recipe["id"])
+                count += 1
+                trending.record_recipe(recipe)
+                yield sse_event("recipe", Recipe(**recipe).model_dump())
+
+            llm_count = _llm_count(local)
+            if llm_count != 0:
+                async for recipe_data in ai_service.find_recipes_stream(
+                    ingredients=request.ingredients,
+                    dietary_restrictions=dietary_restrictions,
+                    meal_type=meal_type,
+                    cuisine=request.cuisine,
+                    cooking_time=request.cooking_time,
+                    servings=request.servings,
+                    count=llm_count,
+                ):
+                    recipe = Recipe(**_format_recipe(recipe_data, request, meal_type))
+                    if recipe.id in seen:
+                        continue
+                    seen.add(recipe.id)
+                    count += 1
+                    trending.record_recipe(recipe.model_dump())
+                    yield sse_event("recipe", recipe.model_dump())
+
+            yield sse_event("done", {"total_count": count})
+
+        except AdmissionRejected as e:
+            yield sse_event("error", {"error": str(e), "status_code": e.status_code})
+        except Exception as e:
+            logger.error(f"Error streaming recipes: {str(e)}")
+            yield sse_event("error", {"error": f"Recipe search failed: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(), media_type="text/event-stream", headers=SSE_HEADERS
     )
 
-@router.get("/recipes/trending")
-async def get_trending_recipes():
+
+@router.get("/recipes/trending", response_model=TrendingResponse)
+async def get_trending_recipes(
+    window: Literal["hourly", "daily"] = Query("daily", description="Decay window"),
+    limit: int = Query(
+        10, ge=1, le=settings.TRENDING_TOP_K, description="Items per list"
+    ),
+):
     """
-    Get trending recipes
-    Note: This is a placeholder for future implementation
+    Get trending ingredients and recipes from recent searches, serves and meal
+    plan picks.
+    Served from a periodically refreshed snapshot.
     """
-    raise HTTPException(
-        status_code=501,
-        detail="Trending recipes feature coming soon!"
+    snapshot = trending.snapshot(window)
+    return TrendingResponse(
+        success=True,
+        window=window,
+        ingredients=snapshot["ingredients"][:limit],
+        recipes=snapshot["recipes"][:limit],
+        generated_at=snapshot["generated_at"],
     )
+
+
+@router.get("/recipes/{recipe_id}", response_model=Recipe)
+async def get_recipe(recipe_id: str):
+    """
+    Get a previously generated recipe by ID
+    """
+    recipe = recipe_store.get(recipe_id)
+    if recipe is None:
+        raise HTTPException(status_code=404, detail=f"Recipe {recipe_id} not found")
+    trending.record_recipe(recipe)
+    return recipe
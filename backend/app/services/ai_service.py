@@ -2,16 +2,82 @@
 AI Service for Fetch AI ASI-1 Mini (REST API version)
 """
 
-import logging
-import json
-import requests
 import asyncio
-from typing import List, Dict, Optional
+import json
+import logging
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
 from app.config import settings
-import re
+from app.services.cache import ResponseCache, make_cache_key
+from app.services.chat_sessions import ChatSession, chat_sessions
+from app.services.ingredient_parser import name_tokens
+from app.services.json_stream import JSONStreamParser, extract_json
+from app.services.meal_planner import LocalPlan, meal_planner, preference_terms
+from app.services.metrics import metrics
+from app.services.nutrition_engine import (
+    NUTRIENTS,
+    health_score,
+    nutrition_engine,
+    recommendations,
+)
+from app.services.rate_limiter import AdmissionController, AdmissionRejected
+from app.services.resilience import (
+    RETRYABLE_STATUS_CODES,
+    CircuitBreaker,
+    ResilientCaller,
+    UpstreamError,
+)
+from app.services.shared_state import SharedStore, open_store, shared_store
+from app.services.similarity_cache import SimilarityCache
+from app.services.singleflight import SingleFlight
+from app.services.token_budget import TokenBudget
+from app.services.upstream_health import upstream_health
+from app.services.upstream_provider import upstream_provider
 
 logger = logging.getLogger(__name__)
 
+# Rotated across days when days are generated independently, so parallel
+# per-day prompts don't all converge on the same dishes
+DAY_VARIETY_THEMES = [
+    "Mediterranean",
+    "East Asian",
+    "Latin American",
+    "Indian",
+    "Middle Eastern",
+    "classic American",
+    "Southeast Asian",
+]
+
+# Upper end of the "3–5 recipes" asked for in the recipe search prompt
+RECIPES_PER_SEARCH = 5
+
+CHAT_SYSTEM_PROMPT = """
+You are NutriMind, a helpful AI nutritionist and recipe expert.
+Provide meal planning advice, recipes, and nutrition guidance.
+"""
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional h2 package (installed via httpx[http2])"""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _cache_store() -> Optional[SharedStore]:
+    """Shared tier of the response cache: the cross-worker store, else a
+    CACHE_DISK_PATH file"""
+    if shared_store is not None:
+        return shared_store
+    if settings.CACHE_DISK_PATH:
+        return open_store(f"sqlite:///{settings.CACHE_DISK_PATH}")
+    return None
+
 
 class AIService:
     """Service for interacting with Fetch AI ASI models (REST API)"""
@@ -19,37 +85,332 @@ class AIService:
     def __init__(self):
         self.api_key = settings.FETCH_API_KEY
         self.model = settings.ASI_MODEL  # "asi1-mini"
-        self.base_url = "https://api.asi1.ai/v1/chat/completions"
+        self.base_url = f"{settings.ASI_BASE_URL.rstrip('/')}/chat/completions"
+        self.models_url = f"{settings.ASI_BASE_URL.rstrip('/')}/models"
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
+            "Content-Type": "application/json",
         }
         self.temperature = settings.TEMPERATURE
+        self._client: Optional[httpx.AsyncClient] = None
+        self.cache = ResponseCache(
+            max_entries=settings.CACHE_MAX_ENTRIES,
+            ttl=settings.CACHE_TTL,
+            store=_cache_store(),
+        )
+        self.flights = SingleFlight()
+        self.similar = SimilarityCache(
+            threshold=settings.SIMILARITY_THRESHOLD,
+            max_entries=settings.SIMILARITY_MAX_ENTRIES,
+            ttl=settings.CACHE_TTL,
+        )
+        self.admission = AdmissionController(
+            rate_per_minute=settings.RATE_LIMIT_PER_MINUTE,
+            burst=settings.RATE_LIMIT_BURST,
+            max_in_flight=settings.UPSTREAM_MAX_IN_FLIGHT,
+            max_queue=settings.UPSTREAM_MAX_QUEUE,
+            queue_timeout=settings.UPSTREAM_QUEUE_TIMEOUT,
+            store=shared_store,
+        )
+        self.resilience = ResilientCaller(
+            breaker=CircuitBreaker(
+                failure_threshold=settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                reset_timeout=settings.CIRCUIT_BREAKER_RESET_TIMEOUT,
+            ),
+            max_retries=settings.UPSTREAM_MAX_RETRIES,
+            retry_base_delay=settings.UPSTREAM_RETRY_BASE_DELAY,
+            retry_max_delay=settings.UPSTREAM_RETRY_MAX_DELAY,
+            hedging_enabled=settings.UPSTREAM_HEDGING_ENABLED,
+            hedge_min_samples=settings.UPSTREAM_HEDGE_MIN_SAMPLES,
+        )
+        self.budget = TokenBudget(
+            ceilings={
+                "meal_plan": settings.MAX_TOKENS_MEAL_PLAN,
+                "recipes": settings.MAX_TOKENS_RECIPES,
+                "nutrition": settings.MAX_TOKENS_NUTRITION,
+                "chat": settings.MAX_TOKENS_CHAT,
+            },
+            default_ceiling=settings.MAX_TOKENS,
+            headroom=settings.TOKEN_BUDGET_HEADROOM,
+        )
+
+    # ---------------------------------------------------------
+    # ---------------- HTTP TRANSPORT
+    # ---------------------------------------------------------
+
+    def _create_client(self) -> httpx.AsyncClient:
+        """Build the pooled keep-alive client shared by every upstream call"""
+        http2 = settings.HTTP2_ENABLED and _http2_available()
+        limits = httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        )
+
+        return httpx.AsyncClient(
+            headers=self.headers,
+            http2=http2,
+            limits=limits,
+            timeout=httpx.Timeout(
+                settings.HTTP_READ_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT
+            ),
+            # Record/replay wrap or replace the pooled transport (None = live)
+            transport=upstream_provider.transport(http2, limits),
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared client, created lazily if startup() was not called"""
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+        return self._client
+
+    async def startup(self) -> None:
+        """Open the connection pool (called from the FastAPI lifespan)"""
+        self._client = self._create_client()
+        http2 = settings.HTTP2_ENABLED and _http2_available()
+        logger.info(
+            f"AI service HTTP client ready (http2={http2}, "
+            f"upstream={upstream_provider.mode})"
+        )
 
-    async def _generate(self, prompt: str, temperature: float = None) -> str:
+    async def close(self) -> None:
+        """Drain and close the connection pool (called from the FastAPI lifespan)"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        upstream_provider.close()
+
+    async def _post(self, payload: Dict, endpoint: str = "chat") -> Dict:
+        """POST a chat completion payload upstream (with retries/hedging) and return
+        the decoded body"""
+        self._shed_if_degraded()
+        return await self.resilience.call(lambda: self._post_once(payload, endpoint))
+
+    def _shed_if_degraded(self) -> None:
+        """Reject a new upstream call up front while the prober reports the upstream
+        down or degraded"""
+        if settings.UPSTREAM_LOAD_SHEDDING and upstream_health.should_shed():
+            raise AdmissionRejected(
+                f"Upstream is {upstream_health.current_status()}, try again shortly",
+                503,
+                retry_after=upstream_health.interval,
+            )
+
+    async def probe_upstream(self) -> int:
+        """Cheap upstream request for the health prober; returns the HTTP status"""
+        response = await self.client.get(
+            self.models_url, timeout=settings.UPSTREAM_PROBE_TIMEOUT
+        )
+        return response.status_code
+
+    async def _post_once(self, payload: Dict, endpoint: str = "chat") -> Dict:
+        queued = time.perf_counter()
+        async with self.admission.admit():
+            started = time.perf_counter()
+            metrics.observe_stage(endpoint, "admission_wait", started - queued)
+            try:
+                response = await self.client.post(self.base_url, json=payload)
+            except httpx.HTTPError:
+                metrics.inc("upstream_responses", endpoint=endpoint, status="error")
+                upstream_health.observe_call(False)
+                raise
+            metrics.observe_stage(endpoint, "upstream", time.perf_counter() - started)
+        metrics.inc(
+            "upstream_responses", endpoint=endpoint, status=response.status_code
+        )
+        upstream_health.observe_call(
+            response.status_code < 500 and response.status_code != 429
+        )
+        self._raise_for_status(response)
+        return response.json()
+
+    def _raise_for_status(self, response: httpx.Response) -> None:
+        if response.is_success:
+            return
+
+        retry_after = response.headers.get("Retry-After")
+        raise UpstreamError(
+            response.status_code,
+            f"Upstream returned HTTP {response.status_code}",
+            retry_after=float(retry_after)
+            if retry_after and retry_after.isdigit()
+            else None,
+        )
+
+    def _max_tokens(self, endpoint: str, units: float = 1.0) -> int:
+        """Completion limit for a request of `units` size on `endpoint`"""
+        if not settings.TOKEN_BUDGET_ENABLED:
+            return settings.MAX_TOKENS
+        return self.budget.estimate(endpoint, units)
+
+    async def _complete(self, payload: Dict, endpoint: str, units: float = 1.0) -> str:
+        """Run a non-streaming completion and feed its size back into the token
+        budget"""
+        data = await self._post(payload, endpoint)
+        choice = data["choices"][0]
+        content = choice["message"]["content"]
+
+        usage = data.get("usage") or {}
+        self._record_usage(endpoint, usage)
+        self.budget.observe(
+            endpoint,
+            units,
+            usage.get("completion_tokens") or len(content) // 4,
+            truncated=choice.get("finish_reason") == "length",
+        )
+
+        return content
+
+    async def _stream(
+        self, payload: Dict, endpoint: str, units: float = 1.0
+    ) -> AsyncIterator[str]:
+        """POST a chat completion with stream=True and yield content deltas (SSE)"""
+        payload = {**payload, "stream": True}
+        streamed_chars = 0
+        finish_reason = None
+
+        self._shed_if_degraded()
+        breaker = self.resilience.breaker
+        breaker.check()
+        try:
+            queued = time.perf_counter()
+            async with self.admission.admit():
+                started = time.perf_counter()
+                metrics.observe_stage(endpoint, "admission_wait", started - queued)
+                async with self.client.stream(
+                    "POST", self.base_url, json=payload
+                ) as response:
+                    metrics.inc(
+                        "upstream_responses",
+                        endpoint=endpoint,
+                        status=response.status_code,
+                    )
+                    upstream_health.observe_call(
+                        response.status_code < 500 and response.status_code != 429
+                    )
+                    try:
+                        self._raise_for_status(response)
+                    except UpstreamError as e:
+                        # Like ResilientCaller.call: a non-retryable 4xx means the
+                        # upstream is up
+                        if e.status_code in RETRYABLE_STATUS_CODES:
+                            breaker.record_failure()
+                        else:
+                            breaker.record_success()
+                        raise
+                    breaker.record_success()
+
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+
+                        data = line[5:].strip()
+                        if data == "[DONE]":
+                            break
+
+                        try:
+                            chunk = json.loads(data)
+                        except json.JSONDecodeError:
+                            logger.warning(
+                                f"Skipping malformed stream chunk: {data[:200]}"
+                            )
+                            continue
+
+                        if chunk.get("usage"):
+                            self._record_usage(endpoint, chunk["usage"])
+
+                        choices = chunk.get("choices") or [{}]
+                        finish_reason = choices[0].get("finish_reason") or finish_reason
+                        delta = choices[0].get("delta") or {}
+                        content = delta.get("content")
+                        if content:
+                            streamed_chars += len(content)
+                            yield content
+
+                metrics.observe_stage(
+                    endpoint, "upstream", time.perf_counter() - started
+                )
+        except (AdmissionRejected, asyncio.CancelledError):
+            breaker.release_trial()
+            raise
+        except httpx.TransportError:
+            breaker.record_failure()
+            raise
+        self.budget.observe(
+            endpoint, units, streamed_chars // 4, truncated=finish_reason == "length"
+        )
+
+    def _record_usage(self, endpoint: str, usage: Dict) -> None:
+        """Count the provider-reported prompt/completion tokens of one completion"""
+        for kind in ("prompt", "completion"):
+            tokens = usage.get(f"{kind}_tokens")
+            if tokens:
+                metrics.inc("upstream_tokens", tokens, endpoint=endpoint, kind=kind)
+
+    async def _cached(
+        self, key: str, fn: Callable[..., Awaitable[Any]], *args: Any
+    ) -> Any:
+        """
+        Serve `key` from the response cache, otherwise run `fn(*args)` and store
+        the result.
+        Concurrent misses for the same key share a single upstream call.
+        """
+        if not settings.CACHE_ENABLED:
+            return await self.flights.do(key, fn, *args)
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        return await self.flights.do(key, self._fill_cache, key, fn, *args)
+
+    async def _cached_similar(
+        self,
+        constraints: Dict[str, Any],
+        features: Any,
+        key: str,
+        fn: Callable[..., Awaitable[Any]],
+        *args: Any,
+    ) -> Any:
+        """Like _cached, but first serves a stored result for a near-duplicate
+        request"""
+        if not (settings.CACHE_ENABLED and settings.SIMILARITY_CACHE_ENABLED):
+            return await self._cached(key, fn, *args)
+
+        similar = self.similar.lookup(constraints, features)
+        if similar is not None:
+            return similar
+
+        result = await self._cached(key, fn, *args)
+        self.similar.store(constraints, features, result)
+        return result
+
+    async def _fill_cache(
+        self, key: str, fn: Callable[..., Awaitable[Any]], *args: Any
+    ) -> Any:
+        result = await fn(*args)
+        self.cache.set(key, result)
+        return result
+
+    async def _generate(
+        self,
+        prompt: str,
+        temperature: float = None,
+        endpoint: str = "chat",
+        units: float = 1.0,
+    ) -> str:
         """Wrapper for Fetch.ai REST chat completion"""
 
         payload = {
             "model": self.model,
-            "messages": [
-                {"role": "user", "content": prompt}
-            ],
+            "messages": [{"role": "user", "content": prompt}],
             "temperature": temperature if temperature else self.temperature,
-            "max_tokens": settings.MAX_TOKENS
+            "max_tokens": self._max_tokens(endpoint, units),
         }
 
-        # Run blocking requests.post in async thread
         try:
-            response = await asyncio.to_thread(
-                requests.post,
-                self.base_url,
-                headers=self.headers,
-                json=payload
-            )
-
-            data = response.json()
-
-            return data["choices"][0]["message"]["content"]
+            return await self._complete(payload, endpoint, units)
 
         except Exception as e:
             logger.error(f"Fetch.ai API error: {str(e)}")
@@ -66,8 +427,73 @@ class AIService:
         meals_per_day: int,
         days: int,
         allergies: List[str],
-        preferences: Optional[str]
+        preferences: Optional[str],
     ) -> Dict:
+        local = self._plan_locally(
+            dietary_restrictions,
+            calorie_target,
+            meals_per_day,
+            days,
+            allergies,
+            preferences,
+        )
+        if local is not None and local.days:
+            if local.missing:
+                filled = await self._run_meal_plan_by_day(
+                    dietary_restrictions,
+                    calorie_target,
+                    meals_per_day,
+                    days,
+                    allergies,
+                    preferences,
+                    day_numbers=local.missing,
+                )
+                for day_data in filled["days"]:
+                    local.days[day_data["day"]] = day_data
+            return {"days": [local.days[day] for day in sorted(local.days)]}
+
+        key = make_cache_key(
+            "meal_plan",
+            dietary_restrictions=dietary_restrictions,
+            calorie_target=calorie_target,
+            meals_per_day=meals_per_day,
+            days=days,
+            allergies=allergies,
+            preferences=preferences,
+            temperature=self.temperature,
+        )
+
+        # Near-duplicate plans: same hard constraints, calorie target within tolerance.
+        # Things the preferences say to avoid are hard constraints too; only the
+        # wanted words are compared fuzzily.
+        wanted, avoided = preference_terms(preferences)
+        tolerance = max(settings.SIMILARITY_CALORIE_TOLERANCE, 1)
+        constraints = {
+            "kind": "meal_plan",
+            "dietary_restrictions": dietary_restrictions,
+            "calorie_bucket": round(calorie_target / tolerance)
+            if calorie_target
+            else None,
+            "meals_per_day": meals_per_day,
+            "days": days,
+            "allergies": allergies,
+            "avoided": sorted(avoided),
+        }
+        features = wanted
+
+        if self._fan_out_days(days):
+            return await self._cached_similar(
+                constraints,
+                features,
+                key,
+                self._run_meal_plan_by_day,
+                dietary_restrictions,
+                calorie_target,
+                meals_per_day,
+                days,
+                allergies,
+                preferences,
+            )
 
         prompt = self._build_meal_plan_prompt(
             dietary_restrictions,
@@ -75,12 +501,256 @@ class AIService:
             meals_per_day,
             days,
             allergies,
-            preferences
+            preferences,
+        )
+        return await self._cached_similar(
+            constraints,
+            features,
+            key,
+            self._run_meal_plan,
+            prompt,
+            days * meals_per_day,
         )
 
-        response_text = await self._generate(prompt)
+    async def _run_meal_plan(self, prompt: str, meal_count: int) -> Dict:
+        response_text = await self._generate(
+            prompt, endpoint="meal_plan", units=meal_count
+        )
         return self._parse_meal_plan_response(response_text)
 
+    def _fan_out_days(self, days: int) -> bool:
+        return settings.MEAL_PLAN_PARALLEL_DAYS and days > 1
+
+    def _plan_locally(
+        self,
+        dietary_restrictions: List[str],
+        calorie_target: Optional[int],
+        meals_per_day: int,
+        days: int,
+        allergies: List[str],
+        preferences: Optional[str],
+    ) -> Optional[LocalPlan]:
+        """Assemble what the plan can from stored recipes; None if the planner is off
+        or the catalog empty"""
+        if not settings.MEAL_PLANNER_ENABLED or not len(meal_planner):
+            return None
+        try:
+            local = meal_planner.plan(
+                dietary_restrictions,
+                calorie_target,
+                meals_per_day,
+                days,
+                allergies,
+                preferences,
+            )
+        except Exception as e:
+            logger.error(f"Local meal planning failed: {str(e)}")
+            return None
+        logger.info(
+            f"Local meal plan: {len(local.days)}/{days} days from stored recipes "
+            f"in {local.elapsed_ms:.1f}ms"
+        )
+        return local
+
+    async def _run_meal_plan_by_day(
+        self,
+        dietary_restrictions: List[str],
+        calorie_target: Optional[int],
+        meals_per_day: int,
+        days: int,
+        allergies: List[str],
+        preferences: Optional[str],
+        day_numbers: Optional[List[int]] = None,
+    ) -> Dict:
+        """Generate every day (or just `day_numbers`) concurrently and merge into one
+        {"days": [...]} plan"""
+        semaphore = asyncio.Semaphore(settings.MEAL_PLAN_MAX_PARALLEL_DAYS)
+
+        day_plans = await asyncio.gather(
+            *(
+                self._generate_single_day(
+                    semaphore,
+                    day,
+                    dietary_restrictions,
+                    calorie_target,
+                    meals_per_day,
+                    days,
+                    allergies,
+                    preferences,
+                )
+                for day in (day_numbers or range(1, days + 1))
+            )
+        )
+
+        return {"days": list(day_plans)}
+
+    async def _generate_single_day(
+        self,
+        semaphore: asyncio.Semaphore,
+        day: int,
+        dietary_restrictions: List[str],
+        calorie_target: Optional[int],
+        meals_per_day: int,
+        days: int,
+        allergies: List[str],
+        preferences: Optional[str],
+    ) -> Dict:
+        prompt = self._build_meal_plan_prompt(
+            dietary_restrictions,
+            calorie_target,
+            meals_per_day,
+            1,
+            allergies,
+            preferences,
+            variety_note=self._day_variety_note(day, days),
+        )
+
+        async with semaphore:
+            response_text = await self._generate(
+                prompt, endpoint="meal_plan", units=meals_per_day
+            )
+
+        plan = self._parse_meal_plan_response(response_text)
+        day_data = self._single_day(plan)
+        if day_data is None:
+            logger.error(
+                f"Meal plan reply for day {day} has no meals. Raw response BELOW:"
+            )
+            logger.error(response_text)
+            raise ValueError(f"Meal plan JSON for day {day} has no meals.")
+        day_data["day"] = day
+        return day_data
+
+    def _single_day(self, plan: Any) -> Optional[Dict]:
+        """The one day in a single-day reply ({"days": [day]} or a bare day), None if
+        it has no meals"""
+        if not isinstance(plan, dict):
+            return None
+        days = plan.get("days")
+        day_data = days[0] if isinstance(days, list) and days else plan
+        if (
+            not isinstance(day_data, dict)
+            or not isinstance(day_data.get("meals"), list)
+            or not day_data["meals"]
+        ):
+            return None
+        return day_data
+
+    def _day_variety_note(self, day: int, days: int) -> str:
+        """Cross-day variety constraint for a day generated independently of the
+        others"""
+        theme = DAY_VARIETY_THEMES[(day - 1) % len(DAY_VARIETY_THEMES)]
+        other_themes = sorted(
+            {
+                DAY_VARIETY_THEMES[(d - 1) % len(DAY_VARIETY_THEMES)]
+                for d in range(1, days + 1)
+                if d != day
+            }
+            - {theme}
+        )
+
+        note = (
+            f"This is day {day} of a {days}-day plan; the other days are written "
+            f"separately. Lean towards {theme} flavors for this day unless the "
+            "preferences say otherwise"
+        )
+        if other_themes:
+            note += (
+                f", and avoid dishes typical of {', '.join(other_themes)} cuisine, "
+                "which the other days cover"
+            )
+        return note + ". Do not repeat the same main protein at every meal."
+
+    async def generate_meal_plan_stream(
+        self,
+        dietary_restrictions: List[str],
+        calorie_target: Optional[int],
+        meals_per_day: int,
+        days: int,
+        allergies: List[str],
+        preferences: Optional[str],
+    ) -> AsyncIterator[Tuple[str, int, Dict]]:
+        """
+        Stream the meal plan as ("meal", day, meal) and ("day", day, day_data) events,
+        each yielded as soon as that object is complete
+        """
+
+        # Days assembled from stored recipes go out first; only the rest hit the LLM
+        day_numbers = list(range(1, days + 1))
+        local = self._plan_locally(
+            dietary_restrictions,
+            calorie_target,
+            meals_per_day,
+            days,
+            allergies,
+            preferences,
+        )
+        if local is not None and local.days:
+            for day_number in sorted(local.days):
+                day_data = local.days[day_number]
+                for meal in day_data["meals"]:
+                    yield "meal", day_number, meal
+                yield "day", day_number, day_data
+            day_numbers = local.missing
+            if not day_numbers:
+                return
+
+        if self._fan_out_days(days) or len(day_numbers) < days:
+            semaphore = asyncio.Semaphore(settings.MEAL_PLAN_MAX_PARALLEL_DAYS)
+            tasks = [
+                asyncio.ensure_future(
+                    self._generate_single_day(
+                        semaphore,
+                        day,
+                        dietary_restrictions,
+                        calorie_target,
+                        meals_per_day,
+                        days,
+                        allergies,
+                        preferences,
+                    )
+                )
+                for day in day_numbers
+            ]
+            try:
+                for next_day in asyncio.as_completed(tasks):
+                    day_data = await next_day
+                    for meal in day_data.get("meals", []):
+                        yield "meal", day_data["day"], meal
+                    yield "day", day_data["day"], day_data
+            finally:
+                for task in tasks:
+                    task.cancel()
+            return
+
+        prompt = self._build_meal_plan_prompt(
+            dietary_restrictions,
+            calorie_target,
+            meals_per_day,
+            days,
+            allergies,
+            preferences,
+        )
+
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": self.temperature,
+            "max_tokens": self._max_tokens("meal_plan", days * meals_per_day),
+        }
+
+        parser = JSONStreamParser(
+            watch=[("days", "*"), ("days", "*", "meals", "*")], root="{"
+        )
+        async for chunk in self._stream(payload, "meal_plan", days * meals_per_day):
+            for path, value in parser.feed(chunk):
+                day_number = path[1] + 1
+                if len(path) == 2:
+                    value.setdefault("day", day_number)
+                    yield "day", day_number, value
+                else:
+                    yield "meal", day_number, value
+
     async def find_recipes(
         self,
         ingredients: List[str],
@@ -88,100 +758,411 @@ class AIService:
         meal_type: Optional[str],
         cuisine: Optional[str],
         cooking_time: Optional[int],
-        servings: int
+        servings: int,
+        count: Optional[int] = None,
     ) -> List[Dict]:
-
         prompt = self._build_recipe_search_prompt(
             ingredients,
             dietary_restrictions,
             meal_type,
             cuisine,
             cooking_time,
-            servings
+            servings,
+            count,
         )
 
-        response_text = await self._generate(prompt)
+        key = make_cache_key(
+            "recipes",
+            ingredients=ingredients,
+            dietary_restrictions=dietary_restrictions,
+            meal_type=meal_type,
+            cuisine=cuisine,
+            cooking_time=cooking_time,
+            servings=servings,
+            count=count,
+            temperature=self.temperature,
+        )
+        constraints = {
+            "kind": "recipes",
+            "dietary_restrictions": dietary_restrictions,
+            "meal_type": meal_type,
+            "cuisine": cuisine,
+            "cooking_time": cooking_time,
+            "servings": servings,
+            "count": count,
+        }
+        features = set().union(*(name_tokens(line) for line in ingredients))
+        return await self._cached_similar(
+            constraints,
+            features,
+            key,
+            self._run_recipe_search,
+            prompt,
+            count or RECIPES_PER_SEARCH,
+        )
+
+    async def _run_recipe_search(
+        self, prompt: str, count: int = RECIPES_PER_SEARCH
+    ) -> List[Dict]:
+        response_text = await self._generate(prompt, endpoint="recipes", units=count)
         return self._parse_recipe_response(response_text)
 
+    async def find_recipes_stream(
+        self,
+        ingredients: List[str],
+        dietary_restrictions: List[str],
+        meal_type: Optional[str],
+        cuisine: Optional[str],
+        cooking_time: Optional[int],
+        servings: int,
+        count: Optional[int] = None,
+    ) -> AsyncIterator[Dict]:
+        """Stream recipe search results, yielding each recipe as soon as it is
+        complete"""
+
+        prompt = self._build_recipe_search_prompt(
+            ingredients,
+            dietary_restrictions,
+            meal_type,
+            cuisine,
+            cooking_time,
+            servings,
+            count,
+        )
+
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": self.temperature,
+            "max_tokens": self._max_tokens("recipes", count or RECIPES_PER_SEARCH),
+        }
+
+        # Only elements of a top-level array (bare or under "recipes") are recipes;
+        # the ("*",) matches on an object root are its own fields and are skipped
+        parser = JSONStreamParser(watch=[("*",), ("recipes", "*")], root="[{")
+        streamed = 0
+        async for chunk in self._stream(
+            payload, "recipes", count or RECIPES_PER_SEARCH
+        ):
+            for path, recipe in parser.feed(chunk):
+                if isinstance(path[-1], int) and isinstance(recipe, dict):
+                    streamed += 1
+                    yield recipe
+
+        # A single bare recipe object is only usable once it has closed
+        if not streamed and parser.done:
+            data = parser.result()
+            if isinstance(data, dict) and not isinstance(data.get("recipes"), list):
+                yield data
+
     async def chat(
         self,
         message: str,
-        context: Optional[List[Dict]] = None
+        context: Optional[List[Dict]] = None,
+        session_id: Optional[str] = None,
     ) -> Dict:
+        session = chat_sessions.open(session_id, context)
+        async with session.lock:
+            messages = chat_sessions.window(session, CHAT_SYSTEM_PROMPT, message)
 
-        # Build conversation
-        messages = [{"role": "system", "content": """
-You are NutriMind, a helpful AI nutritionist and recipe expert.
-Provide meal planning advice, recipes, and nutrition guidance.
-""" }]
+            units = self._chat_units(messages)
+            payload = {
+                "model": self.model,
+                "messages": messages,
+                "temperature": 0.7,
+                "max_tokens": self._max_tokens("chat", units),
+            }
 
-        if context:
-            messages.extend(context)
+            response_text = await self._complete(payload, "chat", units)
+            self._finish_chat_turn(session, message, response_text)
 
-        messages.append({"role": "user", "content": message})
-
-        payload = {
-            "model": self.model,
-            "messages": messages,
-            "temperature": 0.7,
-            "max_tokens": settings.MAX_TOKENS
+        return {
+            "message": response_text,
+            "suggestions": self._extract_suggestions(response_text),
+            "session_id": session.id,
         }
 
-        response = await asyncio.to_thread(
-            requests.post,
-            self.base_url,
-            headers=self.headers,
-            json=payload
+    async def chat_stream(
+        self,
+        message: str,
+        context: Optional[List[Dict]] = None,
+        session_id: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """Stream the chat reply token by token (open the session first to learn its
+        id)"""
+
+        session = chat_sessions.open(session_id, context)
+        async with session.lock:
+            messages = chat_sessions.window(session, CHAT_SYSTEM_PROMPT, message)
+
+            units = self._chat_units(messages)
+            payload = {
+                "model": self.model,
+                "messages": messages,
+                "temperature": 0.7,
+                "max_tokens": self._max_tokens("chat", units),
+            }
+
+            parts = []
+            async for token in self._stream(payload, "chat", units):
+                parts.append(token)
+                yield token
+
+            self._finish_chat_turn(session, message, "".join(parts))
+
+    def _chat_units(self, messages: List[Dict]) -> float:
+        """Longer conversations get up to double the base reply budget"""
+        return 1.0 + min(len(messages) - 2, 20) / 20
+
+    def _finish_chat_turn(self, session: ChatSession, message: str, reply: str) -> None:
+        chat_sessions.record(session, message, reply)
+        chat_sessions.schedule_compaction(session, self._summarize_chat)
+
+    async def _summarize_chat(self, summary: str, turns: List[Dict[str, str]]) -> str:
+        """Fold `turns` into the running conversation summary"""
+        transcript = "\n".join(
+            f"{turn['role'].upper()}: {turn['content']}" for turn in turns
         )
+        prompt = f"""
+Update the running summary of a conversation between a user and NutriMind,
+a nutrition assistant. Keep the user's goals, dietary restrictions, allergies,
+preferences and any decisions or recipes agreed on.
+Write at most {settings.CHAT_SUMMARY_WORDS} words of plain text, no preamble.
 
-        data = response.json()
-        response_text = data["choices"][0]["message"]["content"]
+Current summary:
+{summary or "(none)"}
 
-        return {
-            "message": response_text,
-            "suggestions": self._extract_suggestions(response_text)
+New conversation turns:
+{transcript}
+"""
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0.2,
+            "max_tokens": settings.CHAT_SUMMARY_WORDS * 2,
         }
+        return await self._complete(payload, "chat_summary")
 
     async def analyze_nutrition(
-        self,
-        recipe_name: str,
-        ingredients: List[str],
-        servings: int
+        self, recipe_name: str, ingredients: List[str], servings: int
     ) -> Dict:
+        if settings.NUTRITION_ENGINE_ENABLED:
+            return await self._analyze_nutrition_local(
+                recipe_name, ingredients, servings
+            )
+        return await self._analyze_nutrition_llm(recipe_name, ingredients, servings)
 
-        prompt = f"""Analyze the nutritional content of this recipe and return JSON only.
+    async def _analyze_nutrition_llm(
+        self, recipe_name: str, ingredients: List[str], servings: int
+    ) -> Dict:
+        prompt = self._build_nutrition_prompt(recipe_name, ingredients, servings)
+        key = self._nutrition_key(recipe_name, ingredients, servings)
+        return await self._cached(key, self._run_nutrition_analysis, prompt)
 
-Recipe: {recipe_name}
-Servings: {servings}
+    async def _analyze_nutrition_local(
+        self, recipe_name: str, ingredients: List[str], servings: int
+    ) -> Dict:
+        """
+        Compute nutrition from the bundled ingredient table. Only lines the table
+        can't resolve (and, if enabled, the recommendations) go to the LLM.
+        """
+        estimate = nutrition_engine.estimate(ingredients)
+        totals = estimate.totals
+
+        if estimate.unresolved and settings.NUTRITION_LLM_FALLBACK:
+            try:
+                fallback = await self._analyze_nutrition_llm(
+                    recipe_name, estimate.unresolved, 1
+                )
+                extra = fallback["nutrition_per_serving"]
+                totals = {n: totals[n] + float(extra.get(n) or 0) for n in NUTRIENTS}
+            except Exception as e:
+                logger.warning(
+                    f"LLM fallback failed for {len(estimate.unresolved)} unresolved "
+                    f"ingredients of '{recipe_name}': {str(e)}"
+                )
+        elif estimate.unresolved:
+            logger.info(
+                f"Ignoring {len(estimate.unresolved)} unresolved ingredients "
+                f"of '{recipe_name}'"
+            )
 
-Ingredients:
-{chr(10).join(f"- {i}" for i in ingredients)}
+        per_serving = {n: value / max(servings, 1) for n, value in totals.items()}
+        analysis = {
+            "nutrition_per_serving": self._round_nutrition(per_serving),
+            "nutrition_total": self._round_nutrition(totals),
+            "health_score": health_score(per_serving),
+            "recommendations": recommendations(per_serving),
+        }
 
-Required JSON Format:
-{{
-  "nutrition_per_serving": {{
-    "calories": <int>,
-    "protein": <float>,
-    "carbohydrates": <float>,
-    "fat": <float>,
-    "fiber": <float>,
-    "sugar": <float>,
-    "sodium": <float>
-  }},
-  "health_score": <int>,
-  "recommendations": [<strings>]
-}}
-"""
+        if settings.NUTRITION_LLM_RECOMMENDATIONS:
+            try:
+                llm_analysis = await self._analyze_nutrition_llm(
+                    recipe_name, ingredients, servings
+                )
+                analysis["recommendations"] = (
+                    llm_analysis["recommendations"] or analysis["recommendations"]
+                )
+            except Exception as e:
+                logger.warning(
+                    f"LLM recommendations failed for '{recipe_name}': {str(e)}"
+                )
+
+        return analysis
+
+    def _round_nutrition(self, values: Dict[str, float]) -> Dict[str, Any]:
+        rounded = {n: round(value, 1) for n, value in values.items()}
+        rounded["calories"] = int(round(values["calories"]))
+        return rounded
+
+    def _nutrition_key(
+        self, recipe_name: str, ingredients: List[str], servings: int
+    ) -> str:
+        return make_cache_key(
+            "nutrition",
+            recipe_name=recipe_name,
+            ingredients=ingredients,
+            servings=servings,
+            temperature=0.3,
+        )
+
+    async def _run_nutrition_analysis(self, prompt: str) -> Dict:
+        response_text = await self._generate(
+            prompt, temperature=0.3, endpoint="nutrition"
+        )
+
+        try:
+            with metrics.stage("nutrition", "parse"):
+                return extract_json(response_text, root="{")
+        except ValueError as e:
+            raise ValueError("Could not parse nutrition JSON") from e
+
+    async def analyze_nutrition_batch(self, items: List[Dict]) -> List[Any]:
+        """
+        Analyze many recipes at once. `items` are dicts with recipe_name, ingredients
+        and servings. Returns one entry per item, in order: the analysis dict, or the
+        exception raised for that item.
+
+        Identical items are analyzed once. Small uncached items are packed several
+        to a prompt, and packs run concurrently with bounded parallelism.
+        """
+        if settings.NUTRITION_ENGINE_ENABLED:
+            return await self._analyze_nutrition_batch_local(items)
+
+        results: List[Any] = [None] * len(items)
+        pending: Dict[str, List[int]] = {}
+
+        for index, item in enumerate(items):
+            key = self._nutrition_key(
+                item["recipe_name"], item["ingredients"], item["servings"]
+            )
+            cached = self.cache.get(key) if settings.CACHE_ENABLED else None
+            if cached is not None:
+                results[index] = cached
+            else:
+                pending.setdefault(key, []).append(index)
+
+        small = [
+            key
+            for key, indexes in pending.items()
+            if len(items[indexes[0]]["ingredients"])
+            <= settings.NUTRITION_PACK_MAX_INGREDIENTS
+        ]
+        large = [key for key in pending if key not in small]
+        size = max(settings.NUTRITION_PACK_SIZE, 1)
+        packs = [small[i : i + size] for i in range(0, len(small), size)] + [
+            [key] for key in large
+        ]
+
+        semaphore = asyncio.Semaphore(settings.BATCH_MAX_CONCURRENCY)
+
+        async def run_pack(pack: List[str]) -> None:
+            async with semaphore:
+                pack_items = [items[pending[key][0]] for key in pack]
+                try:
+                    if len(pack) == 1:
+                        outcomes = [await self._analyze_nutrition_llm(**pack_items[0])]
+                    else:
+                        outcomes = await self._run_packed_nutrition(pack, pack_items)
+                except Exception as e:
+                    outcomes = [e] * len(pack)
+
+            for key, outcome in zip(pack, outcomes, strict=True):
+                for index in pending[key]:
+                    results[index] = outcome
+
+        await asyncio.gather(*(run_pack(pack) for pack in packs))
+        return results
+
+    async def _analyze_nutrition_batch_local(self, items: List[Dict]) -> List[Any]:
+        """Local analysis per unique item; only the LLM fallbacks need bounding"""
+        pending: Dict[str, List[int]] = {}
+        for index, item in enumerate(items):
+            key = self._nutrition_key(
+                item["recipe_name"], item["ingredients"], item["servings"]
+            )
+            pending.setdefault(key, []).append(index)
+
+        semaphore = asyncio.Semaphore(settings.BATCH_MAX_CONCURRENCY)
 
-        response_text = await self._generate(prompt, temperature=0.3)
+        async def run_one(indexes: List[int]) -> Any:
+            async with semaphore:
+                try:
+                    return await self.analyze_nutrition(**items[indexes[0]])
+                except Exception as e:
+                    return e
+
+        outcomes = await asyncio.gather(
+            *(run_one(indexes) for indexes in pending.values())
+        )
 
-        json_start = response_text.find("{")
-        json_end = response_text.rfind("}") + 1
+        results: List[Any] = [None] * len(items)
+        for indexes, outcome in zip(pending.values(), outcomes, strict=True):
+            for index in indexes:
+                results[index] = outcome
+        return results
+
+    async def _run_packed_nutrition(
+        self, keys: List[str], items: List[Dict]
+    ) -> List[Any]:
+        """Analyze several small recipes in one upstream prompt, falling back per
+        item"""
+        prompt = self._build_nutrition_batch_prompt(items)
+        response_text = await self._generate(
+            prompt, temperature=0.3, endpoint="nutrition", units=len(items)
+        )
 
-        if json_start == -1 or json_end <= json_start:
-            raise ValueError("Could not parse nutrition JSON")
+        try:
+            with metrics.stage("nutrition", "parse"):
+                packed = extract_json(response_text, root="[")
+        except ValueError:
+            packed = []
+
+        by_index = {
+            entry.get("index"): entry
+            for entry in packed
+            if isinstance(entry, dict) and "nutrition_per_serving" in entry
+        }
 
-        return json.loads(response_text[json_start:json_end])
+        outcomes: List[Any] = []
+        for position, (key, item) in enumerate(zip(keys, items, strict=True)):
+            analysis = by_index.get(position)
+            if analysis is None:
+                # Missing from the packed answer: analyze it on its own
+                try:
+                    outcomes.append(await self._analyze_nutrition_llm(**item))
+                except Exception as e:
+                    outcomes.append(e)
+                continue
+
+            analysis = {
+                field: value for field, value in analysis.items() if field != "index"
+            }
+            if settings.CACHE_ENABLED:
+                self.cache.set(key, analysis)
+            outcomes.append(analysis)
+
+        return outcomes
 
     # ---------------------------------------------------------
     # ------------- PROMPT BUILDERS (unchanged)
@@ -194,9 +1175,9 @@ Required JSON Format:
         meals_per_day,
         days,
         allergies,
-        preferences
+        preferences,
+        variety_note=None,
     ) -> str:
-
         prompt = f"""
     You are NutriMind, an expert meal-planning AI.
 
@@ -247,12 +1228,70 @@ Required JSON Format:
     - Days: {days}
     - Allergies: {', '.join(allergies) or "None"}
     - Preferences: {preferences or "None"}
+    {f"- Variety: {variety_note}" if variety_note else ""}
 
     Return JSON ONLY.
     """
 
         return prompt
 
+    def _build_nutrition_prompt(self, recipe_name, ingredients, servings) -> str:
+        return f"""Analyze the nutritional content of this recipe and return JSON only.
+
+Recipe: {recipe_name}
+Servings: {servings}
+
+Ingredients:
+{chr(10).join(f"- {i}" for i in ingredients)}
+
+Required JSON Format:
+{{
+  "nutrition_per_serving": {{
+    "calories": <int>,
+    "protein": <float>,
+    "carbohydrates": <float>,
+    "fat": <float>,
+    "fiber": <float>,
+    "sugar": <float>,
+    "sodium": <float>
+  }},
+  "health_score": <int>,
+  "recommendations": [<strings>]
+}}
+"""
+
+    def _build_nutrition_batch_prompt(self, items) -> str:
+        recipes = "\n\n".join(
+            f"""Recipe {index}: {item["recipe_name"]}
+Servings: {item["servings"]}
+Ingredients:
+{chr(10).join(f"- {i}" for i in item["ingredients"])}"""
+            for index, item in enumerate(items)
+        )
+
+        return f"""Analyze the nutritional content of each recipe below and return
+JSON only: a JSON array with exactly one object per recipe, in the same order.
+
+{recipes}
+
+Required JSON Format:
+[
+  {{
+    "index": <recipe number>,
+    "nutrition_per_serving": {{
+      "calories": <int>,
+      "protein": <float>,
+      "carbohydrates": <float>,
+      "fat": <float>,
+      "fiber": <float>,
+      "sugar": <float>,
+      "sodium": <float>
+    }},
+    "health_score": <int>,
+    "recommendations": [<strings>]
+  }}
+]
+"""
 
     def _build_recipe_search_prompt(
         self,
@@ -261,11 +1300,11 @@ Required JSON Format:
         meal_type,
         cuisine,
         cooking_time,
-        servings
+        servings,
+        count=None,
     ) -> str:
-
         prompt = f"""
-    Find 3–5 recipes using these ingredients: {', '.join(ingredients)}
+    Find {count or "3–5"} recipes using these ingredients: {', '.join(ingredients)}
 
     Restrictions: {', '.join(dietary_restrictions) if dietary_restrictions else "None"}
     Meal type: {meal_type or "Any"}
@@ -310,59 +1349,31 @@ Required JSON Format:
 
         return prompt
 
-
-
     # ---------------------------------------------------------
     # ---------------- RESPONSE PARSERS
     # ---------------------------------------------------------
 
     def _parse_meal_plan_response(self, response_text: str) -> Dict:
         try:
-            # Find first { 
-            start = response_text.find("{")
-            if start == -1:
-                raise ValueError("No JSON object found")
-
-            brace_count = 0
-            end = start
-
-            # Walk through the text counting { and }
-            for i, ch in enumerate(response_text[start:], start=start):
-                if ch == "{":
-                    brace_count += 1
-                elif ch == "}":
-                    brace_count -= 1
-                    if brace_count == 0:
-                        end = i + 1
-                        break
-
-            if brace_count != 0:
-                raise ValueError("JSON braces did not balance")
-
-            json_text = response_text[start:end]
-            return json.loads(json_text)
+            with metrics.stage("meal_plan", "parse"):
+                return extract_json(response_text, root="{")
 
-        except Exception as e:
+        except ValueError as e:
             logger.error("Meal plan parsing failure. Raw response BELOW:")
             logger.error(response_text)
-            raise ValueError("Meal plan JSON parsing failed.")
-
-
+            raise ValueError("Meal plan JSON parsing failed.") from e
 
     def _parse_recipe_response(self, response_text: str) -> List[Dict]:
         try:
-            json_start = response_text.find("[")
-            if json_start == -1:
-                json_start = response_text.find("{")
-            json_end = response_text.rfind("]") + 1
-            if json_end == 0:
-                json_end = response_text.rfind("}") + 1
-
-            data = json.loads(response_text[json_start:json_end])
-            return data if isinstance(data, list) else [data]
-
-        except Exception:
-            raise ValueError("Recipe JSON parsing failed.")
+            with metrics.stage("recipes", "parse"):
+                data = extract_json(response_text, root="[{")
+        except ValueError as e:
+            raise ValueError("Recipe JSON parsing failed.") from e
+
+        # Tolerate {"recipes": [...]} wrappers as well as a bare list or object
+        if isinstance(data, dict) and isinstance(data.get("recipes"), list):
+            data = data["recipes"]
+        return data if isinstance(data, list) else [data]
 
     def _extract_suggestions(self, response_text: str) -> List[str]:
         text = response_text.lower()
@@ -0,0 +1,139 @@
+"""
+Response cache for parsed LLM results (in-memory LRU + optional shared tier)
+"""
+
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.services.shared_state import SharedStore
+
+logger = logging.getLogger(__name__)
+
+# Namespace of cached responses in the shared store
+STORE_PREFIX = "cache:"
+
+
+def _normalize(value: Any) -> Any:
+    """Canonicalize a request parameter so equivalent requests share a key"""
+    if isinstance(value, str):
+        return value.strip().lower()
+    if isinstance(value, (list, tuple, set)):
+        return sorted(
+            (_normalize(v) for v in value), key=lambda v: json.dumps(v, sort_keys=True)
+        )
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, float):
+        return round(value, 4)
+    if hasattr(value, "value"):  # Enum members
+        return _normalize(value.value)
+    return value
+
+
+def make_cache_key(namespace: str, **params: Any) -> str:
+    """Build a stable key from a namespace and normalized request parameters"""
+    canonical = json.dumps(_normalize(params), sort_keys=True, separators=(",", ":"))
+    digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    return f"{namespace}:{digest}"
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache with TTL eviction and an optional shared tier.
+
+    The shared tier (a SQLite file or Redis, see shared_state) makes entries
+    visible to every worker and survive restarts; the LRU in front of it acts
+    as a near-cache, so repeat hits never leave the process. Entries are
+    immutable per key, so the near-cache can't go stale before its TTL.
+
+    Cached values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: int = 3600,
+        store: Optional[SharedStore] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.store = store
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+
+        if self.store is not None:
+            value, expires_at = self._shared_get(key)
+            if value is not None and expires_at > now:
+                self._remember(key, value, expires_at)
+                self.hits += 1
+                self.shared_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl
+        self._remember(key, value, expires_at)
+
+        if self.store is not None:
+            try:
+                encoded = json.dumps([expires_at, value])
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Cache value not shareable: {str(e)}")
+                return
+            self.store.set(STORE_PREFIX + key, encoded, ttl)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        if self.store is not None:
+            self.store.clear(STORE_PREFIX)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared_hits": self.shared_hits,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _remember(self, key: str, value: Any, expires_at: float) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _shared_get(self, key: str) -> Tuple[Optional[Any], float]:
+        encoded = self.store.get(STORE_PREFIX + key)
+        if encoded is None:
+            return None, 0.0
+        try:
+            expires_at, value = json.loads(encoded)
+        except (TypeError, ValueError):
+            return None, 0.0
+        return value, expires_at
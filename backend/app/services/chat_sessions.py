@@ -0,0 +1,303 @@
+"""
+Server-side chat sessions with a token-bounded context window and rolling summary
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.config import settings
+from app.services.shared_state import SharedStore, shared_store
+
+logger = logging.getLogger(__name__)
+
+# Hard cap on stored turns, in case summaries keep failing
+MAX_TURNS_PER_SESSION = 200
+
+# Per-message framing overhead in the upstream prompt
+MESSAGE_OVERHEAD_TOKENS = 4
+
+CHAT_ROLES = ("user", "assistant")
+
+# Namespace of sessions in the shared store
+STORE_PREFIX = "chat:"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token), good enough for budgeting"""
+    return len(text) // 4 + MESSAGE_OVERHEAD_TOKENS
+
+
+class ChatSession:
+    """History of one conversation: a summary of older turns plus the recent ones
+    verbatim"""
+
+    def __init__(self, session_id: str):
+        self.id = session_id
+        self.summary = ""
+        self.turns: List[Dict[str, str]] = []
+        self.last_used = time.time()
+        self.lock = asyncio.Lock()
+        self.compaction: Optional[asyncio.Task] = None
+        self.revision = ""  # Of the shared copy this one matches
+        self.synced_at = 0.0
+        self.reloads = 0
+
+    def append(self, role: str, content: str) -> None:
+        self.turns.append({"role": role, "content": content})
+        if len(self.turns) > MAX_TURNS_PER_SESSION:
+            del self.turns[: len(self.turns) - MAX_TURNS_PER_SESSION]
+
+    def history_tokens(self) -> int:
+        return sum(estimate_tokens(turn["content"]) for turn in self.turns)
+
+
+class ChatSessionStore:
+    """
+    LRU-bounded map of session id -> ChatSession.
+
+    The upstream prompt for a turn is the system prompt, the session summary,
+    as many recent turns as fit in `context_tokens`, and the new message, so
+    its size stays bounded however long the conversation runs. Once the stored
+    turns exceed the budget, the oldest are folded into the summary in the
+    background and dropped, keeping the turns that still fit.
+
+    With a shared `store`, every change is written through so any worker can
+    continue a conversation. The local map is a near-cache: a session synced
+    less than `near_ttl` seconds ago is used without reading the store.
+    Concurrent turns of one session on two workers are last-writer-wins.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int,
+        idle_ttl: float,
+        context_tokens: int,
+        store: Optional[SharedStore] = None,
+        near_ttl: float = 2.0,
+    ):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.context_tokens = context_tokens
+        self.store = store
+        self.near_ttl = near_ttl
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+
+        self.created = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.compactions = 0
+        self.compaction_failures = 0
+        self.turns_summarized = 0
+        self.shared_loads = 0
+        self.shared_saves = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def open(
+        self, session_id: Optional[str] = None, context: Optional[List[Dict]] = None
+    ) -> ChatSession:
+        """
+        The live session for `session_id`, or a new one seeded from client-side
+        `context`.
+        A new session always gets a server-minted id, even when `session_id` was given
+        but is unknown or expired, so clients can't choose the ids of new sessions.
+        """
+        now = time.time()
+        self._expire(now)
+
+        session = self._sessions.get(session_id) if session_id else None
+        if (
+            session_id
+            and self.store is not None
+            and (session is None or now - session.synced_at >= self.near_ttl)
+        ):
+            session = self._load(session_id, session, now)
+        if session is not None:
+            self._sessions.move_to_end(session.id)
+            session.last_used = now
+            return session
+
+        session = ChatSession(uuid.uuid4().hex)
+        for item in context or []:
+            role, content = item.get("role"), item.get("content")
+            if role in CHAT_ROLES and isinstance(content, str) and content:
+                session.append(role, content)
+
+        self._insert(session)
+        self.created += 1
+        return session
+
+    def _insert(self, session: ChatSession) -> None:
+        self._sessions[session.id] = session
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+
+    def _load(
+        self, session_id: str, session: Optional[ChatSession], now: float
+    ) -> Optional[ChatSession]:
+        """Refresh `session` (or create it) from the shared copy if that changed"""
+        encoded = self.store.get(STORE_PREFIX + session_id)
+        if session is not None:
+            session.synced_at = now
+        if encoded is None:
+            return session
+
+        try:
+            state = json.loads(encoded)
+        except ValueError:
+            return session
+        if session is not None and session.revision == state["revision"]:
+            return session
+
+        if session is None:
+            session = ChatSession(session_id)
+            self._insert(session)
+        session.summary = state["summary"]
+        session.turns = state["turns"]
+        session.revision = state["revision"]
+        session.synced_at = now
+        session.reloads += 1
+        self.shared_loads += 1
+        return session
+
+    def _save(self, session: ChatSession) -> None:
+        """Write the session through to the shared store"""
+        if self.store is None:
+            return
+        session.revision = uuid.uuid4().hex[:12]
+        state = {
+            "revision": session.revision,
+            "summary": session.summary,
+            "turns": session.turns,
+        }
+        self.store.set(STORE_PREFIX + session.id, json.dumps(state), self.idle_ttl)
+        session.synced_at = time.time()
+        self.shared_saves += 1
+
+    def _expire(self, now: float) -> None:
+        # Sessions are kept in last-used order, so expired ones are at the front
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.last_used < self.idle_ttl:
+                break
+            self._sessions.popitem(last=False)
+            self.expirations += 1
+
+    def window(
+        self, session: ChatSession, system_prompt: str, message: str
+    ) -> List[Dict[str, str]]:
+        """Upstream messages for the next turn of `session`"""
+        messages = [{"role": "system", "content": system_prompt}]
+        if session.summary:
+            messages.append(
+                {
+                    "role": "system",
+                    "content": (
+                        f"Summary of the earlier conversation:\n{session.summary}"
+                    ),
+                }
+            )
+
+        recent: List[Dict[str, str]] = []
+        used = 0
+        for turn in reversed(session.turns):
+            used += estimate_tokens(turn["content"])
+            if used > self.context_tokens:
+                break
+            recent.append(turn)
+
+        messages.extend(reversed(recent))
+        messages.append({"role": "user", "content": message})
+        return messages
+
+    def record(self, session: ChatSession, message: str, reply: str) -> None:
+        session.append("user", message)
+        session.append("assistant", reply)
+        session.last_used = time.time()
+        self._save(session)
+
+    def schedule_compaction(
+        self,
+        session: ChatSession,
+        summarize: Callable[[str, List[Dict[str, str]]], Awaitable[str]],
+    ) -> None:
+        """Fold turns that no longer fit the window into the summary, off the request
+        path"""
+        if session.history_tokens() <= self.context_tokens:
+            return
+        if session.compaction is not None and not session.compaction.done():
+            return
+        session.compaction = asyncio.get_running_loop().create_task(
+            self._compact(session, summarize)
+        )
+
+    async def _compact(
+        self,
+        session: ChatSession,
+        summarize: Callable[[str, List[Dict[str, str]]], Awaitable[str]],
+    ) -> None:
+        # Keep about half the budget verbatim so compaction doesn't run on every turn
+        keep_tokens = self.context_tokens // 2
+        kept, used = 0, 0
+        for turn in reversed(session.turns):
+            used += estimate_tokens(turn["content"])
+            if used > keep_tokens:
+                break
+            kept += 1
+
+        fold = len(session.turns) - kept
+        if fold <= 0:
+            return
+        folded = session.turns[:fold]
+        reloads = session.reloads
+
+        try:
+            summary = await summarize(session.summary, folded)
+        except Exception as e:
+            self.compaction_failures += 1
+            logger.warning(
+                f"Chat summary update failed for session {session.id}: {str(e)}"
+            )
+            return
+
+        # Another worker changed the session meanwhile; its copy wins
+        if session.reloads != reloads:
+            return
+
+        # New turns may have arrived (and the oldest been capped away) meanwhile
+        folded_ids = {id(turn) for turn in folded}
+        session.summary = summary.strip()
+        session.turns = [turn for turn in session.turns if id(turn) not in folded_ids]
+        self.compactions += 1
+        self.turns_summarized += fold
+        self._save(session)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self._sessions),
+            "created": self.created,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "compactions": self.compactions,
+            "compaction_failures": self.compaction_failures,
+            "turns_summarized": self.turns_summarized,
+            "shared_loads": self.shared_loads,
+            "shared_saves": self.shared_saves,
+        }
+
+
+# Singleton instance
+chat_sessions = ChatSessionStore(
+    max_sessions=settings.CHAT_SESSION_MAX,
+    idle_ttl=settings.CHAT_SESSION_TTL,
+    context_tokens=settings.CHAT_CONTEXT_TOKENS,
+    store=shared_store,
+    near_ttl=settings.SHARED_STATE_NEAR_CACHE_TTL,
+)
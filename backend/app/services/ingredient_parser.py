@@ -0,0 +1,452 @@
+"""
+Ingredient line parsing: quantity, unit, canonical name and preparation notes
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from app.config import settings
+
+# Canonical unit -> (kind, size in grams for mass / ml for volume / 1 for counts)
+UNITS: Dict[str, Tuple[str, float]] = {
+    "g": ("mass", 1.0),
+    "kg": ("mass", 1000.0),
+    "mg": ("mass", 0.001),
+    "oz": ("mass", 28.35),
+    "lb": ("mass", 453.6),
+    "ml": ("volume", 1.0),
+    "l": ("volume", 1000.0),
+    "cup": ("volume", 240.0),
+    "tbsp": ("volume", 15.0),
+    "tsp": ("volume", 5.0),
+    "fl oz": ("volume", 29.57),
+    "pint": ("volume", 473.0),
+    "quart": ("volume", 946.0),
+    "gallon": ("volume", 3785.0),
+    "pinch": ("volume", 0.3),
+    "dash": ("volume", 0.6),
+    "splash": ("volume", 5.0),
+    "clove": ("count", 1.0),
+    "slice": ("count", 1.0),
+    "piece": ("count", 1.0),
+    "can": ("count", 1.0),
+    "jar": ("count", 1.0),
+    "package": ("count", 1.0),
+    "stalk": ("count", 1.0),
+    "sprig": ("count", 1.0),
+    "bunch": ("count", 1.0),
+    "head": ("count", 1.0),
+    "handful": ("count", 1.0),
+}
+
+# Spelling variants -> canonical unit
+UNIT_ALIASES: Dict[str, str] = {
+    "g": "g",
+    "gr": "g",
+    "gram": "g",
+    "grams": "g",
+    "gramme": "g",
+    "grammes": "g",
+    "kg": "kg",
+    "kgs": "kg",
+    "kilo": "kg",
+    "kilos": "kg",
+    "kilogram": "kg",
+    "kilograms": "kg",
+    "mg": "mg",
+    "milligram": "mg",
+    "milligrams": "mg",
+    "oz": "oz",
+    "ounce": "oz",
+    "ounces": "oz",
+    "lb": "lb",
+    "lbs": "lb",
+    "pound": "lb",
+    "pounds": "lb",
+    "ml": "ml",
+    "milliliter": "ml",
+    "milliliters": "ml",
+    "millilitre": "ml",
+    "millilitres": "ml",
+    "l": "l",
+    "liter": "l",
+    "liters": "l",
+    "litre": "l",
+    "litres": "l",
+    "c": "cup",
+    "cup": "cup",
+    "cups": "cup",
+    "tbsp": "tbsp",
+    "tbsps": "tbsp",
+    "tbs": "tbsp",
+    "tbl": "tbsp",
+    "tablespoon": "tbsp",
+    "tablespoons": "tbsp",
+    "tsp": "tsp",
+    "tsps": "tsp",
+    "teaspoon": "tsp",
+    "teaspoons": "tsp",
+    "fl oz": "fl oz",
+    "fluid ounce": "fl oz",
+    "fluid ounces": "fl oz",
+    "pint": "pint",
+    "pints": "pint",
+    "pt": "pint",
+    "quart": "quart",
+    "quarts": "quart",
+    "qt": "quart",
+    "gallon": "gallon",
+    "gallons": "gallon",
+    "gal": "gallon",
+    "pinch": "pinch",
+    "pinches": "pinch",
+    "dash": "dash",
+    "dashes": "dash",
+    "splash": "splash",
+    "splashes": "splash",
+    "clove": "clove",
+    "cloves": "clove",
+    "slice": "slice",
+    "slices": "slice",
+    "piece": "piece",
+    "pieces": "piece",
+    "pc": "piece",
+    "pcs": "piece",
+    "can": "can",
+    "cans": "can",
+    "tin": "can",
+    "tins": "can",
+    "jar": "jar",
+    "jars": "jar",
+    "package": "package",
+    "packages": "package",
+    "pkg": "package",
+    "packet": "package",
+    "packets": "package",
+    "stalk": "stalk",
+    "stalks": "stalk",
+    "rib": "stalk",
+    "ribs": "stalk",
+    "sprig": "sprig",
+    "sprigs": "sprig",
+    "bunch": "bunch",
+    "bunches": "bunch",
+    "head": "head",
+    "heads": "head",
+    "handful": "handful",
+    "handfuls": "handful",
+}
+
+# Case matters for the classic recipe shorthand: "T" is a tablespoon, "t" a teaspoon
+_CASED_UNITS = {"T": "tbsp", "Tb": "tbsp", "t": "tsp"}
+
+_WORD_NUMBERS = {
+    "a": 1.0,
+    "an": 1.0,
+    "one": 1.0,
+    "two": 2.0,
+    "three": 3.0,
+    "four": 4.0,
+    "five": 5.0,
+    "six": 6.0,
+    "seven": 7.0,
+    "eight": 8.0,
+    "nine": 9.0,
+    "ten": 10.0,
+    "eleven": 11.0,
+    "twelve": 12.0,
+    "dozen": 12.0,
+    "half": 0.5,
+    "quarter": 0.25,
+}
+
+# Descriptive words that belong in the preparation notes, not the ingredient name
+PREPARATION_WORDS = {
+    "chopped",
+    "diced",
+    "minced",
+    "sliced",
+    "grated",
+    "shredded",
+    "crushed",
+    "cubed",
+    "peeled",
+    "seeded",
+    "pitted",
+    "trimmed",
+    "halved",
+    "quartered",
+    "julienned",
+    "melted",
+    "softened",
+    "beaten",
+    "whisked",
+    "sifted",
+    "packed",
+    "heaping",
+    "level",
+    "rinsed",
+    "drained",
+    "thawed",
+    "divided",
+    "toasted",
+    "mashed",
+    "zested",
+    "juiced",
+    "finely",
+    "roughly",
+    "coarsely",
+    "thinly",
+    "thickly",
+    "freshly",
+    "lightly",
+    "well",
+    "large",
+    "medium",
+    "small",
+    "extra",
+    "about",
+    "approximately",
+    "heaped",
+}
+
+_FILLER_WORDS = {"a", "an", "the", "of", "fresh"}
+
+_NEGLIGIBLE_RE = re.compile(
+    r"\b(?:to taste|as needed|for garnish|for serving|optional)\b", re.IGNORECASE
+)
+
+_NUMBER = r"(?:\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?|\.\d+)"
+_WORD_NUMBER = r"(?:" + "|".join(sorted(_WORD_NUMBERS, key=len, reverse=True)) + r")"
+_QUANTITY_RE = re.compile(
+    rf"^(?P<low>{_NUMBER}|{_WORD_NUMBER}(?=\s))"
+    rf"(?:\s*(?:-|–|to|or)\s*(?P<high>{_NUMBER}))?\s*"
+)
+_UNIT_RE = re.compile(
+    r"^(?P<unit>fl\.?\s*oz|fluid\s+ounces?|[a-zA-Z]+)\.?(?=\s|$|\()\s*(?:of\s+)?"
+)
+_PACKAGE_SIZE_RE = re.compile(
+    rf"\(\s*(?P<size>{_NUMBER})\s*-?\s*(?P<unit>[a-zA-Z. ]+?)\s*"
+    r"(?:can|jar|package|pkg|each)?\s*\)"
+)
+_PARENS_RE = re.compile(r"\(([^)]*)\)")
+_BULLET_RE = re.compile(r"^\s*(?:[-*•·]|\d+[.)](?=\s))\s*")
+_NON_NAME_RE = re.compile(r"[^a-z\s'&-]")
+
+
+@dataclass(frozen=True)
+class ParsedIngredient:
+    """One parsed ingredient line. Instances are shared through the cache, so they're
+    frozen."""
+
+    raw: str
+    name: str
+    quantity: Optional[float] = None
+    quantity_max: Optional[float] = None
+    unit: Optional[str] = None
+    preparation: Optional[str] = None
+    grams: Optional[float] = None
+    ml: Optional[float] = None
+    count: Optional[float] = None
+    negligible: bool = False
+
+    @property
+    def amount(self) -> Optional[float]:
+        """Quantity to compute with: the midpoint of a range"""
+        if self.quantity is None:
+            return None
+        if self.quantity_max is None:
+            return self.quantity
+        return (self.quantity + self.quantity_max) / 2
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "raw": self.raw,
+            "name": self.name,
+            "quantity": self.quantity,
+            "quantity_max": self.quantity_max,
+            "unit": self.unit,
+            "preparation": self.preparation,
+            "grams": self.grams,
+            "ml": self.ml,
+        }
+
+
+def _number(text: str) -> float:
+    text = text.strip()
+    if text in _WORD_NUMBERS:
+        return _WORD_NUMBERS[text]
+
+    value = 0.0
+    for part in text.split():
+        if "/" in part:
+            num, den = part.split("/")
+            value += float(num) / float(den) if float(den) else 0.0
+        else:
+            value += float(part)
+    return value
+
+
+def _normalize_fractions(text: str) -> str:
+    """Turn "1½" and "½" into "1 1/2" and "1/2" """
+    chars = []
+    for ch in text:
+        if (
+            unicodedata.category(ch) == "No"
+            and unicodedata.numeric(ch, None) is not None
+        ):
+            value = unicodedata.numeric(ch)
+            if 0 < value < 1:
+                numerator, denominator = value.as_integer_ratio()
+                # Common vulgar fractions: ⅓ -> 1/3 rather than a long binary ratio
+                for den in (2, 3, 4, 5, 6, 8):
+                    if abs(value * den - round(value * den)) < 1e-9:
+                        numerator, denominator = round(value * den), den
+                        break
+                chars.append(f" {numerator}/{denominator}")
+                continue
+        chars.append("/" if ch == "⁄" else ch)
+    return "".join(chars)
+
+
+def canonical_unit(token: str) -> Optional[str]:
+    token = token.strip().rstrip(".")
+    if token in _CASED_UNITS:
+        return _CASED_UNITS[token]
+    return UNIT_ALIASES.get(re.sub(r"\s+", " ", token.lower().replace(".", "")))
+
+
+def singularize(word: str) -> str:
+    """Good-enough English singular for ingredient nouns"""
+    if len(word) <= 3 or word.endswith(("ss", "us", "is")):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith("oes"):
+        return word[:-2]
+    if word.endswith(("ches", "shes", "xes", "sses")):
+        return word[:-2]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+def canonical_name(text: str) -> str:
+    """Lowercase, strip punctuation and descriptors, singularize the head noun"""
+    words = [
+        w
+        for w in _NON_NAME_RE.sub(" ", text.lower()).split()
+        if w not in PREPARATION_WORDS and w not in _FILLER_WORDS
+    ]
+    if not words:
+        return ""
+    words[-1] = singularize(words[-1])
+    return " ".join(words)
+
+
+@lru_cache(maxsize=settings.INGREDIENT_PARSER_CACHE_SIZE)
+def parse_ingredient(line: str) -> ParsedIngredient:
+    """
+    Parse one free-form ingredient line, e.g. "1 1/2 cups finely diced onion, divided".
+    Results are memoized: the same lines repeat constantly across requests.
+    """
+    text = _normalize_fractions(_BULLET_RE.sub("", line.strip()))
+    negligible = bool(_NEGLIGIBLE_RE.search(text))
+    text = _NEGLIGIBLE_RE.sub("", text)
+    notes: List[str] = []
+
+    # "2 (15 oz) cans chickpeas" / "1 can (400g) tomatoes"
+    package_grams = package_ml = None
+    size = _PACKAGE_SIZE_RE.search(text)
+    if size:
+        size_unit = canonical_unit(size.group("unit"))
+        if size_unit and UNITS[size_unit][0] in ("mass", "volume"):
+            amount = _number(size.group("size")) * UNITS[size_unit][1]
+            if UNITS[size_unit][0] == "mass":
+                package_grams = amount
+            else:
+                package_ml = amount
+            text = text[: size.start()] + " " + text[size.end() :]
+
+    # Remaining parentheses and anything after the first comma are notes
+    notes.extend(n.strip() for n in _PARENS_RE.findall(text) if n.strip())
+    text = _PARENS_RE.sub(" ", text)
+    text, _, after_comma = text.partition(",")
+    if after_comma.strip():
+        notes.append(after_comma.strip(" ,;"))
+    text = text.strip()
+
+    quantity = quantity_max = None
+    match = _QUANTITY_RE.match(text.lower())
+    if match:
+        quantity = _number(match.group("low"))
+        if match.group("high"):
+            quantity_max = _number(match.group("high"))
+        text = text[match.end() :]
+
+    unit = None
+    match = _UNIT_RE.match(text)
+    if match:
+        unit = canonical_unit(match.group("unit"))
+        if unit:
+            text = text[match.end() :]
+    if unit is None and (package_grams or package_ml):
+        unit = "package"
+
+    words = text.lower().split()
+    notes[:0] = [w for w in words if w in PREPARATION_WORDS]
+    name = canonical_name(text)
+
+    amount = quantity if quantity_max is None else (quantity + quantity_max) / 2
+    grams = ml = count = None
+    if amount is not None or unit is not None:
+        amount = 1.0 if amount is None else amount
+        kind, factor = UNITS[unit] if unit else ("count", 1.0)
+        if kind == "mass":
+            grams = amount * factor
+        elif kind == "volume":
+            ml = amount * factor
+        else:
+            count = amount
+            if package_grams:
+                grams = amount * package_grams
+            elif package_ml:
+                ml = amount * package_ml
+
+    return ParsedIngredient(
+        raw=line,
+        name=name,
+        quantity=quantity,
+        quantity_max=quantity_max,
+        unit=unit,
+        preparation=", ".join(notes) or None,
+        grams=grams,
+        ml=ml,
+        count=count,
+        negligible=negligible,
+    )
+
+
+def name_tokens(line: str) -> FrozenSet[str]:
+    """Singular words of an ingredient's canonical name: "2 cups Baby Spinach" ->
+    {baby, spinach}"""
+    return frozenset(singularize(word) for word in parse_ingredient(line).name.split())
+
+
+def parse_ingredients(lines: List[str]) -> List[ParsedIngredient]:
+    return [parse_ingredient(line) for line in lines]
+
+
+def parser_stats() -> Dict[str, Any]:
+    info = parse_ingredient.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "max_size": info.maxsize,
+        "hit_rate": info.hits / lookups if lookups else 0.0,
+    }
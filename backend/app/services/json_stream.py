@@ -0,0 +1,189 @@
+"""
+Incremental, string-aware JSON extraction for LLM output
+"""
+
+import json
+import re
+from bisect import bisect_right
+from typing import Any, Iterable, List, Optional, Tuple
+
+# Characters that end a run of plain string content
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+# Characters the structural scanner has to look at outside strings
+_STRUCTURAL = re.compile(r'[{}\[\]",:]')
+
+WILDCARD = "*"
+
+Path = Tuple[Any, ...]
+
+
+def _matches(path: Path, pattern: Path) -> bool:
+    if len(path) != len(pattern):
+        return False
+    return all(p == WILDCARD or p == k for k, p in zip(path, pattern, strict=True))
+
+
+class _Frame:
+    __slots__ = ("kind", "start", "path", "key", "index", "expect_key")
+
+    def __init__(self, kind: str, start: int, path: Path):
+        self.kind = kind
+        self.start = start
+        self.path = path
+        self.key: Optional[str] = None
+        self.index = 0
+        self.expect_key = kind == "{"
+
+    def child_path(self) -> Path:
+        return self.path + ((self.key,) if self.kind == "{" else (self.index,))
+
+
+class JSONStreamParser:
+    """
+    Pulls the first JSON object/array out of LLM text as it arrives in chunks.
+
+    Any prose or markdown before the value is skipped, and brackets inside
+    strings are ignored. `feed()` returns a (path, value) pair for every
+    watched container that closed in that chunk. A path is the tuple of keys and
+    array indices from the root, e.g. ("days", 0, "meals", 2). Watch patterns use
+    "*" as a wildcard, and the empty pattern () watches the root itself.
+    """
+
+    def __init__(self, watch: Iterable[Path] = (), root: str = "{["):
+        self.watch = [tuple(p) for p in watch]
+        self.root = root
+        self.done = False
+
+        # Chunks received so far and the offset of each, so a closed container
+        # is sliced from the chunk it started in rather than the whole text
+        self._chunks: List[str] = []
+        self._chunk_starts: List[int] = []
+        self._offset = 0
+        self._stack: List[_Frame] = []
+        self._started = False
+        self._in_string = False
+        self._escaped = False
+        self._string_is_key = False
+        self._key_parts: List[str] = []
+        self._root_end = 0
+
+    def feed(self, chunk: str) -> List[Tuple[Path, Any]]:
+        if self.done or not chunk:
+            return []
+
+        if not self._started:
+            start = min(
+                (i for i in (chunk.find(c) for c in self.root) if i != -1), default=-1
+            )
+            if start == -1:
+                return []
+            chunk = chunk[start:]
+            self._started = True
+
+        base = self._offset
+        self._chunks.append(chunk)
+        self._chunk_starts.append(base)
+        self._offset += len(chunk)
+
+        emitted: List[Tuple[Path, Any]] = []
+        i, n = 0, len(chunk)
+
+        while i < n:
+            if self._in_string:
+                i = self._scan_string(chunk, i, n)
+                continue
+
+            m = _STRUCTURAL.search(chunk, i)
+            if m is None:
+                break
+            i = m.start()
+            ch = chunk[i]
+            frame = self._stack[-1] if self._stack else None
+
+            if ch == '"':
+                self._in_string = True
+                self._string_is_key = (
+                    frame is not None and frame.kind == "{" and frame.expect_key
+                )
+                self._key_parts = []
+            elif ch in "{[":
+                path = frame.child_path() if frame is not None else ()
+                self._stack.append(_Frame(ch, base + i, path))
+            elif ch in "}]":
+                if not self._stack:
+                    break
+                closed = self._stack.pop()
+                if any(_matches(closed.path, p) for p in self.watch):
+                    text = self._slice(closed.start, base + i + 1)
+                    try:
+                        emitted.append((closed.path, json.loads(text)))
+                    except json.JSONDecodeError:
+                        pass
+                if not self._stack:
+                    self.done = True
+                    self._root_end = base + i + 1
+                    break
+            elif ch == ",":
+                if frame is not None:
+                    if frame.kind == "[":
+                        frame.index += 1
+                    else:
+                        frame.expect_key = True
+            elif ch == ":":
+                if frame is not None and frame.kind == "{":
+                    frame.expect_key = False
+
+            i += 1
+
+        return emitted
+
+    def result(self) -> Any:
+        """The complete root value; raises ValueError if it has not closed yet"""
+        if not self.done:
+            raise ValueError("JSON value is incomplete")
+        return json.loads(self._slice(0, self._root_end))
+
+    def _slice(self, start: int, end: int) -> str:
+        """Text between two absolute offsets, joining only the chunks it spans"""
+        first = bisect_right(self._chunk_starts, start) - 1
+        last = bisect_right(self._chunk_starts, end - 1)
+        base = self._chunk_starts[first]
+        return "".join(self._chunks[first:last])[start - base : end - base]
+
+    def _scan_string(self, chunk: str, i: int, n: int) -> int:
+        if self._escaped:
+            self._escaped = False
+            if self._string_is_key:
+                self._key_parts.append(chunk[i])
+            return i + 1
+
+        m = _STRING_SPECIAL.search(chunk, i)
+        end = m.start() if m else n
+        if self._string_is_key:
+            self._key_parts.append(chunk[i:end])
+        if m is None:
+            return n
+
+        if chunk[end] == "\\":
+            self._escaped = True
+            if self._string_is_key:
+                self._key_parts.append("\\")
+            return end + 1
+
+        self._in_string = False
+        if self._string_is_key:
+            raw = "".join(self._key_parts)
+            try:
+                key = json.loads(f'"{raw}"')
+            except json.JSONDecodeError:
+                key = raw
+            self._stack[-1].key = key
+        return end + 1
+
+
+def extract_json(text: str, root: str = "{[") -> Any:
+    """Parse the first complete JSON object/array embedded in `text`"""
+    parser = JSONStreamParser(root=root)
+    parser.feed(text)
+    return parser.result()
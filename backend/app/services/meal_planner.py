@@ -0,0 +1,536 @@
+"""
+Local meal plan assembly from stored recipes (calorie/macro targets, variety, allergies)
+"""
+
+import logging
+import re
+import time
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.services.ingredient_parser import name_tokens, singularize
+from app.services.recipe_store import recipe_store
+
+logger = logging.getLogger(__name__)
+
+# Meal slots per day, by meals_per_day
+SLOT_LAYOUTS = {
+    1: ["dinner"],
+    2: ["breakfast", "dinner"],
+    3: ["breakfast", "lunch", "dinner"],
+    4: ["breakfast", "lunch", "dinner", "snack"],
+    5: ["breakfast", "snack", "lunch", "dinner", "snack"],
+    6: ["breakfast", "snack", "lunch", "snack", "dinner", "snack"],
+}
+
+# Relative share of the day's calories per slot type (normalized per layout)
+SLOT_SHARES = {"breakfast": 0.25, "lunch": 0.35, "dinner": 0.35, "snack": 0.1}
+
+# Recipes without a meal type can fill these slots
+UNTYPED_SLOTS = {"lunch", "dinner"}
+
+DEFAULT_CALORIE_TARGET = 2000
+
+# Allergy words that stand for a group of ingredients
+ALLERGEN_GROUPS = {
+    "dairy": {
+        "milk",
+        "cheese",
+        "butter",
+        "cream",
+        "yogurt",
+        "yoghurt",
+        "ghee",
+        "whey",
+        "mozzarella",
+        "parmesan",
+        "cheddar",
+        "feta",
+        "ricotta",
+    },
+    "lactose": {"milk", "cheese", "cream", "yogurt", "yoghurt", "whey"},
+    "nut": {
+        "almond",
+        "walnut",
+        "pecan",
+        "cashew",
+        "pistachio",
+        "hazelnut",
+        "macadamia",
+        "peanut",
+        "nut",
+    },
+    "tree nut": {
+        "almond",
+        "walnut",
+        "pecan",
+        "cashew",
+        "pistachio",
+        "hazelnut",
+        "macadamia",
+    },
+    "peanut": {"peanut"},
+    "shellfish": {
+        "shrimp",
+        "prawn",
+        "crab",
+        "lobster",
+        "scallop",
+        "mussel",
+        "clam",
+        "oyster",
+    },
+    "fish": {
+        "salmon",
+        "tuna",
+        "cod",
+        "tilapia",
+        "trout",
+        "sardine",
+        "anchovy",
+        "halibut",
+        "mackerel",
+        "fish",
+    },
+    "gluten": {
+        "flour",
+        "bread",
+        "pasta",
+        "wheat",
+        "barley",
+        "rye",
+        "couscous",
+        "noodle",
+        "tortilla",
+        "breadcrumb",
+    },
+    "wheat": {"flour", "bread", "pasta", "wheat", "couscous", "noodle", "breadcrumb"},
+    "egg": {"egg", "mayonnaise"},
+    "soy": {"soy", "tofu", "tempeh", "edamame", "miso"},
+    "sesame": {"sesame", "tahini"},
+}
+
+# Target share of calories from protein, by dietary restriction
+PROTEIN_SHARE_TARGETS = {"high_protein": 0.30, "keto": 0.25, "low_carb": 0.25}
+DEFAULT_PROTEIN_SHARE = 0.20
+
+# Objective weights (calorie error is measured as a fraction of the day target)
+MACRO_WEIGHT = 0.5
+VARIETY_WEIGHT = 0.15
+PREFERENCE_WEIGHT = 0.1
+DESCENT_PASSES = 3
+
+_WORD_RE = re.compile(r"[a-z]{3,}")
+
+# Free-text preference clauses are split on punctuation and "but"
+_CLAUSE_RE = re.compile(r"[,.;!?]|\bbut\b")
+
+# A clause with one of these words lists things to leave out ("no mushrooms", "dairy-
+# free")
+_NEGATION_RE = re.compile(
+    r"\b(?:no|not|without|avoid\w*|hate\w*|dislike\w*|don'?t|never|skip|free)\b"
+)
+
+# Preference words that say nothing about which recipes fit
+PREFERENCE_STOPWORDS = {
+    "the",
+    "and",
+    "for",
+    "with",
+    "are",
+    "any",
+    "all",
+    "also",
+    "very",
+    "really",
+    "please",
+    "some",
+    "more",
+    "less",
+    "lot",
+    "lots",
+    "much",
+    "only",
+    "that",
+    "this",
+    "them",
+    "would",
+    "like",
+    "likes",
+    "love",
+    "loves",
+    "enjoy",
+    "prefer",
+    "want",
+    "eat",
+    "eating",
+    "food",
+    "meal",
+    "dish",
+    "day",
+    "week",
+    "cuisine",
+    "style",
+    "flavor",
+    "flavour",
+    "option",
+    "kind",
+    "sort",
+    "thing",
+    "something",
+    "everything",
+}
+
+
+def allergen_words(allergies: Iterable[str]) -> Set[str]:
+    """Ingredient words to exclude for a list of free-text allergies"""
+    words: Set[str] = set()
+    for allergy in allergies:
+        allergy = allergy.strip().lower()
+        singular = " ".join(singularize(w) for w in allergy.split())
+        for key in (allergy, singular):
+            words.update(ALLERGEN_GROUPS.get(key, ()))
+        words.update(singular.split())
+    return words
+
+
+def preference_terms(preferences: Optional[str]) -> Tuple[FrozenSet[str], Set[str]]:
+    """
+    Split free-text preferences into (wanted words, ingredient words to avoid).
+    Words are singularized; "I love Thai food but no mushrooms" gives
+    ({"thai"}, {"mushroom"}).
+    """
+    wanted: Set[str] = set()
+    avoided: List[str] = []
+    for clause in _CLAUSE_RE.split((preferences or "").lower()):
+        words = [
+            singularize(w) for w in _WORD_RE.findall(_NEGATION_RE.sub(" ", clause))
+        ]
+        words = [w for w in words if w not in PREFERENCE_STOPWORDS]
+        if _NEGATION_RE.search(clause):
+            avoided.extend(words)
+        else:
+            wanted.update(words)
+    return frozenset(wanted), allergen_words(avoided)
+
+
+class _CatalogRecipe:
+    __slots__ = (
+        "id",
+        "meal_type",
+        "calories",
+        "protein",
+        "words",
+        "ingredient_words",
+        "dietary",
+    )
+
+    def __init__(self, recipe: Dict, dietary: Set[str]):
+        nutrition = recipe.get("nutrition") or {}
+        self.id = recipe["id"]
+        self.meal_type = (recipe.get("meal_type") or "").lower() or None
+        self.calories = float(nutrition.get("calories") or 0)
+        self.protein = float(nutrition.get("protein") or 0)
+        self.ingredient_words: FrozenSet[str] = frozenset().union(
+            *(name_tokens(line) for line in recipe.get("ingredients", []))
+        )
+        described = " ".join(
+            [
+                recipe.get("name", ""),
+                recipe.get("cuisine") or "",
+                recipe.get("meal_type") or "",
+                *recipe.get("tags", []),
+            ]
+        )
+        self.words = frozenset(
+            singularize(w) for w in _WORD_RE.findall(described.lower())
+        )
+        self.dietary = dietary | {
+            "_".join(str(t).lower().replace("-", " ").split())
+            for t in recipe.get("tags", [])
+        }
+
+
+class LocalPlan:
+    """Days the planner could assemble, in the {"days": [...]} shape the LLM returns"""
+
+    def __init__(self, days: Dict[int, Dict], missing: List[int], elapsed_ms: float):
+        self.days = days
+        self.missing = missing
+        self.elapsed_ms = elapsed_ms
+
+    @property
+    def complete(self) -> bool:
+        return not self.missing
+
+
+class MealPlanner:
+    """
+    Builds meal plans from the recipe store without calling the LLM.
+
+    Each day is solved by coordinate descent: every slot in turn picks the
+    eligible recipe that best closes the gap between the day's calorie target
+    and the other slots, penalized for macro drift and for reuse on earlier
+    days. A recipe is never repeated within a day or used more than `max_uses`
+    times per plan. A day whose slots can't all be filled that way, that misses
+    the calorie target by more than `tolerance`, or that has no meal matching
+    the stated preferences, is reported as missing so the caller can generate
+    it another way.
+    """
+
+    def __init__(self, tolerance: float = 0.1, max_uses: int = 1):
+        self.tolerance = tolerance
+        self.max_uses = max_uses
+        self._catalog: Dict[str, _CatalogRecipe] = {}
+        self.plans = 0
+        self.complete_plans = 0
+        self.days_planned = 0
+        self.days_missing = 0
+
+    def __len__(self) -> int:
+        return len(self._catalog)
+
+    def add(self, recipe: Dict, dietary_restrictions: Iterable[str] = ()) -> None:
+        if not recipe.get("id"):
+            return
+        existing = self._catalog.get(recipe["id"])
+        if existing is not None:
+            existing.dietary.update(dietary_restrictions)
+            return
+        entry = _CatalogRecipe(recipe, set(dietary_restrictions))
+        if entry.calories > 0:
+            self._catalog[entry.id] = entry
+
+    def build(self, entries: Iterable[Tuple[Dict, List[str]]]) -> None:
+        for recipe, dietary in entries:
+            self.add(recipe, dietary)
+        logger.info(f"Meal planner catalog built: {len(self._catalog)} recipes")
+
+    def plan(
+        self,
+        dietary_restrictions: List[str],
+        calorie_target: Optional[int],
+        meals_per_day: int,
+        days: int,
+        allergies: List[str],
+        preferences: Optional[str] = None,
+    ) -> LocalPlan:
+        started = time.perf_counter()
+        self.plans += 1
+
+        layout = SLOT_LAYOUTS.get(meals_per_day) or (
+            SLOT_LAYOUTS[6] + ["snack"] * (meals_per_day - 6)
+        )
+        day_target = float(calorie_target or DEFAULT_CALORIE_TARGET)
+        shares = np.array([SLOT_SHARES[slot] for slot in layout])
+        slot_targets = shares / shares.sum() * day_target
+
+        protein_target = max(
+            (
+                PROTEIN_SHARE_TARGETS.get(r, DEFAULT_PROTEIN_SHARE)
+                for r in dietary_restrictions
+            ),
+            default=DEFAULT_PROTEIN_SHARE,
+        )
+        preference_words, avoided = preference_terms(preferences)
+        candidates = self._candidates(layout, dietary_restrictions, allergies, avoided)
+
+        result: Dict[int, Dict] = {}
+        missing: List[int] = []
+        if any(candidates[slot] is None for slot in set(layout)):
+            missing = list(range(1, days + 1))
+        else:
+            arrays = {
+                slot: self._arrays(pool, protein_target, preference_words)
+                for slot, pool in candidates.items()
+            }
+            uses: Dict[str, int] = {}
+            for day in range(1, days + 1):
+                chosen = self._solve_day(
+                    layout, slot_targets, day_target, candidates, arrays, uses
+                )
+                if chosen is None:
+                    missing.append(day)
+                    continue
+                picks = [
+                    candidates[slot][i] for slot, i in zip(layout, chosen, strict=True)
+                ]
+                total = sum(r.calories for r in picks)
+                if (
+                    calorie_target
+                    and abs(total - day_target) > self.tolerance * day_target
+                ):
+                    missing.append(day)
+                    continue
+                if preference_words and not any(
+                    r.words & preference_words for r in picks
+                ):
+                    missing.append(day)
+                    continue
+                for slot, i in zip(layout, chosen, strict=True):
+                    recipe_id = candidates[slot][i].id
+                    uses[recipe_id] = uses.get(recipe_id, 0) + 1
+                result[day] = self._day_data(
+                    day,
+                    layout,
+                    [candidates[s][i].id for s, i in zip(layout, chosen, strict=True)],
+                )
+
+            # A recipe that vanished from the store makes its day unusable
+            for day in [d for d, data in result.items() if data is None]:
+                del result[day]
+                missing.append(day)
+
+        self.days_planned += len(result)
+        self.days_missing += len(missing)
+        if not missing:
+            self.complete_plans += 1
+        return LocalPlan(
+            result, sorted(missing), (time.perf_counter() - started) * 1000
+        )
+
+    def _candidates(
+        self,
+        layout: List[str],
+        dietary_restrictions: List[str],
+        allergies: List[str],
+        avoided: Iterable[str] = (),
+    ) -> Dict[str, Optional[List[_CatalogRecipe]]]:
+        required = set(dietary_restrictions)
+        excluded = allergen_words(allergies) | set(avoided)
+        eligible = [
+            r
+            for r in self._catalog.values()
+            if required <= r.dietary
+            and not (r.ingredient_words & excluded)
+            and not (r.words & excluded)
+        ]
+
+        candidates: Dict[str, Optional[List[_CatalogRecipe]]] = {}
+        for slot in set(layout):
+            pool = [
+                r
+                for r in eligible
+                if r.meal_type == slot
+                or (r.meal_type is None and slot in UNTYPED_SLOTS)
+            ]
+            candidates[slot] = pool or None
+        return candidates
+
+    def _arrays(
+        self,
+        pool: List[_CatalogRecipe],
+        protein_target: float,
+        preference_words: FrozenSet[str],
+    ) -> Dict[str, np.ndarray]:
+        calories = np.array([r.calories for r in pool])
+        protein_share = np.array([r.protein * 4 for r in pool]) / calories
+        preference = np.array(
+            [len(r.words & preference_words) for r in pool], dtype=float
+        )
+        return {
+            "calories": calories,
+            "static_cost": MACRO_WEIGHT * np.abs(protein_share - protein_target)
+            - PREFERENCE_WEIGHT * preference,
+            "ids": np.array([r.id for r in pool]),
+        }
+
+    def _solve_day(
+        self,
+        layout: List[str],
+        slot_targets: np.ndarray,
+        day_target: float,
+        candidates: Dict[str, List[_CatalogRecipe]],
+        arrays: Dict[str, Dict[str, np.ndarray]],
+        uses: Dict[str, int],
+    ) -> Optional[List[int]]:
+        """Pool index per slot, or None if the slots can't be filled without over-
+        used or repeated recipes"""
+        variety = {}
+        for slot, pool in candidates.items():
+            used = np.array([uses.get(r.id, 0) for r in pool], dtype=float)
+            variety[slot] = np.where(
+                used >= self.max_uses, np.inf, VARIETY_WEIGHT * used
+            )
+
+        # Start from the best candidate for each slot's own share of the target
+        chosen = []
+        for position, slot in enumerate(layout):
+            a = arrays[slot]
+            cost = (
+                np.abs(a["calories"] - slot_targets[position]) / day_target
+                + a["static_cost"]
+                + variety[slot]
+            )
+            chosen.append(int(np.argmin(cost)))
+
+        for _ in range(DESCENT_PASSES):
+            changed = False
+            for position, slot in enumerate(layout):
+                a = arrays[slot]
+                others = sum(
+                    arrays[s]["calories"][i]
+                    for p, (s, i) in enumerate(zip(layout, chosen, strict=True))
+                    if p != position
+                )
+                taken = {
+                    arrays[s]["ids"][i]
+                    for p, (s, i) in enumerate(zip(layout, chosen, strict=True))
+                    if p != position
+                }
+                repeat = (
+                    np.where(np.isin(a["ids"], list(taken)), np.inf, 0.0)
+                    if taken
+                    else 0.0
+                )
+                cost = (
+                    np.abs(a["calories"] - (day_target - others)) / day_target
+                    + a["static_cost"]
+                    + variety[slot]
+                    + repeat
+                )
+                best = int(np.argmin(cost))
+                if best != chosen[position]:
+                    chosen[position] = best
+                    changed = True
+            if not changed:
+                break
+
+        ids = [arrays[slot]["ids"][i] for slot, i in zip(layout, chosen, strict=True)]
+        if len(set(ids)) < len(ids) or any(
+            np.isinf(variety[slot][i]) for slot, i in zip(layout, chosen, strict=True)
+        ):
+            return None
+        return chosen
+
+    def _day_data(
+        self, day: int, layout: List[str], recipe_ids: List[str]
+    ) -> Optional[Dict]:
+        meals = []
+        for slot, recipe_id in zip(layout, recipe_ids, strict=True):
+            recipe = recipe_store.get(recipe_id)
+            if recipe is None:
+                self._catalog.pop(recipe_id, None)
+                return None
+            meals.append({"meal_type": slot, "recipe": recipe})
+        return {"day": day, "meals": meals}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "catalog_size": len(self._catalog),
+            "plans": self.plans,
+            "complete_plans": self.complete_plans,
+            "days_planned": self.days_planned,
+            "days_missing": self.days_missing,
+        }
+
+
+# Singleton instance, kept current as recipes are stored
+meal_planner = MealPlanner(
+    tolerance=settings.MEAL_PLANNER_TOLERANCE,
+    max_uses=settings.MEAL_PLANNER_MAX_RECIPE_USES,
+)
+if settings.MEAL_PLANNER_ENABLED:
+    recipe_store.subscribe(meal_planner.add)
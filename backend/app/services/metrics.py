@@ -0,0 +1,227 @@
+"""
+In-process request metrics (stage histograms, counters) rendered in Prometheus
+text format
+"""
+
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+
+# Histogram bucket upper bounds in seconds (cumulative, Prometheus style)
+STAGE_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+PREFIX = "nutrimind"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Fixed-bucket histogram per label set"""
+
+    def __init__(self, buckets: Tuple[float, ...] = STAGE_BUCKETS):
+        self.buckets = buckets
+        # labels -> bucket counts + [sum, count]
+        self._series: Dict[LabelKey, List[float]] = {}
+
+    def observe(self, labels: LabelKey, value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self, name: str) -> List[str]:
+        lines = []
+        for labels, series in sorted(self._series.items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series, strict=False):
+                cumulative += count
+                lines.append(
+                    f"{name}_bucket{_format_labels(labels, ('le', repr(bound)))} "
+                    f"{int(cumulative)}"
+                )
+            lines.append(
+                f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} "
+                f"{int(series[-1])}"
+            )
+            lines.append(f"{name}_sum{_format_labels(labels)} {series[-2]!r}")
+            lines.append(f"{name}_count{_format_labels(labels)} {int(series[-1])}")
+        return lines
+
+
+class _Stage:
+    __slots__ = ("metrics", "labels", "started")
+
+    def __init__(self, metrics: "Metrics", labels: LabelKey):
+        self.metrics = metrics
+        self.labels = labels
+
+    def __enter__(self) -> "_Stage":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.metrics.stages.observe(self.labels, time.perf_counter() - self.started)
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoStage":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+_NO_STAGE = _NoStage()
+
+
+class Metrics:
+    """
+    Stage latencies, upstream status codes and token usage recorded on the hot
+    path, plus component stats() pulled only when /api/metrics is scraped.
+
+    With `enabled` off every recording call returns immediately.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.stages = Histogram()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._help: Dict[str, str] = {}
+        self._collectors: List[Tuple[str, Callable[[], Dict[str, Any]], str]] = []
+
+    def stage(self, endpoint: str, stage: str):
+        """Context manager timing one stage of handling a request for `endpoint`"""
+        if not self.enabled:
+            return _NO_STAGE
+        return _Stage(self, (("endpoint", endpoint), ("stage", stage)))
+
+    def observe_stage(self, endpoint: str, stage: str, seconds: float) -> None:
+        if self.enabled:
+            self.stages.observe((("endpoint", endpoint), ("stage", stage)), seconds)
+
+    def inc(self, name: str, amount: float = 1.0, **labels: Any) -> None:
+        if not self.enabled:
+            return
+        series = self._counters.setdefault(name, {})
+        key = _labels(labels)
+        series[key] = series.get(key, 0.0) + amount
+
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+
+    def register_collector(
+        self, component: str, collect: Callable[[], Dict[str, Any]], label: str = "key"
+    ) -> None:
+        """
+        Export `collect()` as gauges named <prefix>_<component>_<key>. Nested dicts
+        become one series per inner key, labelled `label`; strings become a
+        series labelled `state` with value 1.
+        """
+        self._collectors.append((component, collect, label))
+
+    def render(self) -> str:
+        lines: List[str] = []
+
+        name = f"{PREFIX}_stage_seconds"
+        lines.append(f"# HELP {name} Time spent in each stage of handling a request")
+        lines.append(f"# TYPE {name} histogram")
+        lines.extend(self.stages.render(name))
+
+        for counter, series in sorted(self._counters.items()):
+            name = f"{PREFIX}_{counter}_total"
+            if counter in self._help:
+                lines.append(f"# HELP {name} {self._help[counter]}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in sorted(series.items()):
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for component, collect, label in self._collectors:
+            try:
+                stats = collect()
+            except Exception:
+                continue
+            for key, value in stats.items():
+                lines.extend(
+                    self._gauge_lines(f"{PREFIX}_{component}_{key}", value, label)
+                )
+
+        return "\n".join(lines) + "\n"
+
+    def _gauge_lines(self, name: str, value: Any, label: str) -> List[str]:
+        if isinstance(value, dict):
+            lines = [f"# TYPE {name} gauge"]
+            for inner, inner_value in sorted(value.items()):
+                if isinstance(inner_value, (int, float)) and not isinstance(
+                    inner_value, bool
+                ):
+                    lines.append(
+                        f"{name}{_format_labels(((label, str(inner)),))} "
+                        f"{_format_value(inner_value)}"
+                    )
+            return lines if len(lines) > 1 else []
+        if isinstance(value, str):
+            return [
+                f"# TYPE {name} gauge",
+                f"{name}{_format_labels((('state', value),))} 1",
+            ]
+        if isinstance(value, bool):
+            value = int(value)
+        if isinstance(value, (int, float)):
+            return [f"# TYPE {name} gauge", f"{name} {_format_value(value)}"]
+        return []
+
+
+# Singleton instance
+metrics = Metrics(enabled=settings.METRICS_ENABLED)
+metrics.describe(
+    "upstream_responses", "Upstream completion responses by endpoint and HTTP status"
+)
+metrics.describe(
+    "upstream_tokens", "Prompt and completion tokens reported by the provider"
+)
@@ -0,0 +1,234 @@
+"""
+Offline nutrition engine backed by the bundled per-100g ingredient table
+"""
+
+import logging
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.services.ingredient_parser import ParsedIngredient, parse_ingredient
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TABLE_PATH = Path(__file__).resolve().parent.parent / "data" / "nutrients.npz"
+
+NUTRIENTS = ("calories", "protein", "carbohydrates", "fat", "fiber", "sugar", "sodium")
+
+# Words that may come before a known ingredient without changing what it is
+# ("boneless skinless chicken breast", "extra virgin olive oil"). Any other
+# leading word could make it a different food ("coconut water", "rice flour").
+MODIFIER_WORDS = {
+    "red",
+    "green",
+    "yellow",
+    "white",
+    "black",
+    "purple",
+    "golden",
+    "fresh",
+    "frozen",
+    "dried",
+    "raw",
+    "cooked",
+    "uncooked",
+    "ripe",
+    "baby",
+    "young",
+    "whole",
+    "boneless",
+    "skinless",
+    "lean",
+    "extra",
+    "virgin",
+    "plain",
+    "organic",
+    "unsalted",
+    "salted",
+    "low-fat",
+    "lowfat",
+    "nonfat",
+    "fat-free",
+    "skim",
+    "firm",
+    "hot",
+    "cold",
+    "warm",
+    "boiling",
+}
+
+
+@dataclass
+class NutritionEstimate:
+    """Whole-recipe totals for the lines the engine could resolve"""
+
+    totals: Dict[str, float]
+    resolved: List[str] = field(default_factory=list)
+    unresolved: List[str] = field(default_factory=list)
+
+
+class NutritionEngine:
+    """
+    Computes recipe nutrition locally from the columnar per-100g table.
+
+    Each ingredient line is resolved to a table row and an amount in grams.
+    The totals are then one matrix product: grams (n,) @ nutrients (n, 7) / 100.
+    """
+
+    def __init__(self, path: Path = DEFAULT_TABLE_PATH):
+        self.path = path
+        self._loaded = False
+        self._resolve = lru_cache(maxsize=settings.INGREDIENT_PARSER_CACHE_SIZE)(
+            self._resolve_line
+        )
+
+    def load(self) -> None:
+        if self._loaded:
+            return
+
+        data = np.load(self.path, allow_pickle=False)
+        columns = [str(c) for c in data["columns"]]
+        order = [columns.index(n) for n in NUTRIENTS]
+
+        self.names = [str(n) for n in data["names"]]
+        self.nutrients = data["nutrients"][:, order].astype(np.float64)
+        self.density = data["density"].astype(np.float64)
+        self.unit_weight = data["unit_weight"].astype(np.float64)
+        self.aliases = {
+            str(a): int(r)
+            for a, r in zip(data["alias_names"], data["alias_rows"], strict=True)
+        }
+        self.max_alias_words = max(len(a.split()) for a in self.aliases)
+        self._loaded = True
+
+        logger.info(
+            f"Nutrition table loaded: {len(self.names)} ingredients from {self.path}"
+        )
+
+    def match(self, name: str) -> Optional[int]:
+        """
+        Find the table row for a canonical ingredient name: the whole name, or
+        its head phrase when only MODIFIER_WORDS come before it. Anything else
+        ("potato chips", "apple juice") is left unresolved rather than matched
+        on one of its words.
+        """
+        self.load()
+        words = name.split()
+        row = self._lookup(" ".join(words))
+        if row is not None:
+            return row
+
+        start = 0
+        while start < len(words) - 1 and words[start] in MODIFIER_WORDS:
+            start += 1
+        if start == 0 or len(words) - start > self.max_alias_words:
+            return None
+        return self._lookup(" ".join(words[start:]))
+
+    def _lookup(self, phrase: str) -> Optional[int]:
+        for candidate in (
+            phrase,
+            phrase + "s",
+            phrase[:-1] if phrase.endswith("s") else None,
+        ):
+            row = self.aliases.get(candidate) if candidate else None
+            if row is not None:
+                return row
+        return None
+
+    def grams(self, row: int, parsed: ParsedIngredient) -> Optional[float]:
+        """Amount of a resolved ingredient in grams, or None if it can't be
+        determined"""
+        if parsed.grams is not None:
+            return parsed.grams
+        if parsed.ml is not None:
+            return parsed.ml * self.density[row]
+        if self.unit_weight[row] > 0:
+            return (parsed.count or 1.0) * self.unit_weight[row]
+        return None
+
+    def resolve(self, line: str) -> Tuple[Optional[int], Optional[float]]:
+        """(table row, grams) for one ingredient line; either is None when unknown"""
+        return self._resolve(line)
+
+    def _resolve_line(self, line: str) -> Tuple[Optional[int], Optional[float]]:
+        parsed = parse_ingredient(line)
+        row = self.match(parsed.name)
+        grams = self.grams(row, parsed) if row is not None else None
+        if grams is None and parsed.negligible:
+            grams = 0.0
+        return row, grams
+
+    def estimate(self, ingredients: List[str]) -> NutritionEstimate:
+        self.load()
+        rows: List[int] = []
+        amounts: List[float] = []
+        estimate = NutritionEstimate(totals={})
+
+        for line in ingredients:
+            row, grams = self.resolve(line)
+            if row is None or grams is None:
+                estimate.unresolved.append(line)
+                continue
+
+            rows.append(row)
+            amounts.append(grams)
+            estimate.resolved.append(line)
+
+        if rows:
+            totals = np.asarray(amounts) @ self.nutrients[rows] / 100.0
+        else:
+            totals = np.zeros(len(NUTRIENTS))
+        estimate.totals = dict(zip(NUTRIENTS, totals.tolist(), strict=True))
+        return estimate
+
+
+def health_score(per_serving: Dict[str, float]) -> int:
+    """0-100 heuristic from fiber, protein share, sugar share, fat share and sodium"""
+    calories = max(per_serving["calories"], 1.0)
+    protein_share = per_serving["protein"] * 4 / calories
+    sugar_share = per_serving["sugar"] * 4 / calories
+    fat_share = per_serving["fat"] * 9 / calories
+
+    score = 60.0
+    score += min(per_serving["fiber"], 10.0) * 2
+    score += min(protein_share, 0.3) / 0.3 * 15
+    score -= max(sugar_share - 0.1, 0) * 100
+    score -= max(fat_share - 0.35, 0) * 60
+    score -= max(per_serving["sodium"] - 600, 0) / 50
+    return int(round(min(max(score, 0), 100)))
+
+
+def recommendations(per_serving: Dict[str, float]) -> List[str]:
+    """Rule-based suggestions matching the health score inputs"""
+    calories = max(per_serving["calories"], 1.0)
+    tips = []
+
+    if per_serving["fiber"] < 5:
+        tips.append("Add vegetables, legumes or whole grains to boost fiber.")
+    if per_serving["protein"] * 4 / calories < 0.15:
+        tips.append(
+            "Add a lean protein source such as beans, eggs, tofu, fish or chicken."
+        )
+    if per_serving["sugar"] * 4 / calories > 0.15:
+        tips.append("Reduce sweet ingredients to cut down on sugar.")
+    if per_serving["fat"] * 9 / calories > 0.4:
+        tips.append("Use less oil, butter or cheese to lower the fat content.")
+    if per_serving["sodium"] > 800:
+        tips.append(
+            "Use less salt and fewer salty sauces; this recipe is high in sodium."
+        )
+
+    return tips or ["Well balanced recipe; keep an eye on portion sizes."]
+
+
+# Singleton instance
+nutrition_engine = NutritionEngine(
+    Path(settings.NUTRITION_TABLE_PATH)
+    if settings.NUTRITION_TABLE_PATH
+    else DEFAULT_TABLE_PATH
+)
@@ -0,0 +1,133 @@
+"""
+Meal plan nutrition analytics, computed column-wise over all meals at once
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.services.nutrition_engine import NUTRIENTS
+
+# Calories per gram of each macronutrient
+MACRO_CALORIES = {"protein": 4.0, "carbohydrates": 4.0, "fat": 9.0}
+
+# A day within this share of the calorie target counts as on target
+CALORIE_TOLERANCE = 0.1
+
+_CALORIES = NUTRIENTS.index("calories")
+
+
+def _as_float(value: Any) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _rounded(row: np.ndarray) -> Dict[str, float]:
+    totals = {n: round(float(v), 1) for n, v in zip(NUTRIENTS, row, strict=True)}
+    totals["calories"] = int(round(totals["calories"]))
+    return totals
+
+
+def analyze_plan(
+    day_plans: List[Dict], calorie_target: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Per-day, whole-plan and per-meal-type nutrition for a formatted plan
+    (days of {"day", "meals": [{"meal_type", "recipe": {"nutrition"}}]}).
+
+    Every meal's nutrition is loaded into one (meals x nutrients) matrix and
+    all aggregates are reductions over it.
+    """
+    day_numbers = [day.get("day", index + 1) for index, day in enumerate(day_plans)]
+    meals = [
+        (index, meal)
+        for index, day in enumerate(day_plans)
+        for meal in day.get("meals", [])
+    ]
+
+    values = np.array(
+        [
+            [
+                _as_float((meal.get("recipe") or {}).get("nutrition", {}).get(n))
+                for n in NUTRIENTS
+            ]
+            for _, meal in meals
+        ],
+        dtype=float,
+    ).reshape(len(meals), len(NUTRIENTS))
+    day_index = np.array([index for index, _ in meals], dtype=int)
+    meal_types = sorted({meal.get("meal_type") or "meal" for _, meal in meals})
+    type_index = np.array(
+        [meal_types.index(meal.get("meal_type") or "meal") for _, meal in meals],
+        dtype=int,
+    )
+
+    per_day = np.zeros((len(day_plans), len(NUTRIENTS)))
+    np.add.at(per_day, day_index, values)
+    per_type = np.zeros((len(meal_types), len(NUTRIENTS)))
+    np.add.at(per_type, type_index, values)
+    type_counts = np.bincount(type_index, minlength=len(meal_types))
+
+    totals = values.sum(axis=0)
+    day_count = max(len(day_plans), 1)
+    calories = per_day[:, _CALORIES]
+
+    macro_calories = np.array(
+        [totals[NUTRIENTS.index(m)] * kcal for m, kcal in MACRO_CALORIES.items()]
+    )
+    macro_sum = macro_calories.sum()
+    macro_shares = (
+        macro_calories / macro_sum * 100
+        if macro_sum > 0
+        else np.zeros(len(MACRO_CALORIES))
+    )
+
+    deviation = calories - calorie_target if calorie_target and len(day_plans) else None
+    total_calories = totals[_CALORIES]
+    type_shares = (
+        per_type[:, _CALORIES] / total_calories * 100
+        if total_calories > 0
+        else np.zeros(len(meal_types))
+    )
+
+    return {
+        "days": [
+            {
+                "day": day,
+                "total_nutrition": _rounded(row),
+                "calorie_deviation": round(float(deviation[i]), 1)
+                if deviation is not None
+                else None,
+            }
+            for i, (day, row) in enumerate(zip(day_numbers, per_day, strict=True))
+        ],
+        "total_nutrition": _rounded(totals),
+        "average_per_day": _rounded(totals / day_count),
+        "macro_percentages": {
+            m: round(float(p), 1)
+            for m, p in zip(MACRO_CALORIES, macro_shares, strict=True)
+        },
+        "calorie_target": calorie_target,
+        "average_calorie_deviation": round(float(deviation.mean()), 1)
+        if deviation is not None
+        else None,
+        "max_calorie_deviation": round(float(np.abs(deviation).max()), 1)
+        if deviation is not None
+        else None,
+        "days_on_target": (
+            int((np.abs(deviation) <= CALORIE_TOLERANCE * calorie_target).sum())
+            if deviation is not None
+            else None
+        ),
+        "by_meal_type": [
+            {
+                "meal_type": meal_type,
+                "meals": int(type_counts[i]),
+                "total_nutrition": _rounded(per_type[i]),
+                "calorie_share": round(float(type_shares[i]), 1),
+            }
+            for i, meal_type in enumerate(meal_types)
+        ],
+    }
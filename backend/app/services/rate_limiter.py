@@ -0,0 +1,200 @@
+"""
+Admission control for upstream LLM calls (token bucket + in-flight limit +
+bounded queue)
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+from app.services.shared_state import SharedStore
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Raised when an upstream call cannot be admitted; carries the HTTP status to
+    return"""
+
+    def __init__(
+        self, message: str, status_code: int, retry_after: Optional[float] = None
+    ):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at `rate_per_minute`"""
+
+    def __init__(self, rate_per_minute: int, burst: int):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(burst, 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    def wait_time(self) -> float:
+        """Seconds until the next token is available"""
+        self._refill()
+        if self._tokens >= 1:
+            return 0.0
+        if self.rate <= 0:
+            return float("inf")
+        return (1 - self._tokens) / self.rate
+
+
+class SharedTokenBucket:
+    """
+    Token bucket kept in the shared store, so the rate limit holds across all
+    workers instead of per process. Falls back to a local bucket while the
+    store is unavailable.
+    """
+
+    def __init__(self, store: SharedStore, name: str, rate_per_minute: int, burst: int):
+        self.store = store
+        self.name = name
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(burst, 1)
+        self.fallback = TokenBucket(rate_per_minute, burst)
+        self._wait: Optional[float] = 0.0
+
+    def try_acquire(self) -> bool:
+        self._wait = self.store.take_token(self.name, self.rate, self.capacity)
+        if self._wait is None:
+            return self.fallback.try_acquire()
+        return self._wait == 0.0
+
+    def wait_time(self) -> float:
+        """Seconds until the next token is available, as of the last try_acquire()"""
+        if self._wait is None:
+            return self.fallback.wait_time()
+        return self._wait
+
+
+class AdmissionController:
+    """
+    Gate in front of every upstream call.
+
+    A request first takes a rate token, then an in-flight slot. While waiting it
+    counts against a bounded queue. It is rejected fast instead of hanging:
+    429 when the rate limit cannot be met within the queue timeout, and 503
+    when the queue is full or no slot frees up in time.
+
+    With a shared `store` the rate limit is global across workers; in-flight
+    slots and the queue stay per process.
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: int,
+        burst: int,
+        max_in_flight: int,
+        max_queue: int,
+        queue_timeout: float,
+        store: Optional[SharedStore] = None,
+    ):
+        if store is not None:
+            self.bucket = SharedTokenBucket(
+                store, "upstream_admission", rate_per_minute, burst
+            )
+        else:
+            self.bucket = TokenBucket(rate_per_minute, burst)
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(max_in_flight)
+
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.max_queue_depth_seen = 0
+        self.admitted = 0
+        self.rejected_rate_limited = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        if self.queue_depth >= self.max_queue:
+            self.rejected_queue_full += 1
+            raise AdmissionRejected(
+                "Upstream queue is full, try again shortly", 503, retry_after=1
+            )
+
+        self.queue_depth += 1
+        self.max_queue_depth_seen = max(self.max_queue_depth_seen, self.queue_depth)
+        started = time.monotonic()
+        try:
+            await self._take_token(started)
+            await self._take_slot(started)
+        finally:
+            self.queue_depth -= 1
+            waited = time.monotonic() - started
+            self.total_wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+        self.admitted += 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    async def _take_token(self, started: float) -> None:
+        while not self.bucket.try_acquire():
+            delay = self.bucket.wait_time()
+            remaining = self.queue_timeout - (time.monotonic() - started)
+            if delay > remaining:
+                self.rejected_rate_limited += 1
+                raise AdmissionRejected(
+                    "Rate limit exceeded, try again shortly",
+                    429,
+                    retry_after=round(delay, 1),
+                )
+            await asyncio.sleep(delay)
+
+    async def _take_slot(self, started: float) -> None:
+        remaining = max(self.queue_timeout - (time.monotonic() - started), 0)
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=remaining)
+        except asyncio.TimeoutError:
+            self.rejected_timeout += 1
+            raise AdmissionRejected(
+                "Upstream is busy, try again shortly", 503, retry_after=1
+            ) from None
+
+    def stats(self) -> Dict[str, Any]:
+        completed_waits = (
+            self.admitted + self.rejected_rate_limited + self.rejected_timeout
+        )
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth_seen": self.max_queue_depth_seen,
+            "admitted": self.admitted,
+            "rejected_rate_limited": self.rejected_rate_limited,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "avg_wait_seconds": self.total_wait_seconds / completed_waits
+            if completed_waits
+            else 0.0,
+            "max_wait_seconds": self.max_wait_seconds,
+        }
@@ -0,0 +1,147 @@
+"""
+Inverted ingredient index over stored recipes, for answering searches without the LLM
+"""
+
+import logging
+from collections import defaultdict
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from app.config import settings
+from app.services.ingredient_parser import name_tokens
+from app.services.recipe_store import recipe_store
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize_tag(tag: str) -> str:
+    return "_".join(str(tag).lower().replace("-", " ").split())
+
+
+class _IndexedRecipe:
+    __slots__ = ("ingredients", "meal_type", "cuisine", "total_time", "dietary")
+
+    def __init__(self, recipe: Dict, dietary: Set[str]):
+        self.ingredients: List[FrozenSet[str]] = [
+            tokens
+            for tokens in (name_tokens(line) for line in recipe.get("ingredients", []))
+            if tokens
+        ]
+        self.meal_type = (recipe.get("meal_type") or "").lower() or None
+        self.cuisine = (recipe.get("cuisine") or "").strip().lower() or None
+        self.total_time = recipe.get("total_time") or 0
+        self.dietary = dietary | {_normalize_tag(tag) for tag in recipe.get("tags", [])}
+
+
+class RecipeIndex:
+    """
+    Maps each ingredient word to the ids of stored recipes that use it.
+
+    A query ingredient matches a recipe line when the words of one contain
+    the words of the other ("egg" matches "3 large eggs", "feta" matches
+    "crumbled feta cheese", "salted butter" matches "butter"). Recipes are
+    ranked by the share of query ingredients they cover, then by the share
+    of their own ingredients that the query covers (fewer missing items first).
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        self._docs: Dict[str, _IndexedRecipe] = {}
+        self.searches = 0
+        self.local_hits = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, recipe: Dict, dietary_restrictions: Iterable[str] = ()) -> None:
+        recipe_id = recipe.get("id")
+        if not recipe_id:
+            return
+
+        existing = self._docs.get(recipe_id)
+        if existing is not None:
+            existing.dietary.update(dietary_restrictions)
+            return
+
+        doc = _IndexedRecipe(recipe, set(dietary_restrictions))
+        self._docs[recipe_id] = doc
+        for tokens in doc.ingredients:
+            for token in tokens:
+                self._postings[token].add(recipe_id)
+
+    def build(self, entries: Iterable[Tuple[Dict, List[str]]]) -> None:
+        for recipe, dietary in entries:
+            self.add(recipe, dietary)
+        logger.info(
+            f"Recipe index built: {len(self._docs)} recipes, "
+            f"{len(self._postings)} ingredient terms"
+        )
+
+    def search(
+        self,
+        ingredients: List[str],
+        meal_type: Optional[str] = None,
+        cuisine: Optional[str] = None,
+        dietary_restrictions: Iterable[str] = (),
+        cooking_time: Optional[int] = None,
+        min_coverage: float = 0.6,
+        limit: int = 5,
+    ) -> List[Tuple[str, float]]:
+        """Ids and coverage of the best matching stored recipes, best first"""
+        self.searches += 1
+        queries = [
+            tokens for tokens in (name_tokens(line) for line in ingredients) if tokens
+        ]
+        if not queries:
+            return []
+
+        matches: Dict[str, int] = defaultdict(int)
+        for tokens in queries:
+            candidates = set().union(*(self._postings.get(t, ()) for t in tokens))
+            for recipe_id in candidates:
+                if any(
+                    tokens <= line or line <= tokens
+                    for line in self._docs[recipe_id].ingredients
+                ):
+                    matches[recipe_id] += 1
+
+        required = set(dietary_restrictions)
+        meal_type = meal_type.lower() if meal_type else None
+        cuisine = cuisine.strip().lower() if cuisine else None
+
+        ranked = []
+        for recipe_id, matched in matches.items():
+            coverage = matched / len(queries)
+            if coverage < min_coverage:
+                continue
+
+            doc = self._docs[recipe_id]
+            if meal_type and doc.meal_type != meal_type:
+                continue
+            if cuisine and doc.cuisine != cuisine:
+                continue
+            if cooking_time and doc.total_time > cooking_time:
+                continue
+            if not required <= doc.dietary:
+                continue
+
+            recipe_side = min(matched / max(len(doc.ingredients), 1), 1.0)
+            ranked.append((coverage, recipe_side, recipe_id))
+
+        ranked.sort(reverse=True)
+        if ranked:
+            self.local_hits += 1
+        return [(recipe_id, coverage) for coverage, _, recipe_id in ranked[:limit]]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "recipes": len(self._docs),
+            "terms": len(self._postings),
+            "searches": self.searches,
+            "searches_with_local_hits": self.local_hits,
+        }
+
+
+# Singleton instance, kept current as recipes are stored
+recipe_index = RecipeIndex()
+if settings.RECIPE_INDEX_ENABLED:
+    recipe_store.subscribe(recipe_index.add)
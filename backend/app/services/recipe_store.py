@@ -0,0 +1,274 @@
+"""
+Persistent recipe store (SQLite WAL) with content-hash ids and an in-process read cache
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Fields that define a recipe's identity; everything else is presentation
+IDENTITY_FIELDS = ("name", "ingredients", "instructions")
+
+
+def recipe_id_for(recipe: Dict) -> str:
+    """Stable id from the recipe content, so the same recipe always gets the same id"""
+    identity = {}
+    for field in IDENTITY_FIELDS:
+        value = recipe.get(field)
+        if isinstance(value, str):
+            value = " ".join(value.lower().split())
+        elif isinstance(value, list):
+            value = [" ".join(str(v).lower().split()) for v in value]
+        identity[field] = value
+
+    canonical = json.dumps(identity, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:20]
+
+
+class RecipeStore:
+    """
+    Recipes the API has handed out, keyed by content hash.
+
+    `save()` never touches the disk: it fills the read cache and queues the
+    record for a background writer that inserts in batches. Lookups hit the
+    read cache first and fall back to a primary-key query.
+    """
+
+    def __init__(self, path: str, cache_size: int = 2048, batch_size: int = 64):
+        self.path = path
+        self.cache_size = cache_size
+        self.batch_size = batch_size
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._reader: Optional[sqlite3.Connection] = None
+        self._writer_conn: Optional[sqlite3.Connection] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        # Dietary restrictions already saved (or queued) for each cached recipe
+        self._dietary: Dict[str, Set[str]] = {}
+        self._listeners: List[Callable[[Dict, List[str]], None]] = []
+
+        self.cache_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.written = 0
+        self.write_errors = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def open(self) -> None:
+        if self._reader is not None or not self.path:
+            return
+        try:
+            self._writer_conn = self._connect()
+            self._writer_conn.execute(
+                "CREATE TABLE IF NOT EXISTS recipes ("
+                "id TEXT PRIMARY KEY, data TEXT NOT NULL, created_at REAL NOT NULL, "
+                "dietary TEXT NOT NULL DEFAULT '[]')"
+            )
+            columns = {
+                row[1]
+                for row in self._writer_conn.execute("PRAGMA table_info(recipes)")
+            }
+            if "dietary" not in columns:
+                self._writer_conn.execute(
+                    "ALTER TABLE recipes ADD COLUMN dietary TEXT NOT NULL DEFAULT '[]'"
+                )
+            self._reader = self._connect()
+            logger.info(f"Recipe store opened at {self.path}")
+        except sqlite3.Error as e:
+            logger.error(f"Could not open recipe store {self.path}: {str(e)}")
+            self._reader = self._writer_conn = None
+
+    async def start(self) -> None:
+        self.open()
+        self._ensure_writer()
+
+    async def close(self) -> None:
+        """Flush queued writes and close the database"""
+        if self._writer is not None:
+            await self._queue.join()
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+            self._writer = self._queue = None
+        for conn in (self._reader, self._writer_conn):
+            if conn is not None:
+                conn.close()
+        self._reader = self._writer_conn = None
+
+    def subscribe(self, listener: Callable[[Dict, List[str]], None]) -> None:
+        """Call `listener(recipe, dietary_restrictions)` for every saved recipe"""
+        self._listeners.append(listener)
+
+    def save(self, recipe: Dict, dietary_restrictions: Iterable[str] = ()) -> str:
+        """
+        Remember a formatted recipe (with its content-hash id) and queue it for disk.
+        `dietary_restrictions` are the restrictions it was generated for; saving
+        the same recipe again under other restrictions adds them to the stored set.
+        """
+        recipe_id = recipe["id"]
+        dietary = sorted(set(dietary_restrictions))
+        for listener in self._listeners:
+            listener(recipe, dietary)
+
+        known = self._dietary.get(recipe_id)
+        if recipe_id in self._cache and known is not None and known.issuperset(dietary):
+            self._cache.move_to_end(recipe_id)
+            return recipe_id
+
+        merged = (known or set()) | set(dietary)
+        self._remember(recipe_id, recipe)
+        self._dietary[recipe_id] = merged
+        if self._ensure_writer():
+            self._queue.put_nowait((recipe_id, recipe, sorted(merged)))
+        return recipe_id
+
+    def get(self, recipe_id: str) -> Optional[Dict]:
+        recipe = self._cache.get(recipe_id)
+        if recipe is not None:
+            self._cache.move_to_end(recipe_id)
+            self.cache_hits += 1
+            return recipe
+
+        self.open()
+        if self._reader is not None:
+            try:
+                row = self._reader.execute(
+                    "SELECT data FROM recipes WHERE id = ?", (recipe_id,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"Recipe store read failed: {str(e)}")
+                row = None
+            if row is not None:
+                recipe = json.loads(row[0])
+                self._remember(recipe_id, recipe)
+                self.disk_hits += 1
+                return recipe
+
+        self.misses += 1
+        return None
+
+    def iter_recipes(self) -> Iterator[Tuple[Dict, List[str]]]:
+        """Every stored (recipe, dietary_restrictions) pair, for rebuilding derived
+        indexes"""
+        self.open()
+        if self._reader is None:
+            return
+        try:
+            rows = self._reader.execute("SELECT data, dietary FROM recipes").fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Recipe store scan failed: {str(e)}")
+            return
+        for data, dietary in rows:
+            yield json.loads(data), json.loads(dietary)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cached": len(self._cache),
+            "cache_hits": self.cache_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "pending_writes": self._queue.qsize() if self._queue is not None else 0,
+            "written": self.written,
+            "write_errors": self.write_errors,
+        }
+
+    def _remember(self, recipe_id: str, recipe: Dict) -> None:
+        self._cache[recipe_id] = recipe
+        self._cache.move_to_end(recipe_id)
+        while len(self._cache) > self.cache_size:
+            evicted, _ = self._cache.popitem(last=False)
+            self._dietary.pop(evicted, None)
+
+    def _ensure_writer(self) -> bool:
+        """Start the background writer on first use; False if there's no event loop
+        or database"""
+        if self._writer is not None and not self._writer.done():
+            return True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+
+        self.open()
+        if self._writer_conn is None:
+            return False
+        if self._queue is None or self._writer is not None:
+            self._queue = asyncio.Queue()
+        self._writer = loop.create_task(self._write_loop())
+        return True
+
+    async def _write_loop(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                await asyncio.to_thread(self._write_batch, batch)
+                self.written += len(batch)
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                self.write_errors += len(batch)
+                logger.warning(
+                    f"Recipe store write of {len(batch)} recipes failed: {str(e)}"
+                )
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, batch: List) -> None:
+        """Insert new recipes; for stored ones, widen the dietary set to include the
+        new restrictions"""
+        now = time.time()
+        pending: Dict[str, Tuple[Dict, Set[str]]] = {}
+        for recipe_id, recipe, dietary in batch:
+            _, seen = pending.get(recipe_id, (None, set()))
+            pending[recipe_id] = (recipe, seen | set(dietary))
+
+        with self._writer_conn:
+            self._writer_conn.execute("BEGIN")
+            placeholders = ",".join("?" * len(pending))
+            stored = dict(
+                self._writer_conn.execute(
+                    f"SELECT id, dietary FROM recipes WHERE id IN ({placeholders})",
+                    list(pending),
+                ).fetchall()
+            )
+            rows = [
+                (
+                    recipe_id,
+                    json.dumps(recipe),
+                    now,
+                    json.dumps(
+                        sorted(dietary | set(json.loads(stored.get(recipe_id, "[]"))))
+                    ),
+                )
+                for recipe_id, (recipe, dietary) in pending.items()
+            ]
+            self._writer_conn.executemany(
+                "INSERT INTO recipes (id, data, created_at, dietary) "
+                "VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET dietary = excluded.dietary",
+                rows,
+            )
+
+
+# Singleton instance
+recipe_store = RecipeStore(
+    path=settings.RECIPE_STORE_PATH, cache_size=settings.RECIPE_STORE_CACHE_SIZE
+)
@@ -0,0 +1,261 @@
+"""
+Retries with jittered backoff, hedged requests and a circuit breaker for upstream calls
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+
+from app.services.rate_limiter import AdmissionRejected
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class UpstreamError(Exception):
+    """Non-2xx response from the upstream provider"""
+
+    def __init__(
+        self, status_code: int, message: str = "", retry_after: Optional[float] = None
+    ):
+        super().__init__(message or f"Upstream returned HTTP {status_code}")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(AdmissionRejected):
+    """Raised without calling upstream while the circuit breaker is open"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(
+            "Upstream is unavailable, try again shortly", 503, retry_after=retry_after
+        )
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, UpstreamError):
+        return exc.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(exc, (httpx.TimeoutException, httpx.TransportError))
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+
+
+class LatencyTracker:
+    """Sliding window of recent successful call latencies"""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and fails fast for
+    `reset_timeout` seconds. After that a single trial call is let through
+    (half-open). Its result closes the circuit again or re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._trial_in_flight = False
+
+    def check(self) -> None:
+        if self.state == self.CLOSED:
+            return
+
+        elapsed = time.monotonic() - self.opened_at
+        if self.state == self.OPEN and elapsed >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+
+        if self.state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return
+
+        raise CircuitOpenError(retry_after=max(self.reset_timeout - elapsed, 1))
+
+    def release_trial(self) -> None:
+        """Let another trial through if the half-open trial never reached the
+        upstream"""
+        self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self._trial_in_flight = False
+        if self.state != self.CLOSED:
+            logger.info("Upstream circuit breaker closed")
+        self.state = self.CLOSED
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._trial_in_flight = False
+        if (
+            self.state == self.HALF_OPEN
+            or self.consecutive_failures >= self.failure_threshold
+        ):
+            if self.state != self.OPEN:
+                self.times_opened += 1
+                logger.warning(
+                    "Upstream circuit breaker opened after "
+                    f"{self.consecutive_failures} failures"
+                )
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class ResilientCaller:
+    """Runs one upstream attempt function with circuit breaking, retries and optional
+    hedging"""
+
+    def __init__(
+        self,
+        breaker: CircuitBreaker,
+        max_retries: int,
+        retry_base_delay: float,
+        retry_max_delay: float,
+        hedging_enabled: bool = False,
+        hedge_min_samples: int = 20,
+        hedge_percentile: float = 0.95,
+    ):
+        self.breaker = breaker
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.hedging_enabled = hedging_enabled
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_percentile = hedge_percentile
+        self.latency = LatencyTracker()
+
+        self.attempts = 0
+        self.retries = 0
+        self.hedges_fired = 0
+        self.hedges_won = 0
+        self.failures = 0
+
+    async def call(self, attempt_fn: Callable[[], Awaitable[Any]]) -> Any:
+        attempt = 0
+        while True:
+            self.breaker.check()
+            try:
+                result = await self._hedged(attempt_fn)
+            except AdmissionRejected:
+                self.breaker.release_trial()
+                raise
+            except asyncio.CancelledError:
+                self.breaker.release_trial()
+                raise
+            except Exception as e:
+                retryable = is_retryable(e)
+                if retryable:
+                    self.breaker.record_failure()
+                else:
+                    # The upstream answered; it's our request that's bad
+                    self.breaker.record_success()
+                self.failures += 1
+
+                if not retryable or attempt >= self.max_retries:
+                    raise
+
+                attempt += 1
+                self.retries += 1
+                delay = backoff_delay(
+                    attempt, self.retry_base_delay, self.retry_max_delay
+                )
+                if isinstance(e, UpstreamError) and e.retry_after:
+                    delay = min(max(delay, e.retry_after), self.retry_max_delay)
+                logger.warning(
+                    f"Retrying upstream call (attempt {attempt + 1}) "
+                    f"in {delay:.2f}s: {str(e)}"
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            self.breaker.record_success()
+            return result
+
+    def hedge_delay(self) -> Optional[float]:
+        if not self.hedging_enabled or len(self.latency) < self.hedge_min_samples:
+            return None
+        return self.latency.percentile(self.hedge_percentile)
+
+    async def _timed(self, attempt_fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.attempts += 1
+        started = time.monotonic()
+        result = await attempt_fn()
+        self.latency.record(time.monotonic() - started)
+        return result
+
+    async def _hedged(self, attempt_fn: Callable[[], Awaitable[Any]]) -> Any:
+        delay = self.hedge_delay()
+        if delay is None:
+            return await self._timed(attempt_fn)
+
+        primary = asyncio.ensure_future(self._timed(attempt_fn))
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return primary.result()
+
+            # Primary is slower than the observed p95: race a second copy against it
+            self.hedges_fired += 1
+            hedge = asyncio.ensure_future(self._timed(attempt_fn))
+            tasks.add(hedge)
+
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedges_won += 1
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "circuit_state": self.breaker.state,
+            "circuit_opened": self.breaker.times_opened,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "failures": self.failures,
+            "hedges_fired": self.hedges_fired,
+            "hedges_won": self.hedges_won,
+            "latency_p95_seconds": self.latency.percentile(0.95),
+        }
@@ -0,0 +1,350 @@
+"""
+State shared by all worker processes (SQLite file or Redis), with atomic token buckets
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Expired SQLite rows are purged once per this many writes
+PURGE_EVERY_WRITES = 1000
+
+# Keys are namespaced so several apps (or test runs) can share one Redis
+REDIS_KEY_PREFIX = "nutrimind:"
+
+# Refill state of a token bucket in Redis: KEYS[1] = bucket, ARGV = rate per second,
+# capacity.
+# Uses the server clock so every worker (and host) sees the same time. Returns seconds
+# to
+# wait for a token; "0" means one was taken, "-1" means the bucket never refills.
+_REDIS_TAKE_TOKEN = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(now - updated, 0) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+elseif rate <= 0 then
+    wait = -1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+if rate > 0 then
+    redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+end
+return tostring(wait)
+"""
+
+
+def refill(
+    tokens: float, updated: float, now: float, rate: float, capacity: float
+) -> Tuple[float, float]:
+    """Take one token from a bucket last seen with `tokens` at `updated`: (tokens
+    left, seconds to wait)"""
+    tokens = min(capacity, tokens + max(now - updated, 0.0) * rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    if rate <= 0:
+        return tokens, float("inf")
+    return tokens, (1 - tokens) / rate
+
+
+class SharedStore(ABC):
+    """
+    Key/value store with TTLs and atomic token buckets, visible to every worker.
+
+    Values are strings (callers serialize). Backend failures are logged and
+    counted, never raised: reads miss, writes are dropped and take_token()
+    returns None, so callers fall back to per-process state. Operations run
+    on the event loop's thread, so after a failure the store is skipped for
+    `cooldown` seconds rather than making every request wait out a timeout.
+    """
+
+    backend = "none"
+    errors: Tuple[Type[BaseException], ...] = ()
+
+    def __init__(self, cooldown: float = 5.0):
+        self.cooldown = cooldown
+        self.ops: Counter = Counter()
+        self.failures = 0
+        self.skipped = 0
+        self.op_seconds = 0.0
+        self._unavailable_until = 0.0
+
+    def get(self, key: str) -> Optional[str]:
+        return self._call("get", self._get, key)
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        self._call("set", self._set, key, value, ttl)
+
+    def delete(self, key: str) -> None:
+        self._call("delete", self._delete, key)
+
+    def clear(self, prefix: str) -> None:
+        """Remove every key starting with `prefix`"""
+        self._call("clear", self._clear, prefix)
+
+    def take_token(self, bucket: str, rate: float, capacity: float) -> Optional[float]:
+        """
+        Atomically take one token from `bucket` (refilled at `rate` per second up to
+        `capacity`). Returns 0.0 if a token was taken, otherwise the seconds until
+        one is available; None if the store is unavailable.
+        """
+        return self._call("take_token", self._take_token, bucket, rate, capacity)
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self._unavailable_until
+
+    def _call(self, op: str, fn: Callable[..., Any], *args: Any) -> Any:
+        if not self.available:
+            self.skipped += 1
+            return None
+
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        except self.errors as e:
+            self.failures += 1
+            self._unavailable_until = time.monotonic() + self.cooldown
+            logger.warning(
+                f"Shared state {op} failed ({self.backend}), using per-process "
+                f"state for {self.cooldown:.0f}s: {str(e)}"
+            )
+            return None
+        finally:
+            self.ops[op] += 1
+            self.op_seconds += time.perf_counter() - started
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def _set(self, key: str, value: str, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    def _delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def _clear(self, prefix: str) -> None:
+        ...
+
+    @abstractmethod
+    def _take_token(self, bucket: str, rate: float, capacity: float) -> float:
+        ...
+
+    @abstractmethod
+    def close(self) -> None:
+        ...
+
+    def stats(self) -> Dict[str, Any]:
+        total = sum(self.ops.values())
+        return {
+            "backend": self.backend,
+            "ops": dict(self.ops),
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "available": self.available,
+            "avg_op_microseconds": round(self.op_seconds / total * 1e6, 1)
+            if total
+            else 0.0,
+        }
+
+
+class SQLiteStore(SharedStore):
+    """
+    Shared state in one SQLite file (WAL mode), for workers on the same host.
+
+    Reads are plain indexed lookups; token buckets update inside a
+    BEGIN IMMEDIATE transaction, which serializes writers across processes.
+    """
+
+    backend = "sqlite"
+    errors = (sqlite3.Error,)
+
+    def __init__(self, path: str, busy_timeout: float = 0.25, cooldown: float = 5.0):
+        super().__init__(cooldown)
+        self.path = path
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(
+            path, timeout=busy_timeout, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS shared_kv ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS shared_buckets ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        self._conn.execute("DELETE FROM shared_kv WHERE expires_at < ?", (time.time(),))
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM shared_kv WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return row[0]
+
+    def _set(self, key: str, value: str, ttl: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO shared_kv (key, value, expires_at) "
+                "VALUES (?, ?, ?)",
+                (key, value, now + ttl),
+            )
+            self._writes += 1
+            if self._writes % PURGE_EVERY_WRITES == 0:
+                self._conn.execute("DELETE FROM shared_kv WHERE expires_at < ?", (now,))
+
+    def _delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM shared_kv WHERE key = ?", (key,))
+
+    def _clear(self, prefix: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM shared_kv WHERE substr(key, 1, ?) = ?",
+                (len(prefix), prefix),
+            )
+
+    def _take_token(self, bucket: str, rate: float, capacity: float) -> float:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self._conn.execute(
+                    "SELECT tokens, updated FROM shared_buckets WHERE key = ?",
+                    (bucket,),
+                ).fetchone()
+                tokens, wait = (
+                    refill(row[0], row[1], now, rate, capacity)
+                    if row
+                    else (capacity - 1.0, 0.0)
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO shared_buckets (key, tokens, updated) "
+                    "VALUES (?, ?, ?)",
+                    (bucket, tokens, now),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return wait
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RedisStore(SharedStore):
+    """Shared state in Redis (any Redis-protocol server), for workers on several
+    hosts"""
+
+    backend = "redis"
+
+    def __init__(self, url: str, timeout: float = 0.25, cooldown: float = 5.0):
+        import redis
+
+        super().__init__(cooldown)
+        self.errors = (redis.RedisError,)
+        self._client = redis.Redis.from_url(
+            url, socket_timeout=timeout, socket_connect_timeout=timeout
+        )
+        self._take = self._client.register_script(_REDIS_TAKE_TOKEN)
+
+    def _get(self, key: str) -> Optional[str]:
+        value = self._client.get(REDIS_KEY_PREFIX + key)
+        return value.decode() if value is not None else None
+
+    def _set(self, key: str, value: str, ttl: float) -> None:
+        self._client.set(REDIS_KEY_PREFIX + key, value, px=max(int(ttl * 1000), 1))
+
+    def _delete(self, key: str) -> None:
+        self._client.delete(REDIS_KEY_PREFIX + key)
+
+    def _clear(self, prefix: str) -> None:
+        keys = list(
+            self._client.scan_iter(match=f"{REDIS_KEY_PREFIX}{prefix}*", count=500)
+        )
+        for start in range(0, len(keys), 500):
+            self._client.delete(*keys[start : start + 500])
+
+    def _take_token(self, bucket: str, rate: float, capacity: float) -> float:
+        wait = float(
+            self._take(
+                keys=[f"{REDIS_KEY_PREFIX}bucket:{bucket}"], args=[rate, capacity]
+            )
+        )
+        return float("inf") if wait < 0 else wait
+
+    def close(self) -> None:
+        self._client.close()
+
+
+def open_store(
+    url: str, timeout: float = 0.25, cooldown: float = 5.0
+) -> Optional[SharedStore]:
+    """
+    Store for a SHARED_STATE_URL: sqlite:///relative.db, sqlite:////absolute.db
+    or redis://host:port/db. Empty, or a store that can't be opened, keeps
+    state per process.
+    """
+    if not url:
+        return None
+    try:
+        if url.startswith("sqlite:///"):
+            store: SharedStore = SQLiteStore(
+                url[len("sqlite:///") :], busy_timeout=timeout, cooldown=cooldown
+            )
+        elif url.startswith(("redis://", "rediss://", "unix://")):
+            store = RedisStore(url, timeout=timeout, cooldown=cooldown)
+        else:
+            logger.error(f"Unsupported SHARED_STATE_URL scheme: {url}")
+            return None
+    except ImportError:
+        logger.error(
+            "SHARED_STATE_URL is a Redis URL but the redis package is not installed"
+        )
+        return None
+    except Exception as e:
+        # Don't log credentials from the URL
+        logger.error(
+            f"Could not open shared state at {url.rsplit('@', 1)[-1]}: {str(e)}"
+        )
+        return None
+
+    logger.info(f"Shared state enabled ({store.backend})")
+    return store
+
+
+# Singleton instance (None: state is per process)
+shared_store = open_store(
+    settings.SHARED_STATE_URL,
+    timeout=settings.SHARED_STATE_TIMEOUT,
+    cooldown=settings.SHARED_STATE_COOLDOWN,
+)
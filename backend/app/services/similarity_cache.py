@@ -0,0 +1,191 @@
+"""
+Similarity cache: serves prior results for near-duplicate requests (MinHash + LSH)
+"""
+
+import time
+import zlib
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.services.cache import make_cache_key
+from app.services.resilience import LatencyTracker
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+class MinHasher:
+    """Fixed family of `num_perm` universal hash functions over 32-bit token hashes"""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self._a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, tokens: Iterable[str]) -> np.ndarray:
+        hashes = np.fromiter(
+            (zlib.crc32(t.encode("utf-8")) for t in tokens), dtype=np.uint64
+        )
+        if hashes.size == 0:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        # (num_perm, n) permuted hashes; the minimum per row is the signature
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _MERSENNE_PRIME
+        return (permuted & _MAX_HASH).min(axis=1)
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class _Entry:
+    __slots__ = ("scope", "features", "bands", "value", "expires_at")
+
+    def __init__(
+        self,
+        scope: str,
+        features: FrozenSet[str],
+        bands: List[Tuple],
+        value: Any,
+        expires_at: float,
+    ):
+        self.scope = scope
+        self.features = features
+        self.bands = bands
+        self.value = value
+        self.expires_at = expires_at
+
+
+class SimilarityCache:
+    """
+    Results keyed by exact hard constraints plus a fuzzy feature set.
+
+    `constraints` (restrictions, allergies, meal type...) must match exactly.
+    `features` (normalized ingredient words, preference words...) only need
+    a Jaccard similarity of at least `threshold` with a stored entry. LSH
+    banding over MinHash signatures narrows the candidates, and the true
+    Jaccard is then checked against each candidate's stored feature set.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.7,
+        num_perm: int = 64,
+        bands: int = 16,
+        max_entries: int = 1024,
+        ttl: int = 3600,
+    ):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hasher = MinHasher(num_perm=self.rows * bands)
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._buckets: Dict[Tuple, Set[str]] = defaultdict(set)
+        self.latency = LatencyTracker()
+
+        self.lookups = 0
+        self.hits = 0
+        self.exact_hits = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def _bands(self, scope: str, features: FrozenSet[str]) -> List[Tuple]:
+        signature = self.hasher.signature(sorted(features))
+        return [
+            (
+                scope,
+                band,
+                signature[band * self.rows : (band + 1) * self.rows].tobytes(),
+            )
+            for band in range(self.bands)
+        ]
+
+    def lookup(
+        self, constraints: Dict[str, Any], features: Iterable[str]
+    ) -> Optional[Any]:
+        started = time.perf_counter()
+        self.lookups += 1
+        try:
+            return self._lookup(
+                make_cache_key("similar", **constraints), frozenset(features)
+            )
+        finally:
+            self.latency.record(time.perf_counter() - started)
+
+    def _lookup(self, scope: str, features: FrozenSet[str]) -> Optional[Any]:
+        now = time.time()
+        candidates: Set[str] = set()
+        for band in self._bands(scope, features):
+            candidates.update(self._buckets.get(band, ()))
+
+        best_key, best_score = None, 0.0
+        for key in candidates:
+            entry = self._entries[key]
+            if entry.expires_at <= now:
+                self._remove(key)
+                continue
+            score = jaccard(features, entry.features)
+            if score > best_score:
+                best_key, best_score = key, score
+
+        if best_key is None or best_score < self.threshold:
+            return None
+
+        self.hits += 1
+        if best_score == 1.0:
+            self.exact_hits += 1
+        self._entries.move_to_end(best_key)
+        return self._entries[best_key].value
+
+    def store(
+        self, constraints: Dict[str, Any], features: Iterable[str], value: Any
+    ) -> None:
+        scope = make_cache_key("similar", **constraints)
+        features = frozenset(features)
+        key = make_cache_key("similar_entry", scope=scope, features=sorted(features))
+        if key in self._entries:
+            self._remove(key)
+
+        bands = self._bands(scope, features)
+        self._entries[key] = _Entry(
+            scope, features, bands, value, time.time() + self.ttl
+        )
+        for band in bands:
+            self._buckets[band].add(key)
+        self.stores += 1
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for band in entry.bands:
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band]
+
+    def stats(self) -> Dict[str, Any]:
+        p50 = self.latency.percentile(0.5)
+        p95 = self.latency.percentile(0.95)
+        return {
+            "size": len(self._entries),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "near_duplicate_hits": self.hits - self.exact_hits,
+            "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "lookup_p50_ms": p50 * 1000 if p50 is not None else None,
+            "lookup_p95_ms": p95 * 1000 if p95 is not None else None,
+        }
@@ -0,0 +1,97 @@
+"""
+Adaptive max_tokens budgeting for upstream completions
+"""
+
+import math
+from typing import Any, Dict, Optional
+
+# Rough completion size of one "unit" of output before anything has been observed:
+# a meal (recipe + nutrition) in a plan, a recipe in a search, one nutrition
+# analysis, one chat reply
+DEFAULT_TOKENS_PER_UNIT = {
+    "meal_plan": 450.0,
+    "recipes": 550.0,
+    "nutrition": 350.0,
+    "chat": 700.0,
+}
+
+# Fixed JSON/wrapper overhead per completion
+BASE_OVERHEAD_TOKENS = 64
+
+# How much to grow the per-unit estimate after a truncated completion
+TRUNCATION_GROWTH = 1.5
+
+
+class TokenBudget:
+    """
+    Sizes the completion limit from the request shape.
+
+    Keeps an exponentially weighted average of observed completion tokens per
+    unit for each endpoint, adds headroom and clamps to per-endpoint ceilings.
+    """
+
+    def __init__(
+        self,
+        ceilings: Dict[str, int],
+        default_ceiling: int,
+        headroom: float = 1.5,
+        floor: int = 256,
+        alpha: float = 0.2,
+    ):
+        self.ceilings = ceilings
+        self.default_ceiling = default_ceiling
+        self.headroom = headroom
+        self.floor = floor
+        self.alpha = alpha
+        self._per_unit: Dict[str, float] = dict(DEFAULT_TOKENS_PER_UNIT)
+        self._requests: Dict[str, int] = {}
+        self._truncated: Dict[str, int] = {}
+
+    def ceiling(self, endpoint: str) -> int:
+        return min(
+            self.ceilings.get(endpoint, self.default_ceiling), self.default_ceiling
+        )
+
+    def estimate(self, endpoint: str, units: float = 1.0) -> int:
+        per_unit = self._per_unit.get(endpoint, DEFAULT_TOKENS_PER_UNIT["chat"])
+        budget = math.ceil(units * per_unit * self.headroom) + BASE_OVERHEAD_TOKENS
+        return max(self.floor, min(budget, self.ceiling(endpoint)))
+
+    def observe(
+        self,
+        endpoint: str,
+        units: float,
+        completion_tokens: Optional[int],
+        truncated: bool,
+    ) -> None:
+        """Fold an observed completion size (and whether it hit the limit) into the
+        estimate"""
+        self._requests[endpoint] = self._requests.get(endpoint, 0) + 1
+        current = self._per_unit.get(endpoint, DEFAULT_TOKENS_PER_UNIT["chat"])
+
+        if truncated:
+            self._truncated[endpoint] = self._truncated.get(endpoint, 0) + 1
+            self._per_unit[endpoint] = current * TRUNCATION_GROWTH
+            return
+
+        if not completion_tokens or units <= 0:
+            return
+
+        observed = max(completion_tokens - BASE_OVERHEAD_TOKENS, 1) / units
+        self._per_unit[endpoint] = (1 - self.alpha) * current + self.alpha * observed
+
+    def truncation_rate(self, endpoint: str) -> float:
+        requests = self._requests.get(endpoint, 0)
+        return self._truncated.get(endpoint, 0) / requests if requests else 0.0
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            endpoint: {
+                "tokens_per_unit": round(self._per_unit[endpoint], 1),
+                "ceiling": self.ceiling(endpoint),
+                "requests": self._requests.get(endpoint, 0),
+                "truncated": self._truncated.get(endpoint, 0),
+                "truncation_rate": self.truncation_rate(endpoint),
+            }
+            for endpoint in self._per_unit
+        }
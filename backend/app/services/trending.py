@@ -0,0 +1,218 @@
+"""
+Trending ingredients and recipes from live traffic (time-decayed Space-Saving top-k)
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from app.config import settings
+from app.services.ingredient_parser import parse_ingredient
+
+logger = logging.getLogger(__name__)
+
+# Window name -> half-life in seconds
+WINDOWS = {"hourly": 3600.0, "daily": 86400.0}
+
+# Rescale forward-decay weights before they lose float precision
+_MAX_LOG2_WEIGHT = 60.0
+
+
+class DecayedSpaceSaving:
+    """
+    Space-Saving heavy hitters over exponentially decayed counts.
+
+    Holds at most `capacity` counters. A new item arriving when all are
+    taken replaces the smallest one and inherits its count as error, so any
+    item with a true decayed count above total/capacity is guaranteed to be
+    tracked. Decay uses forward weights (2^((t - landmark) / half_life)), so an
+    update never has to touch the other counters.
+    """
+
+    def __init__(
+        self, capacity: int, half_life: float, clock: Callable[[], float] = time.time
+    ):
+        self.capacity = capacity
+        self.half_life = half_life
+        self.clock = clock
+        self.landmark = clock()
+        # item -> [weighted count, error]
+        self._counts: Dict[Hashable, List[float]] = {}
+
+    def _weight(self, now: float) -> float:
+        exponent = (now - self.landmark) / self.half_life
+        if exponent > _MAX_LOG2_WEIGHT:
+            self._rescale(now)
+            exponent = 0.0
+        return 2.0**exponent
+
+    def _rescale(self, now: float) -> None:
+        factor = 2.0 ** (-(now - self.landmark) / self.half_life)
+        for counter in self._counts.values():
+            counter[0] *= factor
+            counter[1] *= factor
+        self.landmark = now
+
+    def add(self, item: Hashable, amount: float = 1.0) -> None:
+        weight = amount * self._weight(self.clock())
+
+        counter = self._counts.get(item)
+        if counter is not None:
+            counter[0] += weight
+            return
+
+        if len(self._counts) < self.capacity:
+            self._counts[item] = [weight, 0.0]
+            return
+
+        victim = min(self._counts, key=lambda k: self._counts[k][0])
+        floor = self._counts.pop(victim)[0]
+        self._counts[item] = [floor + weight, floor]
+
+    def top(self, k: int) -> List[Tuple[Hashable, float]]:
+        """The k heaviest items with their decayed counts as of now"""
+        scale = 2.0 ** (-(self.clock() - self.landmark) / self.half_life)
+        ranked = sorted(self._counts.items(), key=lambda kv: kv[1][0], reverse=True)[:k]
+        return [(item, counter[0] * scale) for item, counter in ranked]
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __iter__(self):
+        return iter(self._counts)
+
+
+class TrendingTracker:
+    """
+    Counts searched ingredients and served/picked recipes per window.
+
+    Requests read a snapshot that a background task rebuilds every
+    `refresh_interval` seconds, so serving trending data is a dict lookup.
+    """
+
+    # A recipe picked for a meal plan says more than one shown in search results
+    MEAL_PLAN_PICK_WEIGHT = 2.0
+
+    def __init__(self, capacity: int, top_k: int, refresh_interval: float):
+        self.top_k = top_k
+        self.refresh_interval = refresh_interval
+        self._ingredients = {
+            w: DecayedSpaceSaving(capacity, h) for w, h in WINDOWS.items()
+        }
+        self._recipes = {w: DecayedSpaceSaving(capacity, h) for w, h in WINDOWS.items()}
+        self._recipe_names: Dict[str, str] = {}
+        self._snapshot: Dict[str, Dict[str, Any]] = {}
+        self._refreshed_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self.events = 0
+
+    def record_search(self, ingredients: List[str]) -> None:
+        names = {parse_ingredient(line).name for line in ingredients}
+        for name in names:
+            if name:
+                for sketch in self._ingredients.values():
+                    sketch.add(name)
+        self.events += 1
+
+    def record_recipe(self, recipe: Dict, weight: float = 1.0) -> None:
+        recipe_id = recipe.get("id")
+        if not recipe_id:
+            return
+        if (
+            recipe_id not in self._recipe_names
+            and len(self._recipe_names) >= 4 * self._capacity()
+        ):
+            self._prune_names()
+        self._recipe_names[recipe_id] = recipe.get("name", "")
+        for sketch in self._recipes.values():
+            sketch.add(recipe_id, weight)
+        self.events += 1
+
+    def record_meal_plan(self, day_plans: List[Dict]) -> None:
+        for day in day_plans:
+            for meal in day.get("meals", []):
+                self.record_recipe(meal["recipe"], self.MEAL_PLAN_PICK_WEIGHT)
+
+    def snapshot(self, window: str) -> Dict[str, Any]:
+        stale = time.time() - self._refreshed_at >= self.refresh_interval
+        if stale and (self._task is None or self._task.done()):
+            # No background refresher running (e.g. outside the app lifespan)
+            self.refresh()
+        return self._snapshot[window]
+
+    def refresh(self) -> None:
+        generated_at = datetime.now()
+        snapshot = {}
+        for window in WINDOWS:
+            snapshot[window] = {
+                "window": window,
+                "ingredients": [
+                    {"name": name, "score": round(score, 3)}
+                    for name, score in self._ingredients[window].top(self.top_k)
+                ],
+                "recipes": [
+                    {
+                        "id": recipe_id,
+                        "name": self._recipe_names.get(recipe_id, ""),
+                        "score": round(score, 3),
+                    }
+                    for recipe_id, score in self._recipes[window].top(self.top_k)
+                ],
+                "generated_at": generated_at,
+            }
+        self._snapshot = snapshot
+        self._refreshed_at = time.time()
+
+    async def start(self) -> None:
+        self.refresh()
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Trending snapshot refresh failed: {str(e)}")
+
+    def _capacity(self) -> int:
+        return self._recipes["hourly"].capacity
+
+    def _prune_names(self) -> None:
+        """Drop names of recipes no sketch tracks any more, keeping memory bounded"""
+        tracked = set()
+        for sketch in self._recipes.values():
+            tracked.update(sketch)
+        self._recipe_names = {
+            k: v for k, v in self._recipe_names.items() if k in tracked
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "events": self.events,
+            "tracked_ingredients": {w: len(s) for w, s in self._ingredients.items()},
+            "tracked_recipes": {w: len(s) for w, s in self._recipes.items()},
+            "snapshot_age_seconds": time.time() - self._refreshed_at
+            if self._refreshed_at
+            else None,
+        }
+
+
+# Singleton instance
+trending = TrendingTracker(
+    capacity=settings.TRENDING_CAPACITY,
+    top_k=settings.TRENDING_TOP_K,
+    refresh_interval=settings.TRENDING_REFRESH_SECONDS,
+)
@@ -0,0 +1,208 @@
+"""
+Active upstream health probing (EWMA latency/error rate) and load shedding
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Probe statuses that mean the upstream can't serve us (bad key, rate limited)
+UNUSABLE_STATUS_CODES = {401, 403, 429}
+
+# Consecutive failed probes before the upstream is considered down
+DOWN_AFTER_PROBE_FAILURES = 3
+
+# Never shed every request while merely degraded, so real traffic keeps sampling the
+# upstream
+MAX_DEGRADED_SHED = 0.9
+
+
+class UpstreamHealth:
+    """
+    Cached view of upstream health, read in O(1) by /api/health and before
+    every LLM-bound call.
+
+    A background task probes the upstream every `interval` seconds with a
+    cheap request. Probe latency feeds an EWMA; probe results and the outcome
+    of real upstream calls feed an EWMA error rate. The status is recomputed
+    on each observation:
+
+    - down: several probes failed in a row, or the error rate is above `down_error_rate`
+    - degraded: the error rate is above `degraded_error_rate`, or probe latency
+      above `degraded_latency`
+    - operational: otherwise
+    - unknown: no recent probe (prober not running)
+
+    While down every new upstream call is shed; while degraded a share of
+    them is, growing with the error rate and the latency excess.
+    """
+
+    OPERATIONAL = "operational"
+    DEGRADED = "degraded"
+    DOWN = "down"
+    UNKNOWN = "unknown"
+
+    def __init__(
+        self,
+        interval: float,
+        degraded_latency: float,
+        degraded_error_rate: float = 0.2,
+        down_error_rate: float = 0.5,
+        alpha: float = 0.3,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.interval = interval
+        self.degraded_latency = degraded_latency
+        self.degraded_error_rate = degraded_error_rate
+        self.down_error_rate = down_error_rate
+        self.alpha = alpha
+        self.clock = clock
+
+        self.latency_ewma: Optional[float] = None
+        self.error_ewma = 0.0
+        self.consecutive_probe_failures = 0
+        self.last_probe_at: Optional[float] = None
+        self.last_probe_status: Optional[int] = None
+        self.status = self.UNKNOWN
+        self._task: Optional[asyncio.Task] = None
+
+        self.probes = 0
+        self.probe_failures = 0
+        self.shed = 0
+
+    def current_status(self) -> str:
+        if (
+            self.last_probe_at is None
+            or self.clock() - self.last_probe_at > 3 * self.interval
+        ):
+            return self.UNKNOWN
+        return self.status
+
+    def observe_probe(
+        self, ok: bool, latency: float, status_code: Optional[int] = None
+    ) -> None:
+        self.probes += 1
+        self.last_probe_at = self.clock()
+        self.last_probe_status = status_code
+        if ok:
+            self.consecutive_probe_failures = 0
+            if self.latency_ewma is None:
+                self.latency_ewma = latency
+            else:
+                self.latency_ewma = (
+                    1 - self.alpha
+                ) * self.latency_ewma + self.alpha * latency
+        else:
+            self.probe_failures += 1
+            self.consecutive_probe_failures += 1
+        self.observe_call(ok)
+
+    def observe_call(self, ok: bool) -> None:
+        """Fold the outcome of a probe or a real upstream call into the error rate"""
+        self.error_ewma = (1 - self.alpha) * self.error_ewma + self.alpha * (
+            0.0 if ok else 1.0
+        )
+        self._update_status()
+
+    def _update_status(self) -> None:
+        previous = self.status
+        if (
+            self.consecutive_probe_failures >= DOWN_AFTER_PROBE_FAILURES
+            or self.error_ewma >= self.down_error_rate
+        ):
+            self.status = self.DOWN
+        elif self.error_ewma >= self.degraded_error_rate or self._latency_excess() > 0:
+            self.status = self.DEGRADED
+        else:
+            self.status = self.OPERATIONAL
+
+        if self.status != previous:
+            logger.warning(f"Upstream status changed: {previous} -> {self.status}")
+
+    def _latency_excess(self) -> float:
+        if self.latency_ewma is None or self.degraded_latency <= 0:
+            return 0.0
+        return min(max(self.latency_ewma / self.degraded_latency - 1, 0.0), 1.0)
+
+    def shed_probability(self) -> float:
+        status = self.current_status()
+        if status == self.DOWN:
+            return 1.0
+        if status == self.DEGRADED:
+            return min(max(self.error_ewma, self._latency_excess()), MAX_DEGRADED_SHED)
+        return 0.0
+
+    def should_shed(self) -> bool:
+        """Whether to reject a new upstream call now, before it queues"""
+        probability = self.shed_probability()
+        if probability and random.random() < probability:
+            self.shed += 1
+            return True
+        return False
+
+    async def start(self, probe: Callable[[], Awaitable[int]]) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._probe_loop(probe))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _probe_loop(self, probe: Callable[[], Awaitable[int]]) -> None:
+        while True:
+            await self.probe_once(probe)
+            await asyncio.sleep(self.interval)
+
+    async def probe_once(self, probe: Callable[[], Awaitable[int]]) -> None:
+        started = time.perf_counter()
+        try:
+            status_code = await probe()
+        except Exception as e:
+            logger.warning(f"Upstream probe failed: {str(e)}")
+            self.observe_probe(False, time.perf_counter() - started)
+            return
+        ok = status_code < 500 and status_code not in UNUSABLE_STATUS_CODES
+        self.observe_probe(ok, time.perf_counter() - started, status_code)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "status": self.current_status(),
+            "latency_ms": round(self.latency_ewma * 1000, 1)
+            if self.latency_ewma is not None
+            else None,
+            "error_rate": round(self.error_ewma, 3),
+            "last_probe_status": self.last_probe_status,
+            "last_probe_age_seconds": (
+                round(self.clock() - self.last_probe_at, 1)
+                if self.last_probe_at is not None
+                else None
+            ),
+            "consecutive_probe_failures": self.consecutive_probe_failures,
+            "shed_probability": round(self.shed_probability(), 3),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.snapshot(),
+            "probes": self.probes,
+            "probe_failures": self.probe_failures,
+            "shed": self.shed,
+        }
+
+
+# Singleton instance
+upstream_health = UpstreamHealth(
+    interval=settings.UPSTREAM_PROBE_INTERVAL,
+    degraded_latency=settings.UPSTREAM_DEGRADED_LATENCY,
+)
@@ -0,0 +1,441 @@
+"""
+Pluggable upstream provider: live, record (live + cassette) or replay (cassette only)
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import time
+from pathlib import Path
+from typing import IO, Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_MODES = ("live", "record", "replay")
+
+COMPLETIONS_PATH = "/chat/completions"
+MODELS_PATH = "/models"
+
+# Characters per streamed delta when a non-streamed recording is replayed as a stream
+REPLAY_CHUNK_CHARS = 32
+
+
+def prompt_key(payload: Dict[str, Any]) -> str:
+    """
+    Cassette key of a chat completion request: the model and the messages with
+    whitespace collapsed. Sampling settings and max_tokens are left out, since
+    the token budget resizes max_tokens as it learns.
+    """
+    messages = [
+        [message.get("role", ""), " ".join(str(message.get("content") or "").split())]
+        for message in payload.get("messages") or []
+    ]
+    normalized = json.dumps([payload.get("model", ""), messages], separators=(",", ":"))
+    return hashlib.sha1(normalized.encode()).hexdigest()
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 1)
+
+
+def _decode_completion(
+    body: bytes, stream: bool, chunk_times: List[Tuple[float, int]]
+) -> Dict[str, Any]:
+    """
+    Compact form of a recorded completion: the content (or, for streams, the
+    content deltas with their arrival offsets), finish_reason and usage.
+    """
+    if not stream:
+        data = json.loads(body)
+        choice = data["choices"][0]
+        return {
+            "content": choice["message"]["content"],
+            "finish_reason": choice.get("finish_reason"),
+            "usage": data.get("usage"),
+        }
+
+    deltas: List[List[Any]] = []
+    finish_reason, usage = None, None
+    position, chunk_index = 0, 0
+    for line in body.split(b"\n"):
+        position += len(line) + 1
+        while (
+            chunk_index < len(chunk_times) - 1
+            and position > chunk_times[chunk_index][1]
+        ):
+            chunk_index += 1
+        if not line.startswith(b"data:"):
+            continue
+        data = line[5:].strip()
+        if data == b"[DONE]":
+            break
+        try:
+            chunk = json.loads(data)
+        except json.JSONDecodeError:
+            continue
+        usage = chunk.get("usage") or usage
+        choices = chunk.get("choices") or [{}]
+        finish_reason = choices[0].get("finish_reason") or finish_reason
+        content = (choices[0].get("delta") or {}).get("content")
+        if content:
+            deltas.append(
+                [_ms(chunk_times[chunk_index][0]) if chunk_times else 0.0, content]
+            )
+    return {"deltas": deltas, "finish_reason": finish_reason, "usage": usage}
+
+
+class _RecordingStream(httpx.AsyncByteStream):
+    """Passes the upstream body through, noting when each chunk arrived"""
+
+    def __init__(self, inner: httpx.AsyncByteStream, started: float, on_close):
+        self.inner = inner
+        self.started = started
+        self.on_close = on_close
+        self.chunks: List[bytes] = []
+        # (seconds since request, body offset at chunk end)
+        self.chunk_times: List[Tuple[float, int]] = []
+        self.size = 0
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self.inner:
+            self.size += len(chunk)
+            self.chunks.append(chunk)
+            self.chunk_times.append((time.perf_counter() - self.started, self.size))
+            yield chunk
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+        self.on_close(self)
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Live transport that writes every chat completion exchange to the cassette"""
+
+    def __init__(self, provider: "UpstreamProvider", inner: httpx.AsyncBaseTransport):
+        self.provider = provider
+        self.inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if not request.url.path.endswith(COMPLETIONS_PATH):
+            return await self.inner.handle_async_request(request)
+
+        payload = json.loads(await request.aread())
+        # Keep the body readable without reimplementing content decoding
+        request.headers["Accept-Encoding"] = "identity"
+        started = time.perf_counter()
+        response = await self.inner.handle_async_request(request)
+        first_byte = time.perf_counter() - started
+
+        def finish(stream: _RecordingStream) -> None:
+            self.provider.record(
+                payload, response.status_code, response.headers, stream, first_byte
+            )
+
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=_RecordingStream(response.stream, started, finish),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+class _ReplayStream(httpx.AsyncByteStream):
+    """Recorded deltas re-encoded as SSE, released at their recorded offsets"""
+
+    def __init__(
+        self, entry: Dict[str, Any], model: str, started: float, delay_scale: float
+    ):
+        self.entry = entry
+        self.model = model
+        self.started = started
+        self.delay_scale = delay_scale
+
+    async def _until(self, offset_ms: float) -> None:
+        if self.delay_scale > 0:
+            delay = (
+                self.started + offset_ms / 1000 * self.delay_scale - time.perf_counter()
+            )
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        for offset_ms, content in _deltas(self.entry):
+            await self._until(offset_ms)
+            chunk = {
+                "model": self.model,
+                "choices": [
+                    {"index": 0, "delta": {"content": content}, "finish_reason": None}
+                ],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n".encode()
+
+        await self._until(self.entry.get("total_ms") or 0.0)
+        final = {
+            "model": self.model,
+            "choices": [
+                {
+                    "index": 0,
+                    "delta": {},
+                    "finish_reason": self.entry.get("finish_reason") or "stop",
+                }
+            ],
+            "usage": self.entry.get("usage"),
+        }
+        yield f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode()
+
+
+def _deltas(entry: Dict[str, Any]) -> List[List[Any]]:
+    if "deltas" in entry:
+        return entry["deltas"]
+    # Recorded without streaming: spread the content evenly from first byte to the end
+    content = entry.get("content") or ""
+    pieces = [
+        content[i : i + REPLAY_CHUNK_CHARS]
+        for i in range(0, len(content), REPLAY_CHUNK_CHARS)
+    ]
+    first, total = entry.get("first_byte_ms") or 0.0, entry.get("total_ms") or 0.0
+    step = (total - first) / max(len(pieces), 1)
+    return [[first + step * index, piece] for index, piece in enumerate(pieces)]
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Answers chat completions from the cassette without touching the network"""
+
+    def __init__(self, provider: "UpstreamProvider"):
+        self.provider = provider
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith(MODELS_PATH):
+            return httpx.Response(
+                200,
+                json={
+                    "object": "list",
+                    "data": [{"id": settings.ASI_MODEL, "object": "model"}],
+                },
+            )
+        if not request.url.path.endswith(COMPLETIONS_PATH):
+            return httpx.Response(
+                404, json={"error": {"message": "Not available in replay mode"}}
+            )
+
+        started = time.perf_counter()
+        payload = json.loads(await request.aread())
+        entry = self.provider.lookup(payload)
+        if entry is None:
+            return httpx.Response(
+                404, json={"error": {"message": "No cassette entry for this prompt"}}
+            )
+
+        scale = self.provider.delay_scale
+        model = payload.get("model", settings.ASI_MODEL)
+        if entry["status"] >= 400:
+            await asyncio.sleep((entry.get("total_ms") or 0.0) / 1000 * scale)
+            headers = (
+                {"Retry-After": entry["retry_after"]}
+                if entry.get("retry_after")
+                else None
+            )
+            return httpx.Response(
+                entry["status"],
+                headers=headers,
+                content=(entry.get("error") or "").encode(),
+            )
+
+        if payload.get("stream"):
+            return httpx.Response(
+                entry["status"],
+                headers={"Content-Type": "text/event-stream"},
+                stream=_ReplayStream(entry, model, started, scale),
+            )
+
+        await asyncio.sleep((entry.get("total_ms") or 0.0) / 1000 * scale)
+        content = (
+            entry["content"]
+            if "content" in entry
+            else "".join(text for _, text in entry["deltas"])
+        )
+        return httpx.Response(
+            entry["status"],
+            json={
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": entry.get("finish_reason") or "stop",
+                    }
+                ],
+                "usage": entry.get("usage"),
+            },
+        )
+
+
+class UpstreamProvider:
+    """
+    Chooses the HTTP transport AIService talks to the LLM through.
+
+    - live: the real API
+    - record: the real API, with every chat completion exchange appended to
+      the cassette (gzipped JSON lines: prompt key, messages, status,
+      content or timed stream deltas, usage, time to first byte and total)
+    - replay: completions served from the cassette, keyed by normalized
+      prompt, without network access. Timings are replayed scaled by
+      `delay_scale` (1 = as recorded, 0 = instantly). Several recordings of
+      one prompt are served in turn; unknown prompts get HTTP 404.
+    """
+
+    def __init__(self, mode: str, cassette_path: str, delay_scale: float = 1.0):
+        if mode not in PROVIDER_MODES:
+            raise ValueError(f"Unknown upstream provider mode: {mode}")
+        self.mode = mode
+        self.cassette_path = Path(cassette_path) if cassette_path else None
+        self.delay_scale = max(delay_scale, 0.0)
+
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._next: Dict[str, int] = {}
+        self._loaded = False
+        self._file: Optional[IO[str]] = None
+
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+
+    def transport(
+        self, http2: bool, limits: httpx.Limits
+    ) -> Optional[httpx.AsyncBaseTransport]:
+        """Transport for the shared upstream client; None keeps httpx's default"""
+        if self.mode == "record":
+            return RecordingTransport(
+                self, httpx.AsyncHTTPTransport(http2=http2, limits=limits)
+            )
+        if self.mode == "replay":
+            self._load()
+            return ReplayTransport(self)
+        return None
+
+    # ---------------------------------------------------------
+    # Record
+    # ---------------------------------------------------------
+
+    def record(
+        self,
+        payload: Dict[str, Any],
+        status: int,
+        headers: httpx.Headers,
+        stream: _RecordingStream,
+        first_byte: float,
+    ) -> None:
+        body = b"".join(stream.chunks)
+        entry: Dict[str, Any] = {
+            "key": prompt_key(payload),
+            "model": payload.get("model"),
+            "messages": payload.get("messages"),
+            "stream": bool(payload.get("stream")),
+            "status": status,
+            "first_byte_ms": _ms(first_byte),
+            "total_ms": _ms(stream.chunk_times[-1][0])
+            if stream.chunk_times
+            else _ms(first_byte),
+        }
+        if status >= 400:
+            entry["error"] = body[:2000].decode(errors="replace")
+            entry["retry_after"] = headers.get("Retry-After")
+        else:
+            try:
+                entry.update(
+                    _decode_completion(body, entry["stream"], stream.chunk_times)
+                )
+            except (ValueError, KeyError, IndexError) as e:
+                logger.warning(f"Not recording undecodable upstream response: {str(e)}")
+                return
+
+        if self.cassette_path is None:
+            return
+        try:
+            if self._file is None:
+                self.cassette_path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = self._open("at")
+            self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            # Sync-flush each entry so a killed process leaves a readable cassette
+            self._file.flush()
+            self.recorded += 1
+        except OSError as e:
+            logger.error(f"Failed to write cassette entry: {str(e)}")
+
+    # ---------------------------------------------------------
+    # Replay
+    # ---------------------------------------------------------
+
+    def _open(self, mode: str) -> IO[str]:
+        if self.cassette_path.suffix == ".gz":
+            return gzip.open(self.cassette_path, mode, encoding="utf-8")
+        return open(self.cassette_path, mode, encoding="utf-8")
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if self.cassette_path is None or not self.cassette_path.exists():
+            logger.error(f"Replay cassette not found: {self.cassette_path}")
+            return
+
+        count = 0
+        try:
+            with self._open("rt") as cassette:
+                for line in cassette:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self._entries.setdefault(entry["key"], []).append(entry)
+                    count += 1
+        except (EOFError, OSError) as e:
+            # Cassette still being written, or cut short
+            logger.warning(f"Cassette read stopped early: {str(e)}")
+        logger.info(
+            f"Replay cassette loaded: {count} exchanges, {len(self._entries)} prompts"
+        )
+
+    def lookup(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        key = prompt_key(payload)
+        entries = self._entries.get(key)
+        if not entries:
+            self.misses += 1
+            return None
+        index = self._next.get(key, 0)
+        self._next[key] = (index + 1) % len(entries)
+        self.replayed += 1
+        return entries[index]
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "recorded": self.recorded,
+            "replayed": self.replayed,
+            "misses": self.misses,
+            "prompts": len(self._entries),
+        }
+
+
+# Singleton instance
+upstream_provider = UpstreamProvider(
+    mode=settings.UPSTREAM_MODE,
+    cassette_path=settings.UPSTREAM_CASSETTE_PATH,
+    delay_scale=settings.UPSTREAM_REPLAY_DELAY_SCALE,
+)
@@ -0,0 +1,13 @@
+"""
+Load-test harness for the NutriMind API.
+
+- fake_asi: local stand-in for the ASI chat completions API (latency, token rate,
+  errors)
+- scenarios: one load scenario per /api/* endpoint
+- loadgen: open-loop load generator and per-scenario report
+- run: starts the fake upstream and the API, runs scenarios, saves JSON results
+
+Usage (from backend/):
+    python -m benchmarks.run --rps 20 --duration 30
+    python -m benchmarks.run --compare benchmarks/results/<earlier>.json
+"""
@@ -0,0 +1,520 @@
+"""
+Local stand-in for the ASI chat completions API, for load tests.
+
+Serves POST /v1/chat/completions (plain and stream=True) and GET /v1/models.
+Completions are canned JSON shaped like real meal plans, recipes and
+nutrition analyses, sized from the prompt (days, meals per day, recipe
+count), and arrive after a sampled time to first token plus completion
+tokens / token rate. Errors, rate limits, hangs and truncated completions
+can be injected at a given rate. GET /stats reports what was served.
+
+Usage (from backend/):
+    python -m benchmarks.fake_asi --port 8900 --latency lognormal --latency-ms 800 \
+        --error-rate 0.02
+    ASI_BASE_URL=http://127.0.0.1:8900/v1 uvicorn app.main:app
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal")
+
+# Characters per streamed delta (~8 tokens)
+STREAM_CHUNK_CHARS = 32
+
+MEAL_TYPES = {
+    1: ["dinner"],
+    2: ["breakfast", "dinner"],
+    3: ["breakfast", "lunch", "dinner"],
+    4: ["breakfast", "lunch", "snack", "dinner"],
+    5: ["breakfast", "snack", "lunch", "snack", "dinner"],
+    6: ["breakfast", "snack", "lunch", "snack", "dinner", "snack"],
+}
+
+DISHES = [
+    "grain bowl",
+    "stir-fry",
+    "sheet-pan bake",
+    "salad",
+    "curry",
+    "wrap",
+    "frittata",
+    "soup",
+    "tacos",
+    "pasta",
+    "skillet",
+    "power bowl",
+]
+
+PANTRY = [
+    "olive oil",
+    "garlic",
+    "onion",
+    "spinach",
+    "bell pepper",
+    "brown rice",
+    "quinoa",
+    "chickpeas",
+    "lemon",
+    "greek yogurt",
+    "tomato",
+    "black beans",
+    "sweet potato",
+    "oats",
+]
+
+PROTEINS = [
+    "chicken breast",
+    "salmon",
+    "tofu",
+    "eggs",
+    "turkey",
+    "lentils",
+    "shrimp",
+    "tempeh",
+]
+
+CUISINES = ["Mediterranean", "Mexican", "Asian", "Indian", "Italian", "American"]
+
+
+@dataclass
+class FakeProfile:
+    """How the fake upstream behaves; every rate is a probability per request"""
+
+    latency: str = "lognormal"  # Time-to-first-token distribution
+    latency_ms: float = 600.0  # Median (lognormal) or mean time to first token
+    latency_spread: float = (
+        0.5  # Sigma (lognormal), stddev share (normal), +/- share (uniform)
+    )
+    tokens_per_second: float = (
+        80.0  # Completion token rate; 0 returns the whole body at once
+    )
+    error_rate: float = 0.0  # HTTP 500
+    rate_limit_rate: float = 0.0  # HTTP 429 with Retry-After
+    timeout_rate: float = 0.0  # Hang for hang_seconds, then HTTP 504
+    hang_seconds: float = 150.0
+    truncate_rate: float = 0.0  # Cut the completion short (finish_reason "length")
+    probe_latency_ms: float = 20.0  # GET /v1/models
+    seed: Optional[int] = None
+    rng: random.Random = field(default_factory=random.Random, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.latency not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {self.latency}")
+        if self.seed is not None:
+            self.rng.seed(self.seed)
+
+    def first_token_delay(self) -> float:
+        base = self.latency_ms / 1000
+        if self.latency == "fixed":
+            return base
+        if self.latency == "uniform":
+            return self.rng.uniform(
+                base * (1 - self.latency_spread), base * (1 + self.latency_spread)
+            )
+        if self.latency == "normal":
+            return max(self.rng.gauss(base, base * self.latency_spread), 0.0)
+        return base * math.exp(self.rng.gauss(0.0, self.latency_spread))
+
+    def generation_time(self, tokens: int) -> float:
+        return tokens / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def fault(self) -> Optional[str]:
+        """The fault to inject into this request, if any"""
+        roll = self.rng.random()
+        for name, rate in (
+            ("error", self.error_rate),
+            ("rate_limited", self.rate_limit_rate),
+            ("timeout", self.timeout_rate),
+            ("truncated", self.truncate_rate),
+        ):
+            if roll < rate:
+                return name
+            roll -= rate
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        profile = asdict(self)
+        profile.pop("rng")
+        return profile
+
+
+# ---------------------------------------------------------
+# Canned completions
+# ---------------------------------------------------------
+
+
+def _number(prompt: str, label: str, default: int) -> int:
+    match = re.search(rf"{label}:\s*(\d+)", prompt)
+    return int(match.group(1)) if match else default
+
+
+def _text(prompt: str, label: str) -> Optional[str]:
+    match = re.search(rf"{label}:\s*([^\n]+)", prompt)
+    value = match.group(1).strip() if match else ""
+    return None if value in ("", "None", "Any") else value
+
+
+def _nutrition(rng: random.Random, calories: float) -> Dict[str, float]:
+    protein_share, fat_share = rng.uniform(0.18, 0.32), rng.uniform(0.22, 0.35)
+    return {
+        "calories": int(calories),
+        "protein": round(calories * protein_share / 4, 1),
+        "carbohydrates": round(calories * (1 - protein_share - fat_share) / 4, 1),
+        "fat": round(calories * fat_share / 9, 1),
+        "fiber": round(rng.uniform(3, 12), 1),
+        "sugar": round(rng.uniform(2, 15), 1),
+        "sodium": round(rng.uniform(200, 900), 1),
+    }
+
+
+def fake_recipe(
+    rng: random.Random,
+    calories: float,
+    main: Optional[str] = None,
+    meal_type: Optional[str] = None,
+    cuisine: Optional[str] = None,
+    servings: int = 2,
+) -> Dict[str, Any]:
+    main = main or rng.choice(PROTEINS)
+    cuisine = cuisine or rng.choice(CUISINES)
+    dish = rng.choice(DISHES)
+    extras = rng.sample(PANTRY, 7)
+    ingredients = [f"{rng.choice([150, 200, 250])} g {main}"] + [
+        f"{rng.choice(['1', '2', '1/2'])} {rng.choice(['cup', 'tbsp', 'tsp'])} {item}"
+        for item in extras
+    ]
+    prep_time, cook_time = rng.choice([5, 10, 15, 20]), rng.choice([10, 15, 20, 30, 40])
+    return {
+        "name": f"{cuisine} {main} {dish}".title(),
+        "description": (
+            f"A {cuisine.lower()} {dish} built around {main} "
+            f"with {extras[0]} and {extras[1]}."
+        ),
+        "ingredients": ingredients,
+        "instructions": [
+            f"Prepare the {main} and season it well.",
+            f"Warm the {extras[0]} in a pan over medium heat.",
+            f"Add the {extras[1]} and {extras[2]} and cook for 5 minutes.",
+            f"Add the {main} and cook through.",
+            "Stir in the remaining ingredients and serve.",
+        ],
+        "prep_time": prep_time,
+        "cook_time": cook_time,
+        "total_time": prep_time + cook_time,
+        "servings": servings,
+        "difficulty": rng.choice(["easy", "medium"]),
+        "cuisine": cuisine,
+        "meal_type": meal_type or "",
+        "nutrition": _nutrition(rng, calories),
+        "tags": rng.sample(
+            ["high-protein", "quick", "meal-prep", "gluten-free", "high-fiber"], 2
+        ),
+        "image_url": None,
+    }
+
+
+def _meal_plan(rng: random.Random, prompt: str) -> Dict[str, Any]:
+    meals_per_day = min(max(_number(prompt, "Meals per day", 3), 1), 6)
+    days = min(max(_number(prompt, "Days", 1), 1), 7)
+    calorie_target = _number(prompt, "Calorie target", 2000)
+    meal_types = MEAL_TYPES[meals_per_day]
+    return {
+        "days": [
+            {
+                "day": day,
+                "meals": [
+                    {
+                        "meal_type": meal_type,
+                        "recipe": fake_recipe(
+                            rng,
+                            calorie_target / meals_per_day * rng.uniform(0.9, 1.1),
+                            meal_type=meal_type,
+                        ),
+                    }
+                    for meal_type in meal_types
+                ],
+            }
+            for day in range(1, days + 1)
+        ]
+    }
+
+
+def _recipes(rng: random.Random, prompt: str) -> List[Dict[str, Any]]:
+    match = re.search(r"Find (\d+) recipes", prompt)
+    count = int(match.group(1)) if match else 4
+    match = re.search(r"recipes using these ingredients:\s*([^\n]+)", prompt)
+    ingredients = [i.strip() for i in match.group(1).split(",")] if match else []
+    servings = _number(prompt, "Servings", 2)
+    meal_type, cuisine = _text(prompt, "Meal type"), _text(prompt, "Cuisine")
+    return [
+        fake_recipe(
+            rng,
+            rng.uniform(350, 700),
+            main=ingredients[index % len(ingredients)] if ingredients else None,
+            meal_type=meal_type,
+            cuisine=cuisine,
+            servings=servings,
+        )
+        for index in range(count)
+    ]
+
+
+def _analysis(rng: random.Random) -> Dict[str, Any]:
+    return {
+        "nutrition_per_serving": _nutrition(rng, rng.uniform(300, 750)),
+        "health_score": rng.randint(55, 92),
+        "recommendations": [
+            "Add a portion of leafy greens for extra fiber.",
+            "Use less salt and season with herbs and lemon instead.",
+        ],
+    }
+
+
+def _prose(rng: random.Random, words: int) -> str:
+    sentences = [
+        "A balanced plate is about half vegetables, a quarter protein "
+        "and a quarter whole grains.",
+        "Aim for a source of protein at every meal to stay full for longer.",
+        "Legumes such as lentils and chickpeas are an inexpensive way "
+        "to add protein and fiber.",
+        "Roasting vegetables with a little olive oil brings out their sweetness.",
+        "Drinking water through the day helps with energy and appetite control.",
+        "Batch cooking grains and proteins on the weekend makes weekday meals quicker.",
+    ]
+    text: List[str] = []
+    while sum(len(s.split()) for s in text) < words:
+        text.append(rng.choice(sentences))
+    return " ".join(text)
+
+
+def completion_for(
+    rng: random.Random, messages: List[Dict[str, Any]]
+) -> Tuple[str, str]:
+    """(kind, content) for a chat completions request, chosen from the last user
+    prompt"""
+    prompt = next(
+        (m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"),
+        "",
+    )
+
+    if "meal-planning AI" in prompt:
+        return "meal_plan", json.dumps(_meal_plan(rng, prompt), indent=2)
+    if "recipes using these ingredients" in prompt:
+        return "recipes", json.dumps(_recipes(rng, prompt), indent=2)
+    if "each recipe below" in prompt:
+        count = len(re.findall(r"^Recipe \d+:", prompt, flags=re.MULTILINE))
+        batch = [{"index": index, **_analysis(rng)} for index in range(count)]
+        return "nutrition_batch", json.dumps(batch, indent=2)
+    if "Analyze the nutritional content" in prompt:
+        return "nutrition", json.dumps(_analysis(rng), indent=2)
+    if "Update the running summary" in prompt:
+        return "chat_summary", _prose(rng, 80)
+    return "chat", _prose(rng, 120)
+
+
+def _tokens(text: str) -> int:
+    return max(len(text) // 4, 1)
+
+
+# ---------------------------------------------------------
+# App
+# ---------------------------------------------------------
+
+
+def create_app(profile: FakeProfile) -> FastAPI:
+    app = FastAPI(title="Fake ASI API")
+    served: Counter = Counter()
+    state = {"completion_tokens": 0, "started": time.time()}
+
+    @app.get("/v1/models")
+    async def models():
+        served["models"] += 1
+        await asyncio.sleep(profile.probe_latency_ms / 1000)
+        if profile.fault() == "error":
+            return JSONResponse(
+                {"error": {"message": "Injected error"}}, status_code=500
+            )
+        return {"object": "list", "data": [{"id": "asi1-mini", "object": "model"}]}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        payload = await request.json()
+        messages = payload.get("messages") or []
+        kind, content = completion_for(profile.rng, messages)
+        fault = profile.fault()
+        served[f"{kind}:{fault or 'ok'}"] += 1
+
+        if fault == "rate_limited":
+            return JSONResponse(
+                {"error": {"message": "Rate limit exceeded"}},
+                status_code=429,
+                headers={"Retry-After": "1"},
+            )
+        if fault == "timeout":
+            await asyncio.sleep(profile.hang_seconds)
+            return JSONResponse(
+                {"error": {"message": "Upstream timeout"}}, status_code=504
+            )
+        if fault == "error":
+            await asyncio.sleep(profile.first_token_delay())
+            return JSONResponse(
+                {"error": {"message": "Injected error"}}, status_code=500
+            )
+
+        finish_reason = "stop"
+        if fault == "truncated":
+            content = content[: int(len(content) * 0.6)]
+            finish_reason = "length"
+
+        usage = {
+            "prompt_tokens": sum(_tokens(m.get("content") or "") for m in messages),
+            "completion_tokens": _tokens(content),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        state["completion_tokens"] += usage["completion_tokens"]
+        model = payload.get("model", "asi1-mini")
+
+        if payload.get("stream"):
+            return StreamingResponse(
+                _stream(profile, model, content, finish_reason, usage),
+                media_type="text/event-stream",
+            )
+
+        await asyncio.sleep(
+            profile.first_token_delay()
+            + profile.generation_time(usage["completion_tokens"])
+        )
+        return {
+            "id": f"chatcmpl-fake-{sum(served.values())}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": finish_reason,
+                }
+            ],
+            "usage": usage,
+        }
+
+    @app.get("/stats")
+    async def stats():
+        return {
+            "profile": profile.to_dict(),
+            "uptime_seconds": round(time.time() - state["started"], 1),
+            "requests": sum(served.values()),
+            "completion_tokens": state["completion_tokens"],
+            "served": dict(served),
+        }
+
+    return app
+
+
+async def _stream(
+    profile: FakeProfile,
+    model: str,
+    content: str,
+    finish_reason: str,
+    usage: Dict[str, int],
+) -> AsyncIterator[str]:
+    await asyncio.sleep(profile.first_token_delay())
+    chunk_delay = profile.generation_time(_tokens("x" * STREAM_CHUNK_CHARS))
+
+    for start in range(0, len(content), STREAM_CHUNK_CHARS):
+        if start and chunk_delay:
+            await asyncio.sleep(chunk_delay)
+        chunk = {
+            "object": "chat.completion.chunk",
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "delta": {"content": content[start : start + STREAM_CHUNK_CHARS]},
+                    "finish_reason": None,
+                }
+            ],
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+
+    final = {
+        "object": "chat.completion.chunk",
+        "model": model,
+        "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}],
+        "usage": usage,
+    }
+    yield f"data: {json.dumps(final)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = FakeProfile()
+    parser.add_argument(
+        "--latency", choices=LATENCY_DISTRIBUTIONS, default=defaults.latency
+    )
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms)
+    parser.add_argument("--latency-spread", type=float, default=defaults.latency_spread)
+    parser.add_argument(
+        "--tokens-per-second", type=float, default=defaults.tokens_per_second
+    )
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument(
+        "--rate-limit-rate", type=float, default=defaults.rate_limit_rate
+    )
+    parser.add_argument("--timeout-rate", type=float, default=defaults.timeout_rate)
+    parser.add_argument("--hang-seconds", type=float, default=defaults.hang_seconds)
+    parser.add_argument("--truncate-rate", type=float, default=defaults.truncate_rate)
+    parser.add_argument(
+        "--probe-latency-ms", type=float, default=defaults.probe_latency_ms
+    )
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def profile_from_args(args: argparse.Namespace) -> FakeProfile:
+    return FakeProfile(
+        latency=args.latency,
+        latency_ms=args.latency_ms,
+        latency_spread=args.latency_spread,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        timeout_rate=args.timeout_rate,
+        hang_seconds=args.hang_seconds,
+        truncate_rate=args.truncate_rate,
+        probe_latency_ms=args.probe_latency_ms,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake ASI chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    uvicorn.run(
+        create_app(profile_from_args(args)),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
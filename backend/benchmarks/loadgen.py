@@ -0,0 +1,283 @@
+"""
+Open-loop load generator: sends a scenario's requests at a target rate,
+whether or not earlier ones have finished, and summarizes the outcome.
+"""
+
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks.report import distribution
+from benchmarks.scenarios import Scenario, recipe_search_body
+
+# How many recipe searches to run for ids when no earlier scenario collected any
+RECIPE_ID_SEED_SEARCHES = 5
+
+# Distinct error messages kept per scenario
+MAX_ERROR_SAMPLES = 5
+
+
+@dataclass
+class Sample:
+    """Outcome of one request"""
+
+    latency: float
+    first_byte: Optional[float]
+    status: Optional[int]
+    ok: bool
+    error: Optional[str] = None
+    body: Optional[bytes] = None
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    """Resident set size of `pid` in MB (Linux /proc), None where unavailable"""
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return round(int(line.split()[1]) / 1024, 1)
+    except (OSError, ValueError, IndexError):
+        return None
+    return None
+
+
+class MemorySampler:
+    """Polls the server's RSS while a scenario runs"""
+
+    def __init__(self, pid: Optional[int], interval: float = 0.2):
+        self.pid = pid
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self.pid is not None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            value = rss_mb(self.pid)
+            if value is not None:
+                self.samples.append(value)
+            await asyncio.sleep(self.interval)
+
+    async def stop(self) -> Optional[Dict[str, float]]:
+        if self._task is None:
+            return None
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        final = rss_mb(self.pid)
+        if final is not None:
+            self.samples.append(final)
+        if not self.samples:
+            return None
+        return {
+            "start": self.samples[0],
+            "peak": max(self.samples),
+            "end": self.samples[-1],
+        }
+
+
+class LoadGenerator:
+    """
+    Drives scenarios against a running API.
+
+    Requests are released on a fixed schedule (constant or Poisson arrivals)
+    at `rps` for `duration` seconds. A request that would exceed `max_in_flight`
+    is dropped and counted, so a saturated server shows up as drops and
+    latency rather than as a silently lower send rate.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        rps: float,
+        duration: float,
+        arrival: str = "constant",
+        max_in_flight: int = 500,
+        request_timeout: float = 180.0,
+        server_pid: Optional[int] = None,
+        seed: Optional[int] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.rps = rps
+        self.duration = duration
+        self.arrival = arrival
+        self.max_in_flight = max_in_flight
+        self.request_timeout = request_timeout
+        self.server_pid = server_pid
+        self.rng = random.Random(seed)
+        self.recipe_ids: List[str] = []
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.request_timeout,
+            limits=httpx.Limits(
+                max_connections=self.max_in_flight,
+                max_keepalive_connections=self.max_in_flight,
+            ),
+        )
+
+    def _arrivals(self) -> List[float]:
+        """Send offsets in seconds from the start of the scenario"""
+        if self.arrival == "poisson":
+            offsets, at = [], self.rng.expovariate(self.rps)
+            while at < self.duration:
+                offsets.append(at)
+                at += self.rng.expovariate(self.rps)
+            return offsets
+        return [index / self.rps for index in range(int(self.rps * self.duration))]
+
+    def _request(self, scenario: Scenario) -> Dict[str, Any]:
+        path = scenario.path
+        if "{recipe_id}" in path:
+            path = path.replace(
+                "{recipe_id}", self.rng.choice(self.recipe_ids or ["missing"])
+            )
+        request: Dict[str, Any] = {"method": scenario.method, "url": path}
+        if scenario.body is not None:
+            request["json"] = scenario.body(self.rng)
+        return request
+
+    async def _send(self, client: httpx.AsyncClient, scenario: Scenario) -> Sample:
+        request = self._request(scenario)
+        started = time.perf_counter()
+        first_byte = None
+        chunks: List[bytes] = []
+        try:
+            async with client.stream(**request) as response:
+                async for chunk in response.aiter_bytes():
+                    if first_byte is None:
+                        first_byte = time.perf_counter() - started
+                    chunks.append(chunk)
+        except httpx.HTTPError as e:
+            return Sample(
+                time.perf_counter() - started,
+                first_byte,
+                None,
+                False,
+                f"{type(e).__name__}: {str(e)}",
+            )
+
+        latency = time.perf_counter() - started
+        body = b"".join(chunks)
+        if response.status_code >= 400:
+            return Sample(
+                latency,
+                first_byte,
+                response.status_code,
+                False,
+                body[:200].decode(errors="replace"),
+            )
+        if scenario.stream and b"event: error" in body:
+            error = body[body.index(b"event: error") :][:200].decode(errors="replace")
+            return Sample(latency, first_byte, response.status_code, False, error)
+        return Sample(
+            latency,
+            first_byte,
+            response.status_code,
+            True,
+            body=body if scenario.collects_recipe_ids else None,
+        )
+
+    def _collect_recipe_ids(self, body: bytes) -> None:
+        try:
+            recipes = json.loads(body).get("recipes") or []
+        except (ValueError, AttributeError):
+            return
+        self.recipe_ids.extend(recipe["id"] for recipe in recipes if recipe.get("id"))
+
+    async def seed_recipe_ids(self, client: httpx.AsyncClient) -> None:
+        """Search a few times so GET /recipes/{id} has stored recipes to fetch"""
+        for _ in range(RECIPE_ID_SEED_SEARCHES):
+            try:
+                response = await client.post(
+                    "/api/recipes/search", json=recipe_search_body(self.rng)
+                )
+            except httpx.HTTPError:
+                continue
+            if response.status_code == 200:
+                self._collect_recipe_ids(response.content)
+
+    async def run(self, scenario: Scenario) -> Dict[str, Any]:
+        async with self.client() as client:
+            if "{recipe_id}" in scenario.path and not self.recipe_ids:
+                await self.seed_recipe_ids(client)
+
+            arrivals = self._arrivals()
+            in_flight: set = set()
+            tasks: List[asyncio.Task] = []
+            dropped = 0
+            sampler = MemorySampler(self.server_pid)
+            sampler.start()
+
+            loop = asyncio.get_running_loop()
+            started = time.perf_counter()
+            for offset in arrivals:
+                delay = started + offset - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if len(in_flight) >= self.max_in_flight:
+                    dropped += 1
+                    continue
+                task = loop.create_task(self._send(client, scenario))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+                tasks.append(task)
+
+            samples: List[Sample] = list(await asyncio.gather(*tasks))
+            elapsed = time.perf_counter() - started
+            memory = await sampler.stop()
+
+        for sample in samples:
+            if sample.ok and sample.body:
+                self._collect_recipe_ids(sample.body)
+        return self._summarize(scenario, samples, dropped, elapsed, memory)
+
+    def _summarize(
+        self,
+        scenario: Scenario,
+        samples: List[Sample],
+        dropped: int,
+        elapsed: float,
+        memory: Optional[Dict[str, float]],
+    ) -> Dict[str, Any]:
+        ok = [s for s in samples if s.ok]
+        errors = [s for s in samples if not s.ok]
+        error_samples = list(dict.fromkeys(s.error for s in errors if s.error))[
+            :MAX_ERROR_SAMPLES
+        ]
+        return {
+            "scenario": scenario.name,
+            "method": scenario.method,
+            "path": scenario.path,
+            "stream": scenario.stream,
+            "target_rps": self.rps,
+            "duration_seconds": self.duration,
+            "elapsed_seconds": round(elapsed, 2),
+            "requests": len(samples) + dropped,
+            "ok": len(ok),
+            "errors": len(errors),
+            "dropped": dropped,
+            "error_rate": round(len(errors) / len(samples), 4) if samples else None,
+            "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else None,
+            "status_codes": dict(
+                Counter(str(s.status or "transport_error") for s in samples)
+            ),
+            "latency_ms": distribution([s.latency for s in ok]),
+            "first_byte_ms": distribution(
+                [s.first_byte for s in ok if s.first_byte is not None]
+            ),
+            "memory_mb": memory,
+            "error_samples": error_samples,
+        }
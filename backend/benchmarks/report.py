@@ -0,0 +1,118 @@
+"""
+Summaries, tables and run-to-run comparison of load test results.
+
+Usage (from backend/):
+    python -m benchmarks.report benchmarks/results/<baseline>.json \
+        benchmarks/results/<current>.json
+"""
+
+import json
+import math
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(ordered: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return None
+    rank = min(max(math.ceil(q / 100 * len(ordered)) - 1, 0), len(ordered) - 1)
+    return ordered[rank]
+
+
+def distribution(values: List[float]) -> Dict[str, Optional[float]]:
+    """Mean, percentiles and max of `values` (seconds), in milliseconds"""
+    ordered = sorted(values)
+    summary: Dict[str, Optional[float]] = {
+        "mean": round(sum(ordered) / len(ordered) * 1000, 2) if ordered else None
+    }
+    for q in PERCENTILES:
+        value = percentile(ordered, q)
+        summary[f"p{q}"] = round(value * 1000, 2) if value is not None else None
+    summary["max"] = round(ordered[-1] * 1000, 2) if ordered else None
+    return summary
+
+
+def _cell(value: Any, width: int) -> str:
+    if value is None:
+        return "-".rjust(width)
+    if isinstance(value, float):
+        return f"{value:.1f}".rjust(width)
+    return str(value).rjust(width)
+
+
+def print_table(scenarios: List[Dict[str, Any]]) -> None:
+    header = (
+        f"{'scenario':<26}{'sent':>6}{'ok':>6}{'err':>5}{'rps':>7}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'rss MB':>8}{'upstream':>9}"
+    )
+    print(header)
+    print("-" * len(header))
+    for result in scenarios:
+        latency, memory = result["latency_ms"], result.get("memory_mb") or {}
+        print(
+            f"{result['scenario']:<26}"
+            f"{_cell(result['requests'], 6)}{_cell(result['ok'], 6)}"
+            f"{_cell(result['errors'], 5)}"
+            f"{_cell(result['throughput_rps'], 7)}"
+            f"{_cell(latency['p50'], 9)}{_cell(latency['p95'], 9)}"
+            f"{_cell(latency['p99'], 9)}"
+            f"{_cell(memory.get('peak'), 8)}{_cell(result.get('upstream_calls'), 9)}"
+        )
+
+
+def _change(baseline: Optional[float], current: Optional[float]) -> str:
+    if baseline is None or current is None:
+        return "-".rjust(8)
+    if baseline == 0:
+        return "n/a".rjust(8)
+    return f"{(current - baseline) / baseline * 100:+.1f}%".rjust(8)
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> None:
+    """Per-scenario change in throughput, latency percentiles and peak memory"""
+    before = {result["scenario"]: result for result in baseline["scenarios"]}
+    header = (
+        f"{'scenario':<26}{'rps':>8}{'p50':>8}{'p95':>8}{'p99':>8}"
+        f"{'rss':>8}{'errors':>9}"
+    )
+    print(
+        f"baseline: {baseline.get('label') or baseline.get('started_at')}  "
+        f"({baseline.get('git_commit')})"
+    )
+    print(
+        f"current:  {current.get('label') or current.get('started_at')}  "
+        f"({current.get('git_commit')})"
+    )
+    print(header)
+    print("-" * len(header))
+    for result in current["scenarios"]:
+        old = before.get(result["scenario"])
+        if old is None:
+            continue
+        old_peak = (old.get("memory_mb") or {}).get("peak")
+        print(
+            f"{result['scenario']:<26}"
+            f"{_change(old['throughput_rps'], result['throughput_rps'])}"
+            f"{_change(old['latency_ms']['p50'], result['latency_ms']['p50'])}"
+            f"{_change(old['latency_ms']['p95'], result['latency_ms']['p95'])}"
+            f"{_change(old['latency_ms']['p99'], result['latency_ms']['p99'])}"
+            f"{_change(old_peak, (result.get('memory_mb') or {}).get('peak'))}"
+            f"{old['errors']:>4} ->{result['errors']:>3}"
+        )
+
+
+def load(path: str) -> Dict[str, Any]:
+    return json.loads(Path(path).read_text())
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 2:
+        print_table(load(sys.argv[1])["scenarios"])
+    elif len(sys.argv) == 3:
+        compare(load(sys.argv[1]), load(sys.argv[2]))
+    else:
+        sys.exit(__doc__)
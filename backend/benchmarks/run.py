@@ -0,0 +1,309 @@
+"""
+Run load scenarios against the API backed by the fake ASI server and save the results.
+
+Starts benchmarks.fake_asi and the API (uvicorn app.main:app) as subprocesses,
+drives each scenario at the target rate, samples the API's memory, and writes
+one JSON file per run to benchmarks/results/. Pass --target to load an API
+that is already running instead.
+
+Usage (from backend/):
+    python -m benchmarks.run --rps 20 --duration 30
+    python -m benchmarks.run --scenarios recipes_search,meal_plan --latency-ms 1500 \
+        --error-rate 0.05
+    python -m benchmarks.run --env CACHE_ENABLED=false --label no-cache \
+        --compare benchmarks/results/<earlier>.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks import fake_asi, report
+from benchmarks.loadgen import LoadGenerator
+from benchmarks.scenarios import SCENARIOS, SCENARIOS_BY_NAME
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# API settings for benchmark runs; --env overrides them. The rate limiter is
+# lifted so results measure the service rather than RATE_LIMIT_PER_MINUTE.
+BACKEND_ENV = {
+    "FETCH_API_KEY": "benchmark",
+    "RATE_LIMIT_PER_MINUTE": "1000000",
+    "RATE_LIMIT_BURST": "10000",
+    "CACHE_DISK_PATH": "",
+    "LOG_LEVEL": "WARNING",
+}
+
+STARTUP_TIMEOUT = 60.0
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _spawn(
+    args: List[str], log_path: Path, env: Optional[Dict[str, str]] = None
+) -> subprocess.Popen:
+    with open(log_path, "wb") as log:
+        return subprocess.Popen(
+            [sys.executable, *args],
+            cwd=BACKEND_DIR,
+            env={**os.environ, **(env or {})},
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+
+
+def _terminate(process: Optional[subprocess.Popen]) -> None:
+    if process is None or process.poll() is not None:
+        return
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+async def _wait_ready(url: str, process: Optional[subprocess.Popen]) -> None:
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    async with httpx.AsyncClient(timeout=2.0) as client:
+        while time.monotonic() < deadline:
+            if process is not None and process.poll() is not None:
+                raise RuntimeError(
+                    f"{url} exited with code {process.returncode} during startup"
+                )
+            try:
+                await client.get(url)
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.25)
+    raise RuntimeError(f"{url} not ready after {STARTUP_TIMEOUT:.0f}s")
+
+
+async def _upstream_stats(
+    client: httpx.AsyncClient, fake_url: Optional[str]
+) -> Optional[Dict[str, Any]]:
+    if fake_url is None:
+        return None
+    try:
+        return (await client.get(f"{fake_url}/stats")).json()
+    except (httpx.HTTPError, ValueError):
+        return None
+
+
+async def run_scenarios(
+    args: argparse.Namespace,
+    api_url: str,
+    api_pid: Optional[int],
+    fake_url: Optional[str],
+) -> List[Dict]:
+    generator = LoadGenerator(
+        api_url,
+        rps=args.rps,
+        duration=args.duration,
+        arrival=args.arrival,
+        max_in_flight=args.max_in_flight,
+        request_timeout=args.request_timeout,
+        server_pid=api_pid,
+        seed=args.seed,
+    )
+    names = (
+        args.scenarios.split(",")
+        if args.scenarios
+        else [scenario.name for scenario in SCENARIOS]
+    )
+    results = []
+
+    async with httpx.AsyncClient(timeout=5.0) as client:
+        for name in names:
+            scenario = SCENARIOS_BY_NAME[name]
+            before = await _upstream_stats(client, fake_url)
+            result = await generator.run(scenario)
+            after = await _upstream_stats(client, fake_url)
+
+            if before is not None and after is not None:
+                result["upstream_calls"] = after["requests"] - before["requests"]
+                result["upstream_completion_tokens"] = (
+                    after["completion_tokens"] - before["completion_tokens"]
+                )
+            results.append(result)
+
+            print(
+                f"{name}: {result['ok']}/{result['requests']} ok, "
+                f"{result['throughput_rps']} rps, "
+                f"p50 {result['latency_ms']['p50']} ms, "
+                f"p99 {result['latency_ms']['p99']} ms",
+                flush=True,
+            )
+            await asyncio.sleep(args.cooldown)
+    return results
+
+
+async def main(args: argparse.Namespace) -> Dict[str, Any]:
+    started_at = datetime.now(timezone.utc)
+    profile = fake_asi.profile_from_args(args)
+    overrides = dict(item.split("=", 1) for item in args.env)
+    fake_process = api_process = workdir = None
+
+    try:
+        if args.target:
+            api_url, api_pid, fake_url = args.target.rstrip("/"), args.server_pid, None
+        else:
+            fake_url = f"http://127.0.0.1:{args.fake_port}"
+            fake_args = ["-m", "benchmarks.fake_asi", "--port", str(args.fake_port)]
+            for name, value in profile.to_dict().items():
+                if value is not None:
+                    fake_args += [f"--{name.replace('_', '-')}", str(value)]
+            workdir = tempfile.mkdtemp(prefix="nutrimind-bench-")
+            print(f"Server logs: {workdir}", flush=True)
+            fake_process = _spawn(fake_args, Path(workdir) / "fake_asi.log")
+            await _wait_ready(f"{fake_url}/stats", fake_process)
+
+            env = {
+                **BACKEND_ENV,
+                "ASI_BASE_URL": f"{fake_url}/v1",
+                "RECIPE_STORE_PATH": str(Path(workdir) / "recipes.db"),
+                **overrides,
+            }
+            api_url = f"http://127.0.0.1:{args.api_port}"
+            api_process = _spawn(
+                [
+                    "-m",
+                    "uvicorn",
+                    "app.main:app",
+                    "--port",
+                    str(args.api_port),
+                    "--log-level",
+                    "warning",
+                ],
+                Path(workdir) / "api.log",
+                env,
+            )
+            api_pid = api_process.pid
+            await _wait_ready(f"{api_url}/api/health", api_process)
+
+        scenarios = await run_scenarios(args, api_url, api_pid, fake_url)
+    finally:
+        _terminate(api_process)
+        _terminate(fake_process)
+
+    # Logs are kept when the run fails
+    if workdir is not None:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "label": args.label,
+        "started_at": started_at.isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "target": args.target,
+            "rps": args.rps,
+            "duration_seconds": args.duration,
+            "arrival": args.arrival,
+            "max_in_flight": args.max_in_flight,
+            "seed": args.seed,
+            "fake_asi": None if args.target else profile.to_dict(),
+            "env": overrides,
+        },
+        "scenarios": scenarios,
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="NutriMind API load test")
+    parser.add_argument(
+        "--scenarios", help=f"Comma-separated subset of: {', '.join(SCENARIOS_BY_NAME)}"
+    )
+    parser.add_argument(
+        "--rps", type=float, default=5.0, help="Target requests per second per scenario"
+    )
+    parser.add_argument(
+        "--duration", type=float, default=20.0, help="Seconds of load per scenario"
+    )
+    parser.add_argument(
+        "--arrival", choices=("constant", "poisson"), default="constant"
+    )
+    parser.add_argument("--max-in-flight", type=int, default=500)
+    parser.add_argument("--request-timeout", type=float, default=180.0)
+    parser.add_argument(
+        "--cooldown", type=float, default=1.0, help="Pause between scenarios"
+    )
+    parser.add_argument(
+        "--target",
+        help="Load an already running API at this URL instead of starting one",
+    )
+    parser.add_argument(
+        "--server-pid", type=int, help="PID of the --target API, for memory sampling"
+    )
+    parser.add_argument("--api-port", type=int, default=8800)
+    parser.add_argument("--fake-port", type=int, default=8900)
+    parser.add_argument(
+        "--env",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="API setting override",
+    )
+    parser.add_argument("--label", help="Name for this run in the results")
+    parser.add_argument(
+        "--output", help="Results file (default: benchmarks/results/<timestamp>.json)"
+    )
+    parser.add_argument(
+        "--compare", metavar="RESULTS", help="Earlier results file to compare against"
+    )
+    fake_asi.add_profile_arguments(parser)
+
+    args = parser.parse_args()
+    unknown = [
+        name
+        for name in (args.scenarios or "").split(",")
+        if name and name not in SCENARIOS_BY_NAME
+    ]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = asyncio.run(main(args))
+
+    output = (
+        Path(args.output)
+        if args.output
+        else RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+
+    print()
+    report.print_table(results["scenarios"])
+    print(f"\nResults saved to {output}")
+
+    if args.compare:
+        print()
+        report.compare(report.load(args.compare), results)
@@ -0,0 +1,167 @@
+"""
+Load scenarios, one per /api/* endpoint.
+
+Request bodies are drawn at random from small pools, so some requests repeat
+and the response caches see a realistic mix of hits and misses.
+"""
+
+import random
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.fake_asi import MEAL_TYPES, PANTRY, PROTEINS, fake_recipe
+
+DIETS = [[], [], ["vegetarian"], ["vegan"], ["gluten_free"], ["keto"], ["dairy_free"]]
+
+MEAL_TYPE_FILTERS = [None, "breakfast", "lunch", "dinner", "snack"]
+
+CUISINES = [None, None, "Italian", "Mexican", "Asian", "Mediterranean", "Indian"]
+
+CHAT_MESSAGES = [
+    "What is a good high-protein breakfast?",
+    "How much fiber should I eat per day?",
+    "Can you suggest a quick vegetarian dinner?",
+    "Is intermittent fasting a good idea for weight loss?",
+    "What snacks keep me full between meals?",
+    "How do I hit 120 g of protein without meat?",
+]
+
+Body = Callable[[random.Random], Dict[str, Any]]
+
+
+@dataclass
+class Scenario:
+    """One endpoint under load"""
+
+    name: str
+    method: str
+    path: str  # "{recipe_id}" is filled from ids seen in earlier responses
+    body: Optional[Body] = None
+    stream: bool = False  # Server-Sent Events response, read to the end
+    collects_recipe_ids: bool = (
+        False  # Response carries recipes whose ids later scenarios can fetch
+    )
+
+
+def _ingredients(rng: random.Random) -> List[str]:
+    return [rng.choice(PROTEINS)] + rng.sample(PANTRY, rng.randint(1, 3))
+
+
+def meal_plan_body(rng: random.Random) -> Dict[str, Any]:
+    return {
+        "dietary_restrictions": rng.choice(DIETS),
+        "calorie_target": rng.choice([None, 1600, 2000, 2400]),
+        "meals_per_day": rng.choice([3, 3, 4]),
+        "days": rng.choice([1, 3, 7]),
+        "allergies": rng.choice([[], [], ["peanuts"], ["shellfish"]]),
+        "preferences": None,
+    }
+
+
+def recipe_search_body(rng: random.Random) -> Dict[str, Any]:
+    return {
+        "ingredients": _ingredients(rng),
+        "dietary_restrictions": rng.choice(DIETS),
+        "meal_type": rng.choice(MEAL_TYPE_FILTERS),
+        "cuisine": rng.choice(CUISINES),
+        "cooking_time": rng.choice([None, 30, 45]),
+        "servings": rng.choice([2, 4]),
+    }
+
+
+def recipe_search_batch_body(rng: random.Random) -> Dict[str, Any]:
+    return {"items": [recipe_search_body(rng) for _ in range(rng.randint(2, 4))]}
+
+
+def nutrition_body(rng: random.Random) -> Dict[str, Any]:
+    recipe = fake_recipe(rng, 500)
+    return {
+        "recipe_name": recipe["name"],
+        "ingredients": recipe["ingredients"],
+        "servings": recipe["servings"],
+    }
+
+
+def nutrition_batch_body(rng: random.Random) -> Dict[str, Any]:
+    return {"items": [nutrition_body(rng) for _ in range(rng.randint(2, 5))]}
+
+
+def chat_body(rng: random.Random) -> Dict[str, Any]:
+    context = []
+    for _ in range(rng.randint(0, 3)):
+        context.append({"role": "user", "content": rng.choice(CHAT_MESSAGES)})
+        context.append(
+            {"role": "assistant", "content": "Here are a few ideas to get you started."}
+        )
+    return {"message": rng.choice(CHAT_MESSAGES), "context": context}
+
+
+def meal_plan_analyze_body(rng: random.Random) -> Dict[str, Any]:
+    """A client-side plan (already generated, possibly edited) to re-analyze"""
+    meals_per_day = rng.choice([3, 4])
+    calorie_target = rng.choice([1800, 2200])
+    plan = []
+    for day in range(1, rng.choice([3, 7]) + 1):
+        meals = []
+        for index, meal_type in enumerate(MEAL_TYPES[meals_per_day]):
+            recipe = fake_recipe(
+                rng, calorie_target / meals_per_day, meal_type=meal_type
+            )
+            meals.append(
+                {
+                    "meal_type": meal_type,
+                    "recipe": {"id": f"bench-{day}-{index}", **recipe},
+                }
+            )
+        total = {
+            nutrient: sum(meal["recipe"]["nutrition"][nutrient] for meal in meals)
+            for nutrient in meals[0]["recipe"]["nutrition"]
+        }
+        plan.append({"day": day, "meals": meals, "total_nutrition": total})
+    return {"plan": plan, "calorie_target": calorie_target}
+
+
+SCENARIOS = [
+    Scenario("health", "GET", "/api/health"),
+    Scenario("metrics", "GET", "/api/metrics"),
+    Scenario(
+        "recipes_search",
+        "POST",
+        "/api/recipes/search",
+        recipe_search_body,
+        collects_recipe_ids=True,
+    ),
+    Scenario(
+        "recipes_search_batch",
+        "POST",
+        "/api/recipes/search/batch",
+        recipe_search_batch_body,
+    ),
+    Scenario(
+        "recipes_search_stream",
+        "POST",
+        "/api/recipes/search/stream",
+        recipe_search_body,
+        stream=True,
+    ),
+    Scenario("recipes_get", "GET", "/api/recipes/{recipe_id}"),
+    Scenario("recipes_trending", "GET", "/api/recipes/trending"),
+    Scenario("meal_plan", "POST", "/api/meal-plan", meal_plan_body),
+    Scenario(
+        "meal_plan_stream", "POST", "/api/meal-plan/stream", meal_plan_body, stream=True
+    ),
+    Scenario(
+        "meal_plan_analyze", "POST", "/api/meal-plan/analyze", meal_plan_analyze_body
+    ),
+    Scenario("chat", "POST", "/api/chat", chat_body),
+    Scenario("chat_stream", "POST", "/api/chat/stream", chat_body, stream=True),
+    Scenario("nutrition_analysis", "POST", "/api/nutrition-analysis", nutrition_body),
+    Scenario(
+        "nutrition_analysis_batch",
+        "POST",
+        "/api/nutrition-analysis/batch",
+        nutrition_batch_body,
+    ),
+]
+
+SCENARIOS_BY_NAME = {scenario.name: scenario for scenario in SCENARIOS}
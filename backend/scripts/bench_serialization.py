@@ -0,0 +1,136 @@
+"""
+Benchmark response serialization for a maximum-size meal plan (7 days x 6 meals).
+
+Compares FastAPI's default response_model path (dump, re-validate,
+jsonable_encoder, json.dumps) with returning a ModelResponse.
+
+Usage (from backend/):
+    python scripts/bench_serialization.py [iterations]
+"""
+
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("RECIPE_STORE_PATH", "")
+
+from app.main import app  # noqa: E402
+from app.models.response import MealPlanResponse  # noqa: E402
+from app.routes.json_response import ModelResponse  # noqa: E402
+from app.routes.meal_plan import _add_analytics, _format_day  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+
+MEAL_TYPES = ["breakfast", "snack", "lunch", "snack", "dinner", "snack"]
+
+
+def raw_plan(days: int = 7, meals_per_day: int = 6) -> dict:
+    """LLM-shaped plan with realistic recipe sizes"""
+    return {
+        "days": [
+            {
+                "day": day,
+                "meals": [
+                    {
+                        "meal_type": MEAL_TYPES[meal],
+                        "recipe": {
+                            "name": f"Day {day} meal {meal} grain bowl",
+                            "description": (
+                                "A balanced bowl with roasted vegetables, greens "
+                                "and a lemon dressing. "
+                            )
+                            * 2,
+                            "ingredients": [
+                                f"{n + 1} cup ingredient number {n}" for n in range(10)
+                            ],
+                            "instructions": [
+                                f"Step {n + 1}: prepare and combine the ingredients."
+                                for n in range(6)
+                            ],
+                            "prep_time": 15,
+                            "cook_time": 25,
+                            "servings": 2,
+                            "difficulty": "easy",
+                            "cuisine": "Mediterranean",
+                            "nutrition": {
+                                "calories": 450,
+                                "protein": 22.5,
+                                "carbohydrates": 48.0,
+                                "fat": 16.0,
+                                "fiber": 9.0,
+                                "sugar": 6.5,
+                                "sodium": 520.0,
+                            },
+                            "tags": ["vegetarian", "high-fiber", "meal-prep"],
+                        },
+                    }
+                    for meal in range(meals_per_day)
+                ],
+            }
+            for day in range(1, days + 1)
+        ]
+    }
+
+
+def build_response() -> MealPlanResponse:
+    day_plans = [_format_day(day_data) for day_data in raw_plan()["days"]]
+    _add_analytics(day_plans, 2700)
+    return MealPlanResponse(
+        success=True,
+        plan=day_plans,
+        summary={"total_days": 7, "meals_per_day": 6, "average_calories_per_day": 2700},
+        generated_at=datetime.now(),
+    )
+
+
+async def default_path(field, model: MealPlanResponse) -> bytes:
+    content = await serialize_response(
+        field=field, response_content=model, is_coroutine=True
+    )
+    return JSONResponse(content).body
+
+
+def fast_path(model: MealPlanResponse) -> bytes:
+    return ModelResponse(model).body
+
+
+def timed(fn, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1000
+
+
+def main(iterations: int) -> None:
+    route = next(r for r in app.routes if getattr(r, "path", None) == "/api/meal-plan")
+    model = build_response()
+    loop = asyncio.new_event_loop()
+
+    default_body = loop.run_until_complete(default_path(route.response_field, model))
+    fast_body = fast_path(model)
+    print(
+        f"payload: {len(default_body)} bytes (default), "
+        f"{len(fast_body)} bytes (ModelResponse)"
+    )
+
+    build_ms = timed(build_response, iterations)
+    default_ms = timed(
+        lambda: loop.run_until_complete(default_path(route.response_field, model)),
+        iterations,
+    )
+    fast_ms = timed(lambda: fast_path(model), iterations)
+
+    print(f"normalize + analyze + validate: {build_ms:7.3f} ms")
+    print(f"serialize, response_model path:  {default_ms:7.3f} ms")
+    print(
+        f"serialize, ModelResponse:        {fast_ms:7.3f} ms  "
+        f"({default_ms / fast_ms:.1f}x faster)"
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
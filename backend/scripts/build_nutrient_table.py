@@ -0,0 +1,50 @@
+"""
+Compile app/data/nutrients.csv into the columnar app/data/nutrients.npz table
+loaded by the nutrition engine.
+
+Usage (from backend/):
+    python scripts/build_nutrient_table.py
+"""
+
+import csv
+from pathlib import Path
+
+import numpy as np
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "app" / "data"
+NUTRIENTS = ["calories", "protein", "carbohydrates", "fat", "fiber", "sugar", "sodium"]
+
+
+def build(source: Path, target: Path) -> None:
+    with source.open(newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(line for line in f if not line.startswith("#")))
+
+    names = [row["name"].strip().lower() for row in rows]
+    alias_names, alias_rows = [], []
+    for index, row in enumerate(rows):
+        aliases = [a for a in row["aliases"].split("|") if a.strip()]
+        for alias in [row["name"], *aliases]:
+            alias_names.append(alias.strip().lower())
+            alias_rows.append(index)
+
+    np.savez_compressed(
+        target,
+        names=np.array(names),
+        columns=np.array(NUTRIENTS),
+        nutrients=np.array(
+            [[float(row[c]) for c in NUTRIENTS] for row in rows], dtype=np.float32
+        ),
+        density=np.array(
+            [float(row["density_g_per_ml"]) for row in rows], dtype=np.float32
+        ),
+        unit_weight=np.array(
+            [float(row["unit_weight_g"]) for row in rows], dtype=np.float32
+        ),
+        alias_names=np.array(alias_names),
+        alias_rows=np.array(alias_rows, dtype=np.int32),
+    )
+    print(f"Wrote {len(rows)} ingredients ({len(alias_names)} names) to {target}")
+
+
+if __name__ == "__main__":
+    build(DATA_DIR / "nutrients.csv", DATA_DIR / "nutrients.npz")
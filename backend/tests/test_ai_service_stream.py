@@ -0,0 +1,117 @@
+"""
+Circuit breaker bookkeeping for streamed upstream calls (AIService._stream)
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from app.services.ai_service import AIService
+from app.services.rate_limiter import AdmissionRejected
+from app.services.resilience import CircuitBreaker, CircuitOpenError, UpstreamError
+
+PAYLOAD = {"model": "test", "messages": [{"role": "user", "content": "hi"}]}
+
+STREAM_BODY = (
+    'data: {"choices": [{"delta": {"content": "Hello"}}]}\n\n'
+    'data: {"choices": [{"delta": {"content": " there"}, "finish_reason": "stop"}]}\n\n'
+    "data: [DONE]\n\n"
+)
+
+
+def _service(handler) -> AIService:
+    service = AIService()
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return service
+
+
+def _half_open(service: AIService) -> CircuitBreaker:
+    breaker = service.resilience.breaker
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    breaker.opened_at -= breaker.reset_timeout
+    assert breaker.state == CircuitBreaker.OPEN
+    return breaker
+
+
+async def _drain(service: AIService) -> str:
+    return "".join([token async for token in service._stream(PAYLOAD, "chat")])
+
+
+@pytest.mark.asyncio
+async def test_half_open_trial_failing_with_retryable_status_reopens():
+    service = _service(lambda request: httpx.Response(503))
+    breaker = _half_open(service)
+
+    with pytest.raises(UpstreamError):
+        await _drain(service)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        await _drain(service)
+
+
+@pytest.mark.asyncio
+async def test_half_open_trial_failing_with_transport_error_reopens():
+    def handler(request):
+        raise httpx.ConnectError("connection refused", request=request)
+
+    service = _service(handler)
+    breaker = _half_open(service)
+
+    with pytest.raises(httpx.ConnectError):
+        await _drain(service)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker._trial_in_flight
+
+
+@pytest.mark.asyncio
+async def test_half_open_trial_with_non_retryable_status_closes():
+    service = _service(lambda request: httpx.Response(400))
+    breaker = _half_open(service)
+
+    with pytest.raises(UpstreamError):
+        await _drain(service)
+
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_half_open_trial_rejected_by_admission_is_released():
+    service = _service(lambda request: httpx.Response(200, text=STREAM_BODY))
+    breaker = _half_open(service)
+
+    def reject():
+        raise AdmissionRejected("Too many requests", 429)
+
+    service.admission.admit = reject
+    with pytest.raises(AdmissionRejected):
+        await _drain(service)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker._trial_in_flight
+
+    del service.admission.admit
+    assert await _drain(service) == "Hello there"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_half_open_trial_cancelled_is_released():
+    started = asyncio.Event()
+
+    async def handler(request):
+        started.set()
+        await asyncio.sleep(10)
+        return httpx.Response(200, text=STREAM_BODY)
+
+    service = _service(handler)
+    breaker = _half_open(service)
+
+    task = asyncio.ensure_future(_drain(service))
+    await started.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert not breaker._trial_in_flight
@@ -0,0 +1,82 @@
+"""
+Response cache: key normalization, LRU eviction, TTL expiry and the shared tier
+"""
+
+import time
+
+from app.services.cache import ResponseCache, make_cache_key
+from app.services.shared_state import SQLiteStore
+
+
+def test_cache_key_ignores_case_whitespace_and_list_order():
+    a = make_cache_key("recipes", ingredients=["Chicken ", "rice"], servings=2)
+    b = make_cache_key("recipes", servings=2, ingredients=["rice", "chicken"])
+    assert a == b
+    assert a.startswith("recipes:")
+
+
+def test_cache_key_differs_by_namespace_and_value():
+    base = make_cache_key("recipes", ingredients=["rice"], servings=2)
+    assert make_cache_key("meal_plan", ingredients=["rice"], servings=2) != base
+    assert make_cache_key("recipes", ingredients=["rice"], servings=4) != base
+
+
+def test_get_returns_stored_value_and_counts_hits():
+    cache = ResponseCache(max_entries=4, ttl=60)
+    assert cache.get("k") is None
+    cache.set("k", {"value": 1})
+
+    assert cache.get("k") == {"value": 1}
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_entry_is_a_miss():
+    cache = ResponseCache(max_entries=4, ttl=60)
+    cache.set("k", "v", ttl=0)
+    time.sleep(0.01)
+
+    assert cache.get("k") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_shared_tier_is_visible_to_another_cache(tmp_path):
+    store = SQLiteStore(str(tmp_path / "state.db"))
+    try:
+        ResponseCache(store=store).set("k", {"days": [1, 2]})
+        other = ResponseCache(store=store)
+
+        assert other.get("k") == {"days": [1, 2]}
+        assert other.stats()["shared_hits"] == 1
+        assert other.get("k") == {"days": [1, 2]}
+        assert other.stats()["shared_hits"] == 1
+    finally:
+        store.close()
+
+
+def test_clear_empties_both_tiers(tmp_path):
+    store = SQLiteStore(str(tmp_path / "state.db"))
+    try:
+        cache = ResponseCache(store=store)
+        cache.set("k", "v")
+        cache.clear()
+
+        assert cache.get("k") is None
+        assert ResponseCache(store=store).get("k") is None
+    finally:
+        store.close()
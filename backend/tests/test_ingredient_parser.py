@@ -0,0 +1,118 @@
+"""
+Ingredient line parsing: quantities, units, names and notes
+"""
+
+import pytest
+from app.services.ingredient_parser import (
+    canonical_unit,
+    name_tokens,
+    parse_ingredient,
+    singularize,
+)
+
+
+@pytest.mark.parametrize(
+    "line, quantity",
+    [
+        ("1 1/2 cups flour", 1.5),
+        ("1/2 cup milk", 0.5),
+        ("½ cup milk", 0.5),
+        ("1½ tbsp butter", 1.5),
+        (".25 tsp salt", 0.25),
+        ("two eggs", 2.0),
+        ("a pinch of salt", 1.0),
+    ],
+)
+def test_quantities_and_fractions(line, quantity):
+    assert parse_ingredient(line).quantity == pytest.approx(quantity)
+
+
+@pytest.mark.parametrize(
+    "line", ["2-3 cloves garlic", "2 to 3 cloves garlic", "2 – 3 cloves garlic"]
+)
+def test_ranges_use_the_midpoint(line):
+    parsed = parse_ingredient(line)
+    assert (parsed.quantity, parsed.quantity_max) == (2.0, 3.0)
+    assert parsed.amount == 2.5
+    assert parsed.count == 2.5
+    assert parsed.name == "garlic"
+
+
+@pytest.mark.parametrize(
+    "line, unit, grams, ml",
+    [
+        ("200 g flour", "g", 200.0, None),
+        ("1 lb chicken", "lb", 453.6, None),
+        ("2 cups rice", "cup", None, 480.0),
+        ("1 T sugar", "tbsp", None, 15.0),
+        ("1 t salt", "tsp", None, 5.0),
+        ("3 fl. oz cream", "fl oz", None, pytest.approx(88.71)),
+    ],
+)
+def test_units_convert_to_grams_or_ml(line, unit, grams, ml):
+    parsed = parse_ingredient(line)
+    assert parsed.unit == unit
+    assert parsed.grams == grams
+    assert parsed.ml == ml
+
+
+@pytest.mark.parametrize(
+    "line, grams",
+    [
+        ("2 (15 oz) cans chickpeas", pytest.approx(850.5)),
+        ("1 can (400g) tomatoes", 400.0),
+    ],
+)
+def test_parenthetical_package_sizes(line, grams):
+    parsed = parse_ingredient(line)
+    assert parsed.unit == "can"
+    assert parsed.grams == grams
+
+
+def test_preparation_words_and_comma_notes_leave_the_name():
+    parsed = parse_ingredient("1 1/2 cups finely diced onions, divided")
+    assert parsed.name == "onion"
+    assert parsed.preparation == "finely, diced, divided"
+
+
+def test_bullets_are_stripped():
+    assert parse_ingredient("- 200 g flour").name == "flour"
+    assert parse_ingredient("3. 2 eggs").quantity == 2.0
+
+
+@pytest.mark.parametrize(
+    "line, name",
+    [
+        ("salt to taste", "salt"),
+        ("Salt To Taste", "salt"),
+        ("Salt, To Taste", "salt"),
+        ("Parsley (Optional)", "parsley"),
+        ("Black pepper AS NEEDED", "black pepper"),
+        ("Lime wedges for serving", "lime wedge"),
+    ],
+)
+def test_negligible_phrases_are_flagged_and_removed(line, name):
+    parsed = parse_ingredient(line)
+    assert parsed.negligible
+    assert parsed.name == name
+
+
+def test_plain_line_is_not_negligible():
+    assert not parse_ingredient("2 cups tasty cheese").negligible
+
+
+def test_unknown_unit_stays_in_the_name():
+    parsed = parse_ingredient("2 ripe bananas")
+    assert parsed.unit is None
+    assert parsed.count == 2.0
+    assert parsed.name == "ripe banana"
+
+
+def test_helpers():
+    assert canonical_unit("Tablespoons") == "tbsp"
+    assert canonical_unit("T") == "tbsp"
+    assert canonical_unit("furlong") is None
+    assert [
+        singularize(w) for w in ("berries", "tomatoes", "peaches", "glass", "eggs")
+    ] == ["berry", "tomato", "peach", "glass", "egg"]
+    assert name_tokens("2 cups Baby Spinach") == frozenset({"baby", "spinach"})
@@ -0,0 +1,134 @@
+"""
+Incremental JSON extraction from LLM output (JSONStreamParser, extract_json)
+"""
+
+import json
+
+import pytest
+from app.services.ai_service import AIService
+from app.services.json_stream import JSONStreamParser, extract_json
+
+
+def _feed(text: str, size: int, **kwargs):
+    parser = JSONStreamParser(**kwargs)
+    emitted = []
+    for start in range(0, len(text), size):
+        emitted.extend(parser.feed(text[start : start + size]))
+    return parser, emitted
+
+
+def test_extract_json_skips_prose_and_markdown():
+    text = 'Here is your plan:\n```json\n{"days": [{"day": 1}]}\n```\nEnjoy!'
+    assert extract_json(text) == {"days": [{"day": 1}]}
+
+
+def test_extract_json_respects_root_kinds():
+    text = 'Note {"a": 1} then [1, 2]'
+    assert extract_json(text, root="[") == [1, 2]
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 1000])
+def test_brackets_and_escapes_inside_strings_are_ignored(size):
+    value = {
+        "name": 'Say "hi" } ]',
+        "path": "C:\\dir\\",
+        "tags": ["[x]", "{y}"],
+        "quote": 'a \\"b\\" c',
+    }
+    text = "prefix " + json.dumps(value) + " suffix {"
+    parser, _ = _feed(text, size)
+    assert parser.done
+    assert parser.result() == value
+
+
+@pytest.mark.parametrize("size", [1, 3, 50])
+def test_watched_elements_are_emitted_as_they_close(size):
+    text = json.dumps(
+        {"days": [{"meals": [{"n": 1}, {"n": 2}]}, {"meals": [[1, [2, 3]], {"n": 4}]}]}
+    )
+    _, emitted = _feed(text, size, watch=[("days", "*", "meals", "*"), ("days", "*")])
+
+    paths = [path for path, _ in emitted]
+    assert paths == [
+        ("days", 0, "meals", 0),
+        ("days", 0, "meals", 1),
+        ("days", 0),
+        ("days", 1, "meals", 0),
+        ("days", 1, "meals", 1),
+        ("days", 1),
+    ]
+    assert emitted[3][1] == [1, [2, 3]]
+
+
+def test_escaped_keys_are_decoded_for_paths():
+    text = '{"we\\"ird": [{"a": 1}]}'
+    _, emitted = _feed(text, 2, watch=[('we"ird', "*")])
+    assert emitted == [(('we"ird', 0), {"a": 1})]
+
+
+def test_root_pattern_emits_the_whole_value():
+    _, emitted = _feed('[{"a": 1}, {"b": 2}]', 4, watch=[()])
+    assert emitted == [((), [{"a": 1}, {"b": 2}])]
+
+
+def test_truncated_input_keeps_complete_elements_and_fails_result():
+    text = '[{"name": "A"}, {"name": "B"}, {"name": "C", "steps": ["chop", "st'
+    parser, emitted = _feed(text, 5, watch=[("*",)])
+
+    assert [value for _, value in emitted] == [{"name": "A"}, {"name": "B"}]
+    assert not parser.done
+    with pytest.raises(ValueError):
+        parser.result()
+
+
+def test_text_after_the_root_is_ignored():
+    parser = JSONStreamParser(watch=[("*",)])
+    assert parser.feed('[{"a": 1}] and then [{"b": 2}]') == [((0,), {"a": 1})]
+    assert parser.feed('[{"c": 3}]') == []
+    assert parser.result() == [{"a": 1}]
+
+
+def test_invalid_watched_element_is_skipped():
+    _, emitted = _feed('[{"a": 1,}, {"b": 2}]', 3, watch=[("*",)])
+    assert emitted == [((1,), {"b": 2})]
+
+
+async def _streamed_recipes(reply: str):
+    service = AIService()
+
+    async def stream(payload, endpoint, units=1.0):
+        for start in range(0, len(reply), 5):
+            yield reply[start : start + 5]
+
+    service._stream = stream
+    return [
+        recipe
+        async for recipe in service.find_recipes_stream(
+            ["egg"], [], None, None, None, 2, 2
+        )
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "reply",
+    [
+        '[{"name": "A", "nutrition": {"calories": 1}}, {"name": "B"}]',
+        '{"recipes": [{"name": "A", "nutrition": {"calories": 1}}, {"name": "B"}]}',
+    ],
+)
+async def test_recipe_stream_yields_array_elements(reply):
+    assert [recipe["name"] for recipe in await _streamed_recipes(reply)] == ["A", "B"]
+
+
+@pytest.mark.asyncio
+async def test_recipe_stream_yields_bare_object_whole():
+    recipes = await _streamed_recipes(
+        '{"name": "A", "nutrition": {"calories": 1}, "tags": ["x"]}'
+    )
+    assert recipes == [{"name": "A", "nutrition": {"calories": 1}, "tags": ["x"]}]
+
+
+@pytest.mark.asyncio
+async def test_recipe_stream_drops_truncated_bare_object():
+    assert await _streamed_recipes('{"name": "A", "nutrition": {"calories": 1}') == []
@@ -0,0 +1,52 @@
+"""
+Per-day meal plan generation (AIService._generate_single_day)
+"""
+
+import asyncio
+
+import pytest
+from app.services.ai_service import AIService
+
+
+def _service(reply: str) -> AIService:
+    service = AIService()
+
+    async def generate(prompt, endpoint="chat", units=1.0):
+        return reply
+
+    service._generate = generate
+    return service
+
+
+async def _day(service: AIService, day: int = 2):
+    return await service._generate_single_day(
+        asyncio.Semaphore(1), day, [], None, 3, 3, [], None
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "reply", ['{"days": []}', "{}", '{"days": [{"meals": []}]}', '{"days": [null]}']
+)
+async def test_reply_without_meals_is_an_error(reply):
+    with pytest.raises(ValueError):
+        await _day(_service(reply))
+
+
+@pytest.mark.asyncio
+async def test_day_is_numbered_by_its_position_in_the_plan():
+    reply = (
+        '{"days": [{"day": 1, "meals": '
+        '[{"meal_type": "lunch", "recipe": {"name": "Soup"}}]}]}'
+    )
+    day = await _day(_service(reply), day=3)
+    assert day["day"] == 3
+    assert day["meals"][0]["recipe"]["name"] == "Soup"
+
+
+@pytest.mark.asyncio
+async def test_bare_day_object_is_accepted():
+    day = await _day(
+        _service('{"meals": [{"meal_type": "dinner", "recipe": {"name": "Stew"}}]}')
+    )
+    assert day["day"] == 2
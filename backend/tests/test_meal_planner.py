@@ -0,0 +1,146 @@
+"""
+Local meal planner: calorie targets, repeat caps, allergies and preferences
+"""
+
+import pytest
+from app.services import meal_planner as meal_planner_module
+from app.services.meal_planner import MealPlanner, allergen_words, preference_terms
+
+STORED = {}
+
+
+@pytest.fixture(autouse=True)
+def recipe_store(monkeypatch):
+    STORED.clear()
+    monkeypatch.setattr(meal_planner_module.recipe_store, "get", STORED.get)
+
+
+def _recipe(
+    recipe_id,
+    meal_type,
+    calories,
+    name,
+    cuisine=None,
+    ingredients=("1 cup rice",),
+    protein=25,
+):
+    recipe = {
+        "id": recipe_id,
+        "name": name,
+        "meal_type": meal_type,
+        "cuisine": cuisine,
+        "tags": [],
+        "ingredients": list(ingredients),
+        "nutrition": {"calories": calories, "protein": protein},
+    }
+    STORED[recipe_id] = recipe
+    return recipe
+
+
+def _planner(recipes, max_uses=1, dietary=()):
+    planner = MealPlanner(tolerance=0.1, max_uses=max_uses)
+    for recipe in recipes:
+        planner.add(recipe, dietary)
+    return planner
+
+
+def _week_catalog(days=7):
+    recipes = []
+    for i in range(days):
+        recipes.append(_recipe(f"b{i}", "breakfast", 500 + i * 5, f"Oat bowl {i}"))
+        recipes.append(
+            _recipe(f"l{i}", "lunch", 700 + i * 3, f"Green curry {i}", cuisine="Thai")
+        )
+        recipes.append(
+            _recipe(
+                f"d{i}", "dinner", 700, f"Bean stew {i}", ingredients=["1 can beans"]
+            )
+        )
+    return recipes
+
+
+def _ids(day):
+    return [meal["recipe"]["id"] for meal in day["meals"]]
+
+
+def test_days_hit_the_calorie_target():
+    plan = _planner(_week_catalog()).plan([], 2000, 3, 3, [])
+
+    assert plan.complete
+    for day in plan.days.values():
+        total = sum(meal["recipe"]["nutrition"]["calories"] for meal in day["meals"])
+        assert abs(total - 2000) <= 200
+        assert [meal["meal_type"] for meal in day["meals"]] == [
+            "breakfast",
+            "lunch",
+            "dinner",
+        ]
+
+
+def test_unreachable_calorie_target_leaves_days_missing():
+    plan = _planner(_week_catalog()).plan([], 4000, 3, 2, [])
+    assert plan.missing == [1, 2]
+    assert not plan.days
+
+
+def test_recipes_are_not_repeated_beyond_the_cap():
+    plan = _planner(_week_catalog(days=3)).plan([], None, 3, 5, [])
+
+    used = [recipe_id for day in plan.days.values() for recipe_id in _ids(day)]
+    assert len(used) == len(set(used))
+    assert sorted(plan.days) == [1, 2, 3]
+    assert plan.missing == [4, 5]
+
+
+def test_higher_cap_allows_reuse():
+    plan = _planner(_week_catalog(days=2), max_uses=2).plan([], None, 3, 4, [])
+    assert plan.complete
+
+
+def test_three_recipes_do_not_fill_a_week():
+    recipes = [
+        _recipe("b", "breakfast", 500, "Oats"),
+        _recipe("l", "lunch", 700, "Pad thai", cuisine="Thai"),
+        _recipe("d", "dinner", 700, "Curry"),
+    ]
+    plan = _planner(recipes).plan([], None, 3, 7, [], "I love Thai food")
+    assert len(plan.days) == 1
+    assert plan.missing == [2, 3, 4, 5, 6, 7]
+
+
+def test_allergens_and_avoided_ingredients_are_excluded():
+    plan = _planner(_week_catalog()).plan([], None, 3, 2, ["beans"])
+    assert plan.missing == [1, 2]
+
+    plan = _planner(_week_catalog()).plan([], None, 3, 2, [], "anything but no beans")
+    assert plan.missing == [1, 2]
+
+
+def test_days_without_a_preferred_meal_are_left_to_the_llm():
+    plan = _planner(_week_catalog()).plan([], None, 3, 2, [], "I love Mexican food")
+    assert plan.missing == [1, 2]
+
+    plan = _planner(_week_catalog()).plan([], None, 3, 2, [], "I love Thai food")
+    assert plan.complete
+
+
+def test_dietary_restrictions_must_all_be_tagged():
+    planner = _planner(_week_catalog(), dietary=["vegan"])
+    assert planner.plan(["vegan"], None, 3, 1, []).complete
+    assert planner.plan(["vegan", "keto"], None, 3, 1, []).missing == [1]
+
+
+def test_preference_terms():
+    assert preference_terms("I love Thai food but no mushrooms") == (
+        frozenset({"thai"}),
+        {"mushroom"},
+    )
+    wanted, avoided = preference_terms("dairy-free")
+    assert not wanted
+    assert {"milk", "cheese", "butter"} <= avoided
+    assert preference_terms(None) == (frozenset(), set())
+
+
+def test_allergen_words_expand_groups():
+    words = allergen_words(["Tree nuts", "shellfish"])
+    assert {"almond", "walnut", "shrimp", "crab"} <= words
@@ -0,0 +1,71 @@
+"""
+Local nutrition engine: ingredient name matching and recipe totals
+"""
+
+import pytest
+from app.services.ingredient_parser import parse_ingredient
+from app.services.nutrition_engine import NutritionEngine
+
+
+@pytest.fixture(scope="module")
+def engine() -> NutritionEngine:
+    engine = NutritionEngine()
+    engine.load()
+    return engine
+
+
+def _matched(engine: NutritionEngine, line: str):
+    row = engine.match(parse_ingredient(line).name)
+    return engine.names[row] if row is not None else None
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "1 cup coconut water",
+        "2 cups potato chips",
+        "1 cube chicken bouillon",
+        "1/2 cup cashew cream",
+        "1 cup rice flour",
+        "200g egg noodles",
+        "1 cup apple juice",
+    ],
+)
+def test_compound_ingredients_are_not_matched_on_one_word(engine, line):
+    assert _matched(engine, line) is None
+
+
+@pytest.mark.parametrize(
+    "line, expected",
+    [
+        ("2 boneless skinless chicken breasts", "chicken breast"),
+        ("2 tbsp extra virgin olive oil", "olive oil"),
+        ("1 large red onion, diced", "onion"),
+        ("2 cups baby spinach", "spinach"),
+        ("1/2 cup frozen peas", "peas"),
+        ("4 large eggs", "egg"),
+        ("1 lb ground beef", "ground beef"),
+        ("1 can black beans", "black beans"),
+    ],
+)
+def test_full_names_and_modified_head_nouns_are_matched(engine, line, expected):
+    assert _matched(engine, line) == expected
+
+
+def test_compound_ingredient_is_reported_unresolved(engine):
+    estimate = engine.estimate(["1 cup coconut water", "100g rice"])
+    assert estimate.unresolved == ["1 cup coconut water"]
+    assert estimate.resolved == ["100g rice"]
+
+
+def test_totals_scale_with_grams(engine):
+    single = engine.estimate(["100g rice"]).totals
+    double = engine.estimate(["200g rice"]).totals
+    assert single["calories"] > 0
+    assert double["calories"] == pytest.approx(single["calories"] * 2)
+
+
+def test_negligible_line_counts_as_zero_grams(engine):
+    estimate = engine.estimate(["salt to taste"])
+    assert estimate.resolved == ["salt to taste"]
+    assert estimate.totals["sodium"] == 0
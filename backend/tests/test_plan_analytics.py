@@ -0,0 +1,118 @@
+"""
+Meal plan nutrition analytics (plan_analytics.analyze_plan)
+"""
+
+import pytest
+from app.services.plan_analytics import analyze_plan
+
+
+def _meal(meal_type, calories, protein=0, carbohydrates=0, fat=0, **extra):
+    nutrition = {
+        "calories": calories,
+        "protein": protein,
+        "carbohydrates": carbohydrates,
+        "fat": fat,
+        **extra,
+    }
+    return {
+        "meal_type": meal_type,
+        "recipe": {"name": meal_type, "nutrition": nutrition},
+    }
+
+
+PLAN = [
+    {
+        "day": 1,
+        "meals": [
+            _meal("breakfast", 400, 20, 50, 10),
+            _meal("dinner", 1500, 50, 150, 60, fiber=8),
+        ],
+    },
+    {
+        "day": 2,
+        "meals": [
+            _meal("breakfast", 500, 25, 60, 15),
+            _meal("dinner", 1700, 60, 200, 70, fiber=4),
+        ],
+    },
+]
+
+
+def test_per_day_and_plan_totals():
+    result = analyze_plan(PLAN)
+
+    assert [day["total_nutrition"]["calories"] for day in result["days"]] == [
+        1900,
+        2200,
+    ]
+    assert result["days"][0]["total_nutrition"]["fiber"] == 8.0
+    assert result["total_nutrition"]["calories"] == 4100
+    assert result["total_nutrition"]["protein"] == 155.0
+    assert result["average_per_day"]["calories"] == 2050
+
+
+def test_macro_percentages_are_shares_of_macro_calories():
+    shares = analyze_plan(PLAN)["macro_percentages"]
+    protein, carbs, fat = 155 * 4, 460 * 4, 155 * 9
+    total = protein + carbs + fat
+
+    assert shares["protein"] == pytest.approx(protein / total * 100, abs=0.1)
+    assert shares["carbohydrates"] == pytest.approx(carbs / total * 100, abs=0.1)
+    assert shares["fat"] == pytest.approx(fat / total * 100, abs=0.1)
+
+
+def test_calorie_deviation_against_target():
+    result = analyze_plan(PLAN, calorie_target=2000)
+
+    assert [day["calorie_deviation"] for day in result["days"]] == [-100.0, 200.0]
+    assert result["average_calorie_deviation"] == 50.0
+    assert result["max_calorie_deviation"] == 200.0
+    assert result["days_on_target"] == 2
+
+
+def test_without_target_deviation_is_empty():
+    result = analyze_plan(PLAN)
+    assert result["days"][0]["calorie_deviation"] is None
+    assert result["days_on_target"] is None
+
+
+def test_by_meal_type():
+    by_type = {
+        entry["meal_type"]: entry for entry in analyze_plan(PLAN)["by_meal_type"]
+    }
+
+    assert by_type["breakfast"]["meals"] == 2
+    assert by_type["breakfast"]["total_nutrition"]["calories"] == 900
+    assert by_type["dinner"]["calorie_share"] == pytest.approx(
+        3200 / 4100 * 100, abs=0.1
+    )
+
+
+def test_missing_and_malformed_nutrition_count_as_zero():
+    plan = [
+        {
+            "meals": [
+                {
+                    "meal_type": None,
+                    "recipe": {"nutrition": {"calories": "350", "protein": "n/a"}},
+                },
+                {"recipe": None},
+                {"meal_type": "snack"},
+            ]
+        }
+    ]
+    result = analyze_plan(plan)
+
+    assert result["days"][0]["day"] == 1
+    assert result["total_nutrition"]["calories"] == 350
+    assert result["total_nutrition"]["protein"] == 0.0
+    assert {entry["meal_type"] for entry in result["by_meal_type"]} == {"meal", "snack"}
+
+
+def test_empty_plan():
+    result = analyze_plan([], calorie_target=2000)
+
+    assert result["days"] == []
+    assert result["total_nutrition"]["calories"] == 0
+    assert result["average_calorie_deviation"] is None
+    assert result["by_meal_type"] == []
@@ -0,0 +1,89 @@
+"""
+Persistent recipe store: ids, read-through cache and dietary tags on disk
+"""
+
+import pytest
+from app.services.recipe_store import RecipeStore, recipe_id_for
+
+
+def _recipe(name: str = "Lentil soup") -> dict:
+    recipe = {
+        "name": name,
+        "ingredients": ["1 cup lentils", "1 onion"],
+        "instructions": ["Simmer"],
+    }
+    recipe["id"] = recipe_id_for(recipe)
+    return recipe
+
+
+async def _stored(path) -> dict:
+    store = RecipeStore(str(path))
+    try:
+        return {recipe["id"]: dietary for recipe, dietary in store.iter_recipes()}
+    finally:
+        await store.close()
+
+
+def test_recipe_id_ignores_case_and_whitespace():
+    a = _recipe()
+    b = {
+        "name": "  LENTIL   soup",
+        "ingredients": ["1 cup Lentils", "1  onion"],
+        "instructions": ["simmer"],
+    }
+    assert recipe_id_for(b) == a["id"]
+
+
+@pytest.mark.asyncio
+async def test_saved_recipe_is_readable_after_restart(tmp_path):
+    recipe = _recipe()
+    store = RecipeStore(str(tmp_path / "recipes.db"))
+    store.save(recipe, ["vegan"])
+    await store.close()
+
+    reopened = RecipeStore(str(tmp_path / "recipes.db"))
+    assert reopened.get(recipe["id"]) == recipe
+    assert reopened.stats()["disk_hits"] == 1
+    await reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_saving_again_widens_dietary_tags_on_disk(tmp_path):
+    recipe = _recipe()
+    store = RecipeStore(str(tmp_path / "recipes.db"))
+    store.save(recipe, ["vegan"])
+    store.save(recipe, ["vegan"])
+    store.save(recipe, ["gluten_free"])
+    await store.close()
+
+    assert await _stored(tmp_path / "recipes.db") == {
+        recipe["id"]: ["gluten_free", "vegan"]
+    }
+
+
+@pytest.mark.asyncio
+async def test_dietary_tags_merge_with_rows_written_earlier(tmp_path):
+    recipe = _recipe()
+    first = RecipeStore(str(tmp_path / "recipes.db"))
+    first.save(recipe, ["vegan"])
+    await first.close()
+
+    second = RecipeStore(str(tmp_path / "recipes.db"))
+    second.save(recipe, ["dairy_free"])
+    await second.close()
+
+    assert await _stored(tmp_path / "recipes.db") == {
+        recipe["id"]: ["dairy_free", "vegan"]
+    }
+
+
+@pytest.mark.asyncio
+async def test_listeners_see_every_save(tmp_path):
+    seen = []
+    store = RecipeStore(str(tmp_path / "recipes.db"))
+    store.subscribe(lambda recipe, dietary: seen.append((recipe["name"], dietary)))
+    store.save(_recipe(), ["vegan"])
+    store.save(_recipe(), ["keto"])
+    await store.close()
+
+    assert seen == [("Lentil soup", ["vegan"]), ("Lentil soup", ["keto"])]
@@ -0,0 +1,88 @@
+"""
+Similarity cache lookups and how meal plan requests are keyed into it
+"""
+
+import pytest
+from app.config import settings
+from app.services.ai_service import AIService
+from app.services.similarity_cache import SimilarityCache, jaccard
+
+CONSTRAINTS = {"kind": "recipes", "meal_type": "dinner"}
+
+
+def test_jaccard():
+    assert jaccard(frozenset({"a", "b"}), frozenset({"b", "c"})) == pytest.approx(1 / 3)
+    assert jaccard(frozenset(), frozenset()) == 1.0
+
+
+def test_near_duplicate_features_hit():
+    cache = SimilarityCache(threshold=0.7)
+    cache.store(CONSTRAINTS, {"chicken", "rice", "garlic", "onion"}, "plan")
+
+    assert (
+        cache.lookup(CONSTRAINTS, {"chicken", "rice", "garlic", "onion", "ginger"})
+        == "plan"
+    )
+    assert cache.lookup(CONSTRAINTS, {"beef", "potato"}) is None
+
+
+def test_constraints_must_match_exactly():
+    cache = SimilarityCache(threshold=0.7)
+    cache.store(CONSTRAINTS, {"chicken", "rice"}, "plan")
+
+    assert (
+        cache.lookup({**CONSTRAINTS, "meal_type": "lunch"}, {"chicken", "rice"}) is None
+    )
+
+
+class _Planner:
+    """AIService whose upstream meal plan call is replaced by a counter"""
+
+    def __init__(self):
+        self.service = AIService()
+        self.service.cache.clear()
+        self.calls = []
+
+        async def run_meal_plan(prompt, meal_count):
+            self.calls.append(prompt)
+            return {"days": [{"day": 1, "meals": [], "plan": len(self.calls)}]}
+
+        self.service._run_meal_plan = run_meal_plan
+
+    async def plan(self, preferences):
+        plan = await self.service.generate_meal_plan([], 2000, 3, 1, [], preferences)
+        return plan["days"][0]["plan"]
+
+
+@pytest.fixture
+def planner(monkeypatch):
+    monkeypatch.setattr(settings, "MEAL_PLANNER_ENABLED", False)
+    return _Planner()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "plain, negated",
+    [
+        ("mushrooms please", "no mushrooms please"),
+        ("I love nuts", "I love nuts but no peanuts"),
+        ("dairy", "dairy-free"),
+        ("spicy food with fish", "nothing spicy, no fish"),
+    ],
+)
+async def test_negated_and_plain_preferences_never_share_a_plan(
+    planner, plain, negated
+):
+    first = await planner.plan(plain)
+    second = await planner.plan(negated)
+
+    assert first != second
+    assert await planner.plan(negated) == second
+    assert await planner.plan(plain) == first
+
+
+@pytest.mark.asyncio
+async def test_rewordings_of_the_same_preferences_share_a_plan(planner):
+    first = await planner.plan("I love Thai food, no mushrooms")
+    assert await planner.plan("Thai food please. Without mushrooms") == first
+    assert len(planner.calls) == 1
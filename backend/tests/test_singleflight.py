@@ -0,0 +1,91 @@
+"""
+Single-flight coalescing of identical in-flight calls
+"""
+
+import asyncio
+
+import pytest
+from app.services.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_with_one_key_run_once():
+    flights = SingleFlight()
+    calls = 0
+
+    async def work(value):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return value * 2
+
+    results = await asyncio.gather(*(flights.do("k", work, 21) for _ in range(5)))
+
+    assert results == [42] * 5
+    assert calls == 1
+    assert flights.stats() == {"leaders": 1, "coalesced": 4, "in_flight": 0}
+
+
+@pytest.mark.asyncio
+async def test_different_keys_run_separately():
+    flights = SingleFlight()
+
+    async def work(value):
+        await asyncio.sleep(0.01)
+        return value
+
+    assert await asyncio.gather(flights.do("a", work, 1), flights.do("b", work, 2)) == [
+        1,
+        2,
+    ]
+    assert flights.leaders == 2
+
+
+@pytest.mark.asyncio
+async def test_failure_is_raised_to_every_waiter():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream broke")
+
+    results = await asyncio.gather(
+        *(flights.do("k", fail) for _ in range(3)), return_exceptions=True
+    )
+
+    assert all(isinstance(r, ValueError) for r in results)
+    assert flights.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_the_shared_call():
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+        return "done"
+
+    first = asyncio.ensure_future(flights.do("k", work))
+    second = asyncio.ensure_future(flights.do("k", work))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+
+    assert await second == "done"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+
+@pytest.mark.asyncio
+async def test_key_is_free_again_after_completion():
+    flights = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    assert await flights.do("k", work) == 1
+    assert await flights.do("k", work) == 2
@@ -86,10 +86,15 @@ export const generateMealPlan = async (preferences: MealPlanRequest) => {
 };
 
 /**
- * Chat with AI assistant
+ * Chat with AI assistant. Pass back the session_id from the previous reply
+ * to continue a conversation; the server keeps the history.
  */
-export const chatWithAI = async (message: string, context: any[] | null = null) => {
-  const response = await apiClient.post('/chat', { message, context });
+export const chatWithAI = async (
+  message: string,
+  context: any[] | null = null,
+  sessionId: string | null = null
+) => {
+  const response = await apiClient.post('/chat', { message, context, session_id: sessionId });
   return response.data;
 };
 